@@ -19,6 +19,9 @@ from api.utils.cache import warm_cache, get_cache_stats
 from api.utils.websocket_manager import ws_manager
 from api.utils.health import health_monitor, HealthStatus, ComponentHealth
 from api.utils.pool_monitor import pool_monitor
+from api.utils.ai_executor import ai_executor
+from api.utils.ai_engines import ai_engines
+from api.utils.ai_jobs import ai_jobs
 
 # Configure logging
 logging.basicConfig(
@@ -108,6 +111,9 @@ async def lifespan(app: FastAPI):
     # Start WebSocket manager heartbeat
     await ws_manager.start()
     
+    # Start AI worker processes
+    await ai_executor.start()
+    
     # Warm caches
     await warm_cache()
     
@@ -127,6 +133,10 @@ async def lifespan(app: FastAPI):
     # Stop WebSocket manager
     await ws_manager.stop()
     
+    # Stop AI worker processes and release per-game AI tables
+    await ai_executor.stop()
+    ai_engines.clear()
+    
     # Stop scheduler
     scheduler.shutdown()
     
@@ -226,6 +236,10 @@ async def get_metrics():
         "cache": cache_stats,
         "websocket": ws_stats,
         "database_pool": db_pool,
+        "ai_executor": ai_executor.get_stats(),
+        "ai_engines": ai_engines.get_stats(),
+        "ai_jobs": ai_jobs.get_stats(),
+        "ai_search": ai_executor.search_metrics.get_stats(),
         "active_games": len(game_service.games),
     }
 
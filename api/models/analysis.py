@@ -0,0 +1,65 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional, Tuple
+
+from api.models.game import PlayerSymbol
+from api.utils.analysis import (
+    AI_ANALYSIS_MAX_NODES, AI_ANALYSIS_MAX_POSITIONS, AI_ANALYSIS_NODES, ANALYSIS_DEPTH,
+    ANALYSIS_MAX_DEPTH, ANALYSIS_MAX_TIME_LIMIT, ANALYSIS_TIME_LIMIT, STREAM_TIME_LIMIT,
+)
+
+
+class AnalysisPosition(BaseModel):
+    """A position to analyze"""
+    cells: str  # 81 characters of "X", "O" or ".", board by board
+    active_board: Optional[int] = Field(None, ge=0, le=8)  # None: any board
+    side: PlayerSymbol = PlayerSymbol.O  # Side to move
+
+    @field_validator("cells")
+    @classmethod
+    def check_cells(cls, value: str) -> str:
+        value = value.strip().upper()
+        if len(value) != 81 or set(value) - set("XO."):
+            raise ValueError("cells must be 81 characters of 'X', 'O' or '.'")
+        return value
+
+    @field_validator("side")
+    @classmethod
+    def check_side(cls, value: PlayerSymbol) -> PlayerSymbol:
+        if value == PlayerSymbol.T:
+            raise ValueError("side must be X or O")
+        return value
+
+
+class AnalysisRequest(BaseModel):
+    """Positions to analyze and the search budget for each"""
+    positions: List[AnalysisPosition] = Field(
+        ..., min_length=1, max_length=AI_ANALYSIS_MAX_POSITIONS
+    )
+    max_nodes: int = Field(AI_ANALYSIS_NODES, ge=1, le=AI_ANALYSIS_MAX_NODES)
+    max_depth: int = Field(ANALYSIS_DEPTH, ge=1, le=ANALYSIS_MAX_DEPTH)
+    time_limit: float = Field(ANALYSIS_TIME_LIMIT, gt=0, le=ANALYSIS_MAX_TIME_LIMIT)
+
+
+class AnalysisResult(BaseModel):
+    """Analysis of one position; moves are [board_index, cell_index]"""
+    best_move: Optional[Tuple[int, int]] = None
+    score: Optional[int] = None  # For the side to move
+    pv: List[Tuple[int, int]] = []
+    depth: int = 0
+    nodes: int = 0
+    time_ms: float = 0
+    nps: int = 0
+    cached: bool = False
+    error: Optional[str] = None  # e.g. the game is already decided
+
+
+class AnalysisResponse(BaseModel):
+    """Results in the order of the request's positions"""
+    results: List[AnalysisResult]
+
+
+class AnalysisStreamRequest(BaseModel):
+    """Budget of a streamed analysis of a game's current position (start_analysis)"""
+    max_nodes: int = Field(AI_ANALYSIS_MAX_NODES, ge=1, le=AI_ANALYSIS_MAX_NODES)
+    max_depth: int = Field(ANALYSIS_MAX_DEPTH, ge=1, le=ANALYSIS_MAX_DEPTH)
+    time_limit: float = Field(STREAM_TIME_LIMIT, gt=0, le=ANALYSIS_MAX_TIME_LIMIT)
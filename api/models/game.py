@@ -1,9 +1,11 @@
 from datetime import datetime
 from enum import Enum
 from typing import List, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 import uuid
 
+from api.utils.difficulty import normalize_difficulty
+
 class GameMode(str, Enum):
     REMOTE = "remote"
     AI = "ai"
@@ -49,7 +51,12 @@ class GameState(BaseModel):
 
 class GameCreateRequest(BaseModel):
     mode: GameMode = GameMode.REMOTE
-    ai_difficulty: Optional[str] = "medium"  # "easy", "medium", "hard" - only for AI mode
+    ai_difficulty: Optional[str] = "medium"  # A level of DIFFICULTY_BUDGETS - only for AI mode
+
+    @field_validator("ai_difficulty")
+    @classmethod
+    def check_ai_difficulty(cls, value: Optional[str]) -> str:
+        return normalize_difficulty(value)
 
 class GameResetRequest(BaseModel):
     game_id: str
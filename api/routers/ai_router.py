@@ -5,7 +5,11 @@ API routes for AI gameplay
 from fastapi import APIRouter, HTTPException, WebSocket
 from pydantic import BaseModel
 from typing import List, Tuple
+from api.models.analysis import AnalysisRequest, AnalysisResponse, AnalysisResult
+from api.utils.ai_executor import ai_executor
 from api.utils.ai_logic import AILogic
+from api.utils.ai_scheduler import AIOverloadedError
+from api.utils.bitboard import BitBoard, symbol_to_side
 from api.services.game_service import GameService
 
 router = APIRouter(prefix="/api/ai", tags=["ai"])
@@ -69,6 +73,34 @@ async def get_ai_move(request: AIMovementRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/analyze", response_model=AnalysisResponse)
+async def analyze_positions(request: AnalysisRequest):
+    """
+    Analyze positions without creating games
+    
+    Args:
+        positions: Cell strings with active board and side to move
+        max_nodes, max_depth, time_limit: Search budget per position
+        
+    Returns:
+        Best move, score, principal variation and search statistics
+        for each position
+    """
+    positions = [
+        BitBoard.from_string(
+            position.cells, position.active_board, symbol_to_side(position.side)
+        )
+        for position in request.positions
+    ]
+    try:
+        results = await ai_executor.analyze(
+            positions, request.max_nodes, request.max_depth, request.time_limit
+        )
+    except AIOverloadedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return AnalysisResponse(results=[AnalysisResult(**result) for result in results])
+
+
 @router.get("/health")
 async def health_check():
     """Health check for AI service"""
@@ -159,6 +159,10 @@ async def websocket_endpoint(websocket: WebSocket, game_id: str, user_id: str):
                 await game_service.handle_make_move(websocket, game_id, user_id, move_data, game_service.active_websockets[game_id])
             elif message_type == 'reset_game':
                 await game_service.handle_reset_game(game_id, user_id, game_service.active_websockets[game_id])
+            elif message_type == 'start_analysis':
+                await game_service.handle_start_analysis(websocket, game_id, data.get('options'))
+            elif message_type == 'stop_analysis':
+                game_service.cancel_analysis(game_id, websocket)
             elif message_type == 'leave':
                 leave_user_id = data.get('userId', user_id)
                 await game_service.handle_leave(game_id, leave_user_id, game_service.active_websockets[game_id])
@@ -175,11 +179,14 @@ async def websocket_endpoint(websocket: WebSocket, game_id: str, user_id: str):
         except Exception:
             pass
     finally:
+        game_service.cancel_analysis(game_id, websocket)
         if game_id in game_service.active_websockets:
             game_service.active_websockets[game_id].discard(websocket)
             
             if not game_service.active_websockets[game_id]:
                 del game_service.active_websockets[game_id]
+                # No one left to see the AI's answer; a later join restarts it
+                game_service.cancel_ai_move(game_id, "disconnect")
             else:
                 try:
                     await game_service.broadcast_to_game(
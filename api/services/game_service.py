@@ -1,10 +1,14 @@
 from typing import Any, Dict, List, Optional, Set
 import asyncio
+import logging
+from contextlib import aclosing
 from fastapi import HTTPException, WebSocket, WebSocketDisconnect
 from datetime import datetime, timedelta
 from fastapi.websockets import WebSocketState
+from pydantic import ValidationError
 from websockets.exceptions import ConnectionClosedError, ConnectionClosedOK
 
+from api.models.analysis import AnalysisStreamRequest
 from api.models.game import (
     GameState, 
     Player, 
@@ -17,23 +21,31 @@ from api.db.models import GameDB, PlayerDB
 from api.db.user_models import UserDB
 from api.db.database import get_db
 from api.utils.game_logic import (
-    check_board_winner, 
-    find_next_active_board, 
+    apply_move,
+    get_available_moves,
     convert_global_board_from_db, 
     convert_global_board_to_db,
     validate_move,
-    check_global_winner,
     remove_player_from_game,
     cleanup_inactive_games
 )
 from api.services.auth_service import auth_service
 from api.utils.ai_logic import AILogic
+from api.utils.ai_engines import ai_engines
+from api.utils.ai_executor import ai_executor
+from api.utils.ai_jobs import ai_jobs
+from api.utils.bitboard import BitBoard, symbol_to_side
+from api.utils.board_tables import NEAR_WINS, board_code, winner_symbol
+
+logger = logging.getLogger(__name__)
 
 class GameService:
     def __init__(self):
         self.games: Dict[str, GameState] = {}
         self.active_websockets: Dict[str, List[WebSocket]] = {}
         self.reset_in_progress: Set[str] = set()  # Track games currently being reset
+        # Streamed analyses by game, one per socket
+        self.analysis_streams: Dict[str, Dict[WebSocket, asyncio.Task]] = {}
 
     def _game_db_to_state(self, game_db: GameDB, db) -> GameState:
         player_ids = [p.id for p in game_db.players]
@@ -265,6 +277,8 @@ class GameService:
             )
             
             self.games[game_id] = new_game
+            self.cancel_ai_move(game_id, "reset")
+            ai_engines.remove(game_id)
             
             with get_db() as db:
                 game_db = db.query(GameDB).filter(GameDB.id == game_id).first()
@@ -403,6 +417,9 @@ class GameService:
                             "current_player": self.games[game_id].current_player
                         }
                     })
+                
+                # Resume an AI move cancelled when the last socket closed
+                self.start_ai_move(game_id, active_sockets)
         except HTTPException as e:
             if websocket.client_state == WebSocketState.CONNECTED:
                 try:
@@ -424,6 +441,7 @@ class GameService:
                 local_board_index=move_data['local_board_index']
             )
             game = self.make_move(game_id, move)
+            await self.stop_analysis(game_id, "move")
             await self.broadcast_to_game(active_sockets, {
                 "type": "game_update",
                 "gameId": game_id,
@@ -448,7 +466,7 @@ class GameService:
 
             # If it's an AI game and there's no winner, make AI move
             if game.mode == GameMode.AI and game.winner is None:
-                await self._make_ai_move(game_id, active_sockets)
+                self.start_ai_move(game_id, active_sockets)
                 
         except HTTPException as e:
             if websocket.client_state == WebSocketState.CONNECTED:
@@ -463,14 +481,32 @@ class GameService:
                 except (ConnectionClosedError, ConnectionClosedOK, WebSocketDisconnect):
                     active_sockets.discard(websocket)
 
+    def start_ai_move(self, game_id: str, active_sockets: Set[WebSocket]) -> bool:
+        """
+        Start computing the AI move of an AI game as a cancellable job.
+
+        Returns:
+            True if a job was started; False if it is not the AI's turn or
+            the move is already being computed
+        """
+        game = self.games.get(game_id)
+        if (
+            game is None or game.mode != GameMode.AI or game.winner is not None
+            or game.current_player != PlayerSymbol.O
+            or ai_jobs.is_current(game_id, game.move_count)
+        ):
+            return False
+        ai_jobs.start(game_id, game.move_count, self._make_ai_move(game_id, active_sockets))
+        return True
+
+    def cancel_ai_move(self, game_id: str, reason: str) -> bool:
+        """Cancel the AI move being computed for a game, and its ponder search"""
+        ai_executor.cancel_ponder(game_id)
+        return ai_jobs.cancel(game_id, reason)
+
     async def _make_ai_move(self, game_id: str, active_sockets: Set[WebSocket]) -> None:
-        """Generate and execute AI move in an AI game"""
-        import asyncio
-        
+        """Generate and execute AI move in an AI game (runs as an AI job, see start_ai_move)"""
         try:
-            # Add a small delay for better UX
-            await asyncio.sleep(0.5)
-            
             game = self._get_game_or_404(game_id)
             
             # Make sure it's AI's turn and game not won
@@ -478,24 +514,39 @@ class GameService:
                 return
             
             # Get available moves
-            available_moves = []
-            if game.active_board is not None:
-                board = game.global_board[game.active_board]
-                for cell_idx, cell in enumerate(board):
-                    if cell is None:
-                        available_moves.append((game.active_board, cell_idx))
-            else:
-                for board_idx, board in enumerate(game.global_board):
-                    for cell_idx, cell in enumerate(board):
-                        if cell is None:
-                            available_moves.append((board_idx, cell_idx))
+            available_moves = get_available_moves(game)
             
             if not available_moves:
                 return
             
-            # Use AI logic to determine best move
-            ai_logic = AILogic(difficulty=game.ai_difficulty or "medium")
-            board_idx, cell_idx = ai_logic.get_next_move(game, available_moves)
+            # Search in the AI worker pool so other games keep running
+            move_count = game.move_count
+            difficulty = game.ai_difficulty or "medium"
+            # Only searching levels keep a table between moves
+            engine = ai_engines.get(game_id) if difficulty == "hard" else None
+            
+            async def search():
+                # A ponder on the reply the human actually played is reused
+                if engine is not None:
+                    move = await ai_executor.take_ponder(game)
+                    if move in available_moves:
+                        return move
+                return await ai_executor.get_move(
+                    game, available_moves, difficulty, engine=engine
+                )
+            
+            try:
+                # The small UX delay now covers (part of) the think time
+                (board_idx, cell_idx), _ = await asyncio.gather(search(), asyncio.sleep(0.5))
+            except asyncio.TimeoutError:
+                # Pool saturated or scheduler queue full (AIOverloadedError):
+                # answer with a cheap move instead of stalling the game
+                board_idx, cell_idx = AILogic(difficulty="easy").get_next_move(game, available_moves)
+            
+            # The game may have been reset or removed while the search ran;
+            # once finished the job can no longer be cancelled
+            if self.games.get(game_id) is not game or not ai_jobs.finish(game_id, move_count):
+                return
             
             # Make the move
             ai_player_id = f"ai_{game_id}"
@@ -506,6 +557,7 @@ class GameService:
             )
             
             game = self.make_move(game_id, ai_move)
+            await self.stop_analysis(game_id, "move")
             
             # Broadcast the AI move
             await self.broadcast_to_game(active_sockets, {
@@ -522,6 +574,10 @@ class GameService:
                 }
             })
             
+            # Think on the human's time about the reply the search expects
+            if engine is not None and game.winner is None:
+                ai_executor.start_ponder(game, engine, difficulty)
+            
             # Save game state in background
             loop = asyncio.get_running_loop()
             await loop.run_in_executor(None, self._save_game_state, game)
@@ -530,8 +586,102 @@ class GameService:
             if game.winner is not None:
                 await loop.run_in_executor(None, self._save_game_results, game)
 
-        except Exception as e:
-            pass
+        except Exception:
+            logger.exception(f"AI move failed: game={game_id}")
+
+    async def handle_start_analysis(self, websocket: WebSocket, game_id: str, options: Optional[Dict[str, Any]]) -> None:
+        """
+        Stream engine analysis of the game's current position to one socket.
+
+        Each completed depth is sent as an analysis_update, then an
+        analysis_done. The stream is cancelled when a move is made, the
+        game is reset, the socket starts another analysis or closes.
+        """
+        try:
+            budget = AnalysisStreamRequest(**(options or {}))
+        except (ValidationError, TypeError):
+            await websocket.send_json({"type": "error", "message": "Invalid analysis options"})
+            return
+        try:
+            game = self._get_game_or_404(game_id)
+        except HTTPException as e:
+            await websocket.send_json({"type": "error", "message": str(e.detail)})
+            return
+        self.cancel_analysis(game_id, websocket)
+        if game.winner is not None:
+            await websocket.send_json({"type": "error", "message": "Game is already over"})
+            return
+
+        task = asyncio.create_task(self._stream_analysis(websocket, game, budget))
+        self.analysis_streams.setdefault(game_id, {})[websocket] = task
+        task.add_done_callback(lambda t: self._forget_analysis(game_id, websocket, t))
+
+    async def _stream_analysis(self, websocket: WebSocket, game: GameState, budget: AnalysisStreamRequest) -> None:
+        """Send the depths of one analysis to its socket as they complete"""
+        position = BitBoard.from_game_state(game)
+        message = {
+            "gameId": game.id,
+            "move_count": game.move_count,
+            "side": game.current_player,
+        }
+        depth = nodes = 0
+        try:
+            # Depths share the game's table, warmed by earlier moves and analyses
+            updates = ai_executor.analyze_stream(
+                position, game.id, ai_engines.get(game.id),
+                budget.max_nodes, budget.max_depth, budget.time_limit,
+            )
+            async with aclosing(updates):
+                async for update in updates:
+                    depth, nodes = update["depth"], update["nodes"]
+                    await websocket.send_json({
+                        **message,
+                        "type": "analysis_update",
+                        "depth": depth,
+                        "score": update["score"],  # For the side to move
+                        "best_move": list(divmod(update["move"], 9)),
+                        "pv": [list(divmod(move, 9)) for move in update["pv"]],
+                        "nodes": nodes,
+                        "nps": update["nps"],
+                    })
+            await websocket.send_json({**message, "type": "analysis_done", "depth": depth, "nodes": nodes})
+        except asyncio.TimeoutError:
+            # AIOverloadedError: the AI workers are saturated
+            await websocket.send_json({**message, "type": "error", "message": "AI is busy, try again later"})
+        except (ConnectionClosedError, ConnectionClosedOK, WebSocketDisconnect, RuntimeError):
+            pass  # Socket closed mid-stream
+
+    def _forget_analysis(self, game_id: str, websocket: WebSocket, task: asyncio.Task) -> None:
+        streams = self.analysis_streams.get(game_id)
+        if streams is not None and streams.get(websocket) is task:
+            del streams[websocket]
+            if not streams:
+                del self.analysis_streams[game_id]
+
+    def cancel_analysis(self, game_id: str, websocket: Optional[WebSocket] = None) -> List[WebSocket]:
+        """
+        Cancel the streamed analyses of a game, or of one of its sockets.
+
+        Returns:
+            Sockets whose analysis was cancelled
+        """
+        streams = self.analysis_streams.get(game_id, {})
+        sockets = [websocket] if websocket is not None else list(streams)
+        cancelled = []
+        for socket in sockets:
+            task = streams.get(socket)
+            if task is not None and not task.done():
+                task.cancel()
+                cancelled.append(socket)
+        return cancelled
+
+    async def stop_analysis(self, game_id: str, reason: str) -> None:
+        """Cancel a game's streamed analyses and tell their sockets why"""
+        for socket in self.cancel_analysis(game_id):
+            try:
+                await socket.send_json({"type": "analysis_stopped", "gameId": game_id, "reason": reason})
+            except (ConnectionClosedError, ConnectionClosedOK, WebSocketDisconnect, RuntimeError):
+                pass
 
     async def handle_leave(self, game_id: str, user_id: str, active_sockets: Set[WebSocket]) -> None:
         self.remove_watcher(game_id, user_id)
@@ -545,6 +695,7 @@ class GameService:
         """Handle reset game and broadcast to all connected clients"""
         try:
             reset_result = self.reset_game(game_id, user_id)
+            await self.stop_analysis(game_id, "reset")
             
             # Broadcast the reset to all connected players and watchers
             await self.broadcast_to_game(active_sockets, {
@@ -583,8 +734,6 @@ class GameService:
         Calculate how close the game was based on board control and patterns.
         Returns a dict with closeness metrics.
         """
-        from api.utils.game_logic import check_board_winner
-        
         player_boards_won = 0
         opponent_boards_won = 0
         tied_boards = 0
@@ -592,18 +741,15 @@ class GameService:
         opponent_near_wins = 0  # Boards where opponent had 2 in a row
         
         opponent_symbol = PlayerSymbol.O if player_symbol == PlayerSymbol.X else PlayerSymbol.X
+        player_side = symbol_to_side(player_symbol)
+        opponent_side = symbol_to_side(opponent_symbol)
         
-        win_patterns = [
-            [0, 1, 2], [3, 4, 5], [6, 7, 8],  # Rows
-            [0, 3, 6], [1, 4, 7], [2, 5, 8],  # Columns
-            [0, 4, 8], [2, 4, 6]  # Diagonals
-        ]
-        
-        local_board_winners = []
+        # Meta board as X/O marks; decided ties and open boards both count as empty
+        meta_marks = []
         
-        for board_idx, board in enumerate(game.global_board):
-            winner = check_board_winner(board)
-            local_board_winners.append(winner)
+        for board in game.global_board:
+            code = board_code(board)
+            winner = winner_symbol(code)
             
             if winner == player_symbol:
                 player_boards_won += 1
@@ -611,33 +757,16 @@ class GameService:
                 opponent_boards_won += 1
             elif winner == PlayerSymbol.T:
                 tied_boards += 1
+            meta_marks.append(winner if winner != PlayerSymbol.T else None)
             
-            # Check for near-wins (2 in a row with empty third)
-            for pattern in win_patterns:
-                cells = [board[i] for i in pattern]
-                player_count = cells.count(player_symbol)
-                opponent_count = cells.count(opponent_symbol)
-                empty_count = cells.count(None)
-                
-                if player_count == 2 and empty_count == 1:
-                    player_near_wins += 1
-                if opponent_count == 2 and empty_count == 1:
-                    opponent_near_wins += 1
+            # Near-wins: lines with 2 in a row and the third cell empty
+            player_near_wins += NEAR_WINS[player_side][code]
+            opponent_near_wins += NEAR_WINS[opponent_side][code]
         
         # Check global board for near-wins (2 boards in a row)
-        global_player_near_wins = 0
-        global_opponent_near_wins = 0
-        
-        for pattern in win_patterns:
-            boards = [local_board_winners[i] for i in pattern]
-            player_count = sum(1 for b in boards if b == player_symbol)
-            opponent_count = sum(1 for b in boards if b == opponent_symbol)
-            none_or_tie_count = sum(1 for b in boards if b is None or b == PlayerSymbol.T)
-            
-            if player_count == 2 and none_or_tie_count >= 1:
-                global_player_near_wins += 1
-            if opponent_count == 2 and none_or_tie_count >= 1:
-                global_opponent_near_wins += 1
+        meta_code = board_code(meta_marks)
+        global_player_near_wins = NEAR_WINS[player_side][meta_code]
+        global_opponent_near_wins = NEAR_WINS[opponent_side][meta_code]
         
         return {
             "player_boards_won": player_boards_won,
@@ -786,20 +915,8 @@ class GameService:
         if player.status == PlayerStatus.WATCHER:
             raise HTTPException(status_code=400, detail="Watcher cannot make moves")
             
-        symbol = player.symbol
-        game.global_board[move.global_board_index][move.local_board_index] = symbol
-        game.current_player = PlayerSymbol.X if symbol == PlayerSymbol.O else PlayerSymbol.O
-        game.move_count += 1
-        
-        board = game.global_board[move.global_board_index]
-        board_winner = check_board_winner(board)
-        if board_winner and board_winner != PlayerSymbol.T:
-            game.global_board[move.global_board_index] = [board_winner] * 9
-        
-        final_winner = check_global_winner(game.global_board)
-        game.active_board = find_next_active_board(move.local_board_index, game.global_board, final_winner)
+        apply_move(game, move.global_board_index, move.local_board_index, player.symbol)
         game.last_move_timestamp = datetime.now().timestamp()
-        game.winner = final_winner
         
         return game
 
@@ -1016,6 +1133,9 @@ class GameService:
             if not game_db:
                 raise HTTPException(status_code=404, detail="Game not found")
 
+            was_player = any(
+                p.id == user_id and p.status == PlayerStatus.PLAYER for p in game.players
+            )
             game.players = [p for p in game.players if p.id != user_id]
 
             player_db = db.query(PlayerDB).filter(PlayerDB.id == user_id).first()
@@ -1030,6 +1150,10 @@ class GameService:
 
             db.commit()
 
+        # Nobody is left to answer
+        if was_player or game_id not in self.games:
+            self.cancel_ai_move(game_id, "leave")
+
     def remove_player(self, game_id: str, user_id: str) -> None:
         with get_db() as db:
             remove_player_from_game(db, self.games, game_id, user_id)
@@ -1039,5 +1163,7 @@ class GameService:
         with get_db() as db:
             cleanup_inactive_games(self.games)
             db.commit()
+        ai_jobs.prune(self.games)
+        ai_engines.prune(self.games)
 
 game_service = GameService()
\ No newline at end of file
@@ -0,0 +1,190 @@
+"""
+Per-game AI engine state kept between moves.
+
+Consecutive searches in one game share most of their subtrees, so each AI
+game keeps its own transposition table and last principal variation
+instead of starting every move from an empty table. The table lives in
+shared memory so whichever pool worker runs the next search can attach
+to it by name.
+
+Engines are held in an LRU bounded by AI_ENGINE_MEMORY_MB and dropped
+when their game is reset or cleaned up.
+
+Shared memory is backed by /dev/shm, which containers keep small (64 MB
+by default in Docker), and writing past its size kills the writer with
+SIGBUS. The default budgets are therefore sized from /dev/shm, split
+between the web worker processes (WEB_CONCURRENCY, as for uvicorn), and
+a table is only created while /dev/shm has room for it; otherwise the
+game searches with a fresh private table.
+"""
+
+import os
+import shutil
+import time
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from typing import Iterable, List, Optional
+
+from api.utils.transposition import TranspositionTable
+
+SHM_PATH = "/dev/shm"
+# Web worker processes sharing /dev/shm (uvicorn --workers)
+WEB_WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+# Share of /dev/shm the AI tables may use; the rest is headroom
+SHM_SHARE = 0.75
+
+
+def shm_limit_mb() -> Optional[float]:
+    """Shared memory the AI tables of one web worker may use; None without /dev/shm"""
+    try:
+        total = shutil.disk_usage(SHM_PATH).total
+    except OSError:
+        return None
+    return total * SHM_SHARE / WEB_WORKERS / (1024 * 1024)
+
+
+def shm_has_room(nbytes: int) -> bool:
+    """True if /dev/shm (where there is one) can hold nbytes more, with headroom"""
+    try:
+        usage = shutil.disk_usage(SHM_PATH)
+    except OSError:
+        return True
+    return usage.free - nbytes >= usage.total * (1 - SHM_SHARE)
+
+
+SHM_LIMIT_MB = shm_limit_mb()
+# Entries per game table (16 bytes each, 1 MB by default)
+AI_ENGINE_TABLE_ENTRIES = int(os.getenv("AI_ENGINE_TABLE_ENTRIES", str(1 << 16)))
+# Memory budget for all game tables together: 64 MB, or 3/4 of the
+# worker's share of /dev/shm (the rest is for the shared search table)
+AI_ENGINE_MEMORY_MB = int(os.getenv("AI_ENGINE_MEMORY_MB", str(
+    64 if SHM_LIMIT_MB is None else max(1, min(64, int(SHM_LIMIT_MB * 0.75)))
+)))
+
+
+class GameEngine:
+    """Search state of one game: transposition table and last principal variation"""
+
+    def __init__(self, game_id: str, table_entries: int = AI_ENGINE_TABLE_ENTRIES):
+        self.game_id = game_id
+        self.table_entries = table_entries
+        self._memory = shared_memory.SharedMemory(
+            create=True, size=TranspositionTable.required_bytes(table_entries)
+        )
+        self.table = TranspositionTable(table_entries, buffer=self._memory.buf)
+        # Encoded moves (board_index * 9 + cell_index), AI move first
+        self.pv: List[int] = []
+        # Line of the last finished ponder; it becomes pv once the ponder is used
+        self.ponder_pv: List[int] = []
+        self.searches = 0
+        self.last_used = time.monotonic()
+        self.closed = False
+
+    @property
+    def table_name(self) -> str:
+        """Shared memory name workers attach to"""
+        return self._memory.name
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the engine's table"""
+        return self._memory.size
+
+    def close(self) -> None:
+        """Release the table; running searches keep their own mapping"""
+        if self.closed:
+            return
+        self.closed = True
+        self.table.close()
+        self._memory.close()
+        try:
+            self._memory.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class AIEngineRegistry:
+    """LRU of per-game engines with a memory bound"""
+
+    def __init__(
+        self,
+        memory_limit_mb: int = AI_ENGINE_MEMORY_MB,
+        table_entries: int = AI_ENGINE_TABLE_ENTRIES,
+    ):
+        self.table_entries = table_entries
+        table_bytes = TranspositionTable.required_bytes(table_entries)
+        self.max_engines = max(1, memory_limit_mb * 1024 * 1024 // table_bytes)
+        self._engines: "OrderedDict[str, GameEngine]" = OrderedDict()
+
+        # Statistics
+        self._created = 0
+        self._reused = 0
+        self._evicted = 0
+        self._removed = 0
+        self._shm_full = 0
+
+    def get(self, game_id: str) -> Optional[GameEngine]:
+        """
+        Get the engine of a game, creating it (and evicting the LRU one) if needed.
+
+        Returns:
+            None if /dev/shm has no room for another table
+        """
+        engine = self._engines.get(game_id)
+        if engine is not None:
+            self._engines.move_to_end(game_id)
+            engine.last_used = time.monotonic()
+            self._reused += 1
+            return engine
+
+        while len(self._engines) >= self.max_engines:
+            _, evicted = self._engines.popitem(last=False)
+            evicted.close()
+            self._evicted += 1
+        if not shm_has_room(TranspositionTable.required_bytes(self.table_entries)):
+            self._shm_full += 1
+            return None
+
+        engine = GameEngine(game_id, self.table_entries)
+        self._engines[game_id] = engine
+        self._created += 1
+        return engine
+
+    def remove(self, game_id: str) -> bool:
+        """Drop the engine of a game (reset or removed game)"""
+        engine = self._engines.pop(game_id, None)
+        if engine is None:
+            return False
+        engine.close()
+        self._removed += 1
+        return True
+
+    def prune(self, live_game_ids: Iterable[str]) -> int:
+        """Drop the engines of every game not in live_game_ids"""
+        live = set(live_game_ids)
+        stale = [game_id for game_id in self._engines if game_id not in live]
+        for game_id in stale:
+            self.remove(game_id)
+        return len(stale)
+
+    def clear(self) -> None:
+        """Drop all engines (shutdown)"""
+        for game_id in list(self._engines):
+            self.remove(game_id)
+
+    def get_stats(self) -> dict:
+        """Get registry statistics"""
+        return {
+            "engines": len(self._engines),
+            "max_engines": self.max_engines,
+            "memory_mb": round(sum(e.nbytes for e in self._engines.values()) / (1024 * 1024), 2),
+            "created": self._created,
+            "reused": self._reused,
+            "evicted": self._evicted,
+            "removed": self._removed,
+            "shm_full": self._shm_full,
+        }
+
+
+# Global AI engine registry
+ai_engines = AIEngineRegistry()
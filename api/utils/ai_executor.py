@@ -0,0 +1,1071 @@
+"""
+Process pool for AI move computation.
+
+AI searches are CPU bound and can take up to the full time budget, so they
+run in pre-warmed worker processes instead of the event loop. Each worker
+imports the AI module (and with it the board lookup tables) once at
+start-up. Submissions are bounded, every request carries a deadline, and
+running searches are cancelled through a shared flag array polled by the
+search.
+
+Hard searches can also run in parallel: the root moves are split across
+workers that all probe one transposition table in shared memory, so
+subtrees found by one worker are reused by the others.
+
+Searches for a game with a GameEngine (see api.utils.ai_engines) use that
+game's shared-memory table, which workers attach to by name, so work from
+the game's previous moves is reused by whichever worker runs the search.
+
+Searches are admitted by an AIScheduler (see api.utils.ai_scheduler):
+one unit per worker process, shared fairly across difficulty levels and
+games, with smaller budgets for searches that queued too long. Each web
+worker process runs its own pool, so by default the CPUs available to
+the container (affinity and cgroup quota) are split between them.
+
+Stateless position analysis (see api.utils.analysis) runs in the same
+pool, in chunks of positions sized by their expected search time, with
+results cached by canonical position. Analysis never takes the units the
+scheduler reserves for game moves. A streamed analysis deepens one depth per task against the
+game's shared table, so each finished depth can be reported at once.
+
+Positions already searched to the full depth of the same difficulty, by
+any game, are answered from the process-wide root result cache (see
+api.utils.root_cache) without queueing a search.
+
+After an AI move the executor can ponder: search the position after the
+opponent's expected reply while the opponent thinks. A matching reply
+takes the ponder result; any other reply cancels it, leaving the game
+table warmed. A search that finds no free worker cancels a ponder.
+"""
+
+import asyncio
+import logging
+import math
+import multiprocessing
+import os
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from api.models.game import GameState, PlayerSymbol
+from api.utils.ai_engines import SHM_LIMIT_MB, SHM_PATH, WEB_WORKERS, GameEngine, shm_has_room
+from api.utils.ai_logic import AILogic, TranspositionTable, sample_move
+from api.utils.ai_scheduler import ANALYSIS, BACKGROUND, AIOverloadedError, AIScheduler, Grant
+from api.utils.analysis import (
+    AI_ANALYSIS_CHUNK, AI_ANALYSIS_CHUNK_SECONDS, AI_ANALYSIS_NODES, ANALYSIS_DEPTH, ANALYSIS_NPS,
+    ANALYSIS_TIME_LIMIT, TABLE_ENTRIES as ANALYSIS_TABLE_ENTRIES, analyze_positions, cache_key,
+    format_result, from_canonical, to_canonical,
+)
+from api.utils.bitboard import ANY_BOARD, BitBoard, O, side_to_symbol
+from api.utils.cache import get_analysis_cache
+from api.utils.difficulty import get_budget
+from api.utils.endgame import EndgameSolver
+from api.utils.root_cache import RootResult, RootResultCache, root_cache
+from api.utils.search_metrics import SearchMetrics
+
+logger = logging.getLogger(__name__)
+
+
+def available_cpus() -> int:
+    """CPUs this process may use: its affinity, bounded by a cgroup CPU quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    # cgroup v2, then v1; quotas are in microseconds per period
+    for quota_file, period_file in (
+        ("/sys/fs/cgroup/cpu.max", None),
+        ("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", "/sys/fs/cgroup/cpu/cpu.cfs_period_us"),
+    ):
+        try:
+            with open(quota_file) as f:
+                fields = f.read().split()
+            if period_file is not None:
+                with open(period_file) as f:
+                    fields.append(f.read().strip())
+        except OSError:
+            continue
+        if fields[0] not in ("max", "-1"):
+            cpus = min(cpus, max(1, math.ceil(int(fields[0]) / int(fields[1]))))
+        break
+    return cpus
+
+
+# Worker processes of this web worker's pool: its share of the available
+# CPUs (see api.utils.ai_engines.WEB_WORKERS), at most 4
+AI_WORKERS = int(os.getenv("AI_WORKERS", str(max(1, min(4, available_cpus() // WEB_WORKERS)))))
+# Cancellation slots, i.e. searches submitted or still finishing at once
+AI_MAX_PENDING = int(os.getenv("AI_MAX_PENDING", str(AI_WORKERS * 8)))
+# Workers used by one parallel (hard / analysis) search; 1 disables it
+AI_SEARCH_WORKERS = int(os.getenv("AI_SEARCH_WORKERS", str(AI_WORKERS)))
+# Entries of the shared transposition table (16 bytes each): 16 MB, or a
+# quarter of the web worker's share of /dev/shm (see api.utils.ai_engines)
+AI_SHARED_TT_ENTRIES = int(os.getenv("AI_SHARED_TT_ENTRIES", str(
+    1 << 20 if SHM_LIMIT_MB is None else min(1 << 20, int(SHM_LIMIT_MB / 4 * 65536))
+)))
+
+# Game tables a worker keeps attached between searches
+_MAX_ATTACHED_TABLES = 32
+
+# Set in each worker process by _init_worker
+_cancel_flags = None
+_shared_memory: Optional[shared_memory.SharedMemory] = None
+_shared_table: Optional[TranspositionTable] = None
+_attached_tables: "OrderedDict[str, Tuple[shared_memory.SharedMemory, TranspositionTable]]" = OrderedDict()
+# Kept across searches, so an endgame's later moves reuse its earlier proofs
+_endgame_solver: Optional[EndgameSolver] = None
+
+
+def _init_worker(cancel_flags, table_name: Optional[str] = None, table_entries: int = 0) -> None:
+    """Worker initializer: attach the shared cancellation flags and table"""
+    global _cancel_flags, _shared_memory, _shared_table, _endgame_solver
+    _cancel_flags = cancel_flags
+    _endgame_solver = EndgameSolver()
+    if table_name:
+        _shared_memory = shared_memory.SharedMemory(name=table_name)
+        _shared_table = TranspositionTable(table_entries, buffer=_shared_memory.buf)
+
+
+def _attach_table(name: Optional[str], entries: int) -> Optional[TranspositionTable]:
+    """Attach (or reuse) a game's shared table; None if it is already gone"""
+    if name is None:
+        return None
+    attached = _attached_tables.get(name)
+    if attached is not None:
+        _attached_tables.move_to_end(name)
+        return attached[1]
+
+    try:
+        memory = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        # The engine was evicted before the search started
+        return None
+    table = TranspositionTable(entries, buffer=memory.buf)
+    # Pages of a dropped engine's table are only freed once every worker
+    # has unmapped it, so tables that are gone are detached first
+    if os.path.isdir(SHM_PATH):
+        for old_name in list(_attached_tables):
+            if not os.path.exists(os.path.join(SHM_PATH, old_name)):
+                _detach_table(old_name)
+    _attached_tables[name] = (memory, table)
+    while len(_attached_tables) > _MAX_ATTACHED_TABLES:
+        _detach_table(next(iter(_attached_tables)))
+    return table
+
+
+def _detach_table(name: str) -> None:
+    memory, table = _attached_tables.pop(name)
+    table.close()
+    memory.close()
+
+
+def _warmup() -> int:
+    """No-op task used to force worker processes to start"""
+    time.sleep(0.05)
+    return os.getpid()
+
+
+def _run_search(
+    slot: int,
+    game: GameState,
+    available_moves: List[Tuple[int, int]],
+    difficulty: str,
+    time_limit: float,
+    cancel_flags=None,
+    table=None,
+    table_entries: int = 0,
+    previous_pv: Optional[List[int]] = None,
+    max_nodes: Optional[int] = None,
+) -> Tuple[Tuple[int, int], List[int], dict, Optional[RootResult]]:
+    """
+    Compute an AI move inside a worker process (or fallback thread).
+
+    Args:
+        table: Transposition table, or the shared memory name of a game
+            table to attach in a worker process
+
+    Returns:
+        (move, principal variation, search statistics, root search result)
+    """
+    flags = cancel_flags if cancel_flags is not None else _cancel_flags
+    if isinstance(table, str):
+        table = _attach_table(table, table_entries)
+    ai = AILogic(
+        difficulty=difficulty,
+        max_time=time_limit,
+        should_stop=(lambda: flags[slot] != 0) if flags is not None else None,
+        transposition_table=table,
+        previous_pv=previous_pv,
+        max_nodes=max_nodes,
+        # Fallback threads run side by side, so only workers share a solver
+        endgame_solver=_endgame_solver if cancel_flags is None else None,
+    )
+    move = ai.get_next_move(game, available_moves)
+    return move, ai.last_pv, ai.get_search_stats(), ai.last_result
+
+
+def _run_root_search(
+    slot: int,
+    position: BitBoard,
+    root_moves: List[int],
+    difficulty: str,
+    time_limit: float,
+    table_name: Optional[str] = None,
+    table_entries: int = 0,
+    max_nodes: Optional[int] = None,
+) -> Tuple[List[Tuple[int, int, int]], dict]:
+    """Search a share of the root moves against a shared table"""
+    flags = _cancel_flags
+    ai = AILogic(
+        difficulty=difficulty,
+        max_time=time_limit,
+        max_nodes=max_nodes,
+        should_stop=(lambda: flags[slot] != 0) if flags is not None else None,
+        transposition_table=_attach_table(table_name, table_entries) or _shared_table,
+    )
+    ai._reset_search_stats()
+    iterations = ai.search_root(position, root_moves)
+    return iterations, ai.get_search_stats()
+
+
+def _run_analysis_depth(
+    slot: int,
+    cells: str,
+    active_board: Optional[int],
+    side: int,
+    depth: int,
+    max_nodes: int,
+    time_limit: float,
+    cancel_flags=None,
+    table=None,
+    table_entries: int = 0,
+) -> Tuple[Optional[dict], dict]:
+    """
+    Deepen a position up to one more depth (one step of a streamed analysis).
+
+    The shallower depths are answered from the table the previous steps
+    filled, so this mostly costs the new depth.
+
+    Returns:
+        (depth result or None if it did not complete, search statistics)
+    """
+    flags = cancel_flags if cancel_flags is not None else _cancel_flags
+    if isinstance(table, str):
+        table = _attach_table(table, table_entries)
+    position = BitBoard.from_string(cells, active_board, side)
+    ai = AILogic(
+        difficulty="hard",
+        max_time=time_limit,
+        should_stop=(lambda: flags[slot] != 0) if flags is not None else None,
+        transposition_table=table,
+        max_depth=depth,
+        max_nodes=max_nodes,
+        ai_symbol=side_to_symbol(side),
+    )
+    iterations = ai.search_root(position, position.legal_moves())
+    stats = ai.get_search_stats()
+    if not iterations or iterations[-1][0] < depth:
+        return None, stats
+    _, move, score = iterations[-1]
+    pv = ai.principal_variation(position, move, depth + 1)
+    return {"depth": depth, "move": move, "score": score, "pv": pv}, stats
+
+
+class AIExecutor:
+    """
+    Runs AI searches in a process pool with bounded submissions.
+
+    When the pool is not started (or AI_WORKERS is 0) searches fall back
+    to the default thread executor so callers never block the event loop.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = AI_WORKERS,
+        max_pending: int = AI_MAX_PENDING,
+        default_time_limit: Optional[float] = None,
+        deadline_grace: float = 1.0,
+        search_workers: int = AI_SEARCH_WORKERS,
+        shared_table_entries: int = AI_SHARED_TT_ENTRIES,
+        result_cache: Optional[RootResultCache] = root_cache,
+    ):
+        """
+        Args:
+            result_cache: Root results shared by all games; None disables it
+        """
+        self.max_workers = max_workers
+        self.max_pending = max(1, max_pending)
+        self.default_time_limit = default_time_limit
+        self.deadline_grace = deadline_grace
+        self.search_workers = min(search_workers, max_workers)
+        self.shared_table_entries = shared_table_entries
+        self.result_cache = result_cache
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._shared_memory: Optional[shared_memory.SharedMemory] = None
+        self._shared_table: Optional[TranspositionTable] = None
+        # Replaced by a shared-memory array once the pool starts
+        self._cancel_flags = bytearray(self.max_pending)
+        self._free_slots: Deque[int] = deque(range(self.max_pending))
+        # One unit per worker; never more than there are cancellation slots
+        self.scheduler = AIScheduler(capacity=min(max(1, max_workers), self.max_pending))
+
+        # Statistics
+        self._submitted = 0
+        self._completed = 0
+        self._timeouts = 0
+        self._cancelled = 0
+        # Worker seconds used by searches cancelled before they finished
+        self._cancelled_cpu = 0.0
+        self._rejected = 0
+        self._parallel_searches = 0
+        self._total_time = 0.0
+        self._search_nodes = 0
+        self._search_cutoffs = 0
+        self._search_first_move_cutoffs = 0
+        # Per-move depth reached and think time of heuristic searches
+        self._searched_moves = 0
+        self._search_depth_total = 0
+        self._search_time_total = 0.0
+        self._search_time_max = 0.0
+        self._aborted_iterations = 0
+        # Per-difficulty histograms of searched moves
+        self.search_metrics = SearchMetrics()
+        # Position analysis
+        self._analysis_requests = 0
+        self._analysis_positions = 0
+        self._analysis_searched = 0
+        self._analysis_timeouts = 0
+        # Nodes and seconds of analyzed positions, for the chunk sizes
+        self._analysis_nodes = 0
+        self._analysis_time = 0.0
+        self._streams = 0
+        self._stream_updates = 0
+
+        # Ponder searches by game id: (key of the expected position, task)
+        self._ponders: Dict[str, Tuple[int, asyncio.Task, GameEngine]] = {}
+        self._ponder_started = 0
+        self._ponder_hits = 0
+        self._ponder_misses = 0
+        self._ponder_skipped = 0
+        self._ponder_preempted = 0
+
+    async def start(self) -> None:
+        """Start and pre-warm the worker processes"""
+        if self._pool is not None or self.max_workers <= 0:
+            return
+
+        context = multiprocessing.get_context("spawn")
+        self._cancel_flags = context.RawArray("b", self.max_pending)
+        table_name = None
+        if self.search_workers > 1 and not shm_has_room(
+            TranspositionTable.required_bytes(self.shared_table_entries)
+        ):
+            logger.warning("No room in shared memory for the search table; hard searches run unsplit")
+            self.search_workers = 1
+        if self.search_workers > 1:
+            self._shared_memory = shared_memory.SharedMemory(
+                create=True,
+                size=TranspositionTable.required_bytes(self.shared_table_entries),
+            )
+            self._shared_table = TranspositionTable(
+                self.shared_table_entries, buffer=self._shared_memory.buf
+            )
+            table_name = self._shared_memory.name
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self._cancel_flags, table_name, self.shared_table_entries),
+        )
+
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*[
+            loop.run_in_executor(self._pool, _warmup)
+            for _ in range(self.max_workers)
+        ])
+        logger.info(f"AI executor started with {len(set(pids))} worker processes")
+
+    async def stop(self) -> None:
+        """Cancel running searches and shut the pool down"""
+        for game_id in list(self._ponders):
+            self.cancel_ponder(game_id)
+        if self._pool is None:
+            return
+        for slot in range(self.max_pending):
+            self._cancel_flags[slot] = 1
+        pool = self._pool
+        self._pool = None
+        self._cancel_flags = bytearray(self.max_pending)
+        await asyncio.get_running_loop().run_in_executor(
+            None, lambda: pool.shutdown(wait=True, cancel_futures=True)
+        )
+        if self._shared_memory is not None:
+            self._shared_table.close()
+            self._shared_table = None
+            self._shared_memory.close()
+            self._shared_memory.unlink()
+            self._shared_memory = None
+        logger.info("AI executor stopped")
+
+    async def get_move(
+        self,
+        game: GameState,
+        available_moves: List[Tuple[int, int]],
+        difficulty: str = "medium",
+        time_limit: Optional[float] = None,
+        engine: Optional[GameEngine] = None,
+        parallel: bool = True,
+        background: bool = False,
+    ) -> Tuple[int, int]:
+        """
+        Compute the AI move for a game without blocking the event loop.
+
+        Args:
+            game: Current game state
+            available_moves: List of (board_index, cell_index) tuples
+            difficulty: AI difficulty level
+            time_limit: Search budget in seconds, the difficulty's budget
+                by default; the request deadline is this plus a grace
+                period for queueing and IPC
+            engine: The game's engine; its table and principal variation
+                are reused and updated
+            parallel: Allow splitting a hard search across workers
+            background: Only run on idle capacity, at full budget (pondering)
+
+        Raises:
+            AIOverloadedError: Too many searches are waiting for a worker
+            asyncio.TimeoutError: No worker or no result before the deadline
+        """
+        if time_limit is None:
+            time_limit = self.default_time_limit
+        budget = get_budget(difficulty)
+        position = BitBoard.from_game_state(game, side=O)
+        root_moves = [board_idx * 9 + cell_idx for board_idx, cell_idx in available_moves]
+        if self.result_cache is not None:
+            cached = self.result_cache.lookup(
+                position, difficulty, root_moves, min_depth=budget.max_depth
+            )
+            if cached is not None:
+                # Noisy levels still sample from the root scores
+                move = sample_move(cached.scores, budget.noise) if budget.noise else cached.move
+                if engine is not None:
+                    self._keep_pv(
+                        engine, list(cached.pv) if move == cached.move else [move], background
+                    )
+                return divmod(move, 9)
+
+        if time_limit is None:
+            time_limit = budget.max_time
+        deadline = time.monotonic() + time_limit + self.deadline_grace
+
+        split = (
+            parallel and self._pool is not None and difficulty == "hard"
+            and self.search_workers > 1
+        )
+        if split:
+            ai = AILogic(difficulty=difficulty)
+            if EndgameSolver.empty_cells(position) <= ai._endgame_threshold:
+                # The exact solver runs in a single worker, so only one unit is taken
+                split = False
+            else:
+                # Book moves, immediate wins and blocks are answered here
+                move = (
+                    ai._get_book_move(game, available_moves)
+                    or ai._get_smart_move(game, available_moves)
+                )
+                if move is not None:
+                    self._submitted += 1
+                    self._completed += 1
+                    if engine is not None:
+                        self._keep_pv(engine, [move[0] * 9 + move[1]], background)
+                        engine.searches += 1
+                    return move
+        if not background and self.scheduler.running >= self.scheduler.capacity:
+            # A ponder holding a worker gives it up to a real move
+            self._preempt_ponder()
+        try:
+            grant = await self.scheduler.acquire(
+                game.id, BACKGROUND if background else difficulty,
+                units=self.search_workers if split else 1,
+                timeout=deadline - time.monotonic(),
+            )
+        except asyncio.TimeoutError:
+            self._rejected += 1
+            raise
+
+        slot = self._free_slots.popleft()
+        try:
+            loop = asyncio.get_running_loop()
+            started = time.monotonic()
+            self._submitted += 1
+            self._cancel_flags[slot] = 0
+            # A search that queued too long gets a smaller budget
+            time_limit *= grant.scale
+            max_nodes = max(1, int(budget.max_nodes * grant.scale))
+
+            if split and grant.units > 1:
+                futures, combine = self._submit_parallel(
+                    slot, game, available_moves, difficulty, time_limit, engine, grant, max_nodes
+                )
+            else:
+                futures, combine = [self._submit_single(
+                    slot, game, available_moves, difficulty, time_limit, engine, max_nodes
+                )], lambda results: (results[0][0], results[0][1], [results[0][2]], results[0][3])
+
+            pending = len(futures)
+            cancelled = False
+
+            def release(_):
+                # The slot is reused only once every worker has really finished
+                nonlocal pending
+                pending -= 1
+                if pending == 0:
+                    self._free_slots.append(slot)
+                    self.scheduler.release(grant.units, grant.level)
+                    if cancelled:
+                        self._cancelled_cpu += (time.monotonic() - started) * grant.units
+
+            results = []
+            for future in futures:
+                if isinstance(future, Future):
+                    future.add_done_callback(lambda f: loop.call_soon_threadsafe(release, f))
+                    results.append(asyncio.wrap_future(future))
+                else:
+                    future.add_done_callback(release)
+                    results.append(future)
+        except Exception:
+            # Submission failed (broken pool, pickling, setup): hand
+            # the slot and units back or the executor loses capacity
+            self._free_slots.append(slot)
+            self.scheduler.release(grant.units, grant.level)
+            raise
+
+        try:
+            outcomes = await asyncio.wait_for(
+                asyncio.shield(asyncio.gather(*results)),
+                timeout=max(0.0, deadline - time.monotonic()),
+            )
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            self._cancel(slot, futures)
+            raise
+        except asyncio.CancelledError:
+            self._cancelled += 1
+            if not background:
+                # Speculative ponders are accounted as ponder misses instead
+                cancelled = True
+            self._cancel(slot, futures)
+            raise
+
+        self._completed += 1
+        elapsed = time.monotonic() - started
+        self._total_time += elapsed
+        move, pv, search_stats, result = combine(outcomes)
+        for stats in search_stats:
+            self._search_nodes += stats["nodes"]
+            self._search_cutoffs += stats["cutoffs"]
+            self._search_first_move_cutoffs += stats["first_move_cutoffs"]
+            self._aborted_iterations += stats["aborted_iterations"]
+        self._record_search_depth(search_stats)
+        # Ponders get their own histograms, apart from real move latency
+        self.search_metrics.record(
+            BACKGROUND if background else difficulty, search_stats, elapsed * 1000
+        )
+        # Only searches that reached the level's full depth are shared; one
+        # cut short by time or nodes would be frozen for every later game
+        if (result is not None and result.depth >= budget.max_depth
+                and self.result_cache is not None):
+            self.result_cache.store(position, difficulty, root_moves, result)
+        if engine is not None:
+            self._keep_pv(engine, pv, background)
+            engine.searches += 1
+        return move
+
+    @staticmethod
+    def _keep_pv(engine: GameEngine, pv: List[int], background: bool) -> None:
+        """Keep a search's line; a ponder's replaces the game's only when it is used"""
+        if background:
+            engine.ponder_pv = pv
+        else:
+            engine.pv = pv
+
+    def _submit_single(
+        self,
+        slot: int,
+        game: GameState,
+        available_moves: List[Tuple[int, int]],
+        difficulty: str,
+        time_limit: float,
+        engine: Optional[GameEngine] = None,
+        max_nodes: Optional[int] = None,
+    ):
+        """Submit one whole-move search to a worker (or fallback thread)"""
+        # Only ship what the search needs, not players or metadata
+        search_game = game.model_copy(update={"players": []}, deep=True)
+        # The game table is attached by name, so evicting the engine
+        # mid-search never pulls the table from under a running search
+        table_name = engine.table_name if engine is not None else None
+        table_entries = engine.table_entries if engine is not None else 0
+        pv = engine.pv if engine is not None else None
+        if self._pool is not None:
+            return self._pool.submit(
+                _run_search, slot, search_game, available_moves, difficulty, time_limit,
+                None, table_name, table_entries, pv, max_nodes,
+            )
+        return asyncio.get_running_loop().run_in_executor(
+            None, _run_search, slot, search_game, available_moves, difficulty,
+            time_limit, self._cancel_flags, table_name, table_entries, pv, max_nodes,
+        )
+
+    def _submit_parallel(
+        self,
+        slot: int,
+        game: GameState,
+        available_moves: List[Tuple[int, int]],
+        difficulty: str,
+        time_limit: float,
+        engine: Optional[GameEngine],
+        grant: Grant,
+        max_nodes: int,
+    ):
+        """
+        Split the root moves of a hard search across the granted workers.
+
+        Book moves, immediate wins, blocks and endgames are settled by
+        get_move before it asks for units. Each worker deepens its share of
+        the (ordered) root moves, and the move with the best score at the
+        deepest depth every worker completed wins.
+        """
+        ai = AILogic(difficulty=difficulty)
+        position = BitBoard.from_game_state(game, side=ai._ai)
+        self._parallel_searches += 1
+        ordered = ai._order_moves(
+            position, [board_idx * 9 + cell_idx for board_idx, cell_idx in available_moves]
+        )
+        shares = [ordered[i::grant.units] for i in range(grant.units)]
+        shares = [share for share in shares if share]
+        table = engine.table if engine is not None else self._shared_table
+        table.new_search()
+        table_name = engine.table_name if engine is not None else None
+        table_entries = engine.table_entries if engine is not None else 0
+        # The move's node budget is split, so its CPU cost stays that of the level
+        max_nodes = max(1, max_nodes // len(shares))
+
+        futures = [
+            self._pool.submit(
+                _run_root_search, slot, position, share, difficulty, time_limit,
+                table_name, table_entries, max_nodes,
+            )
+            for share in shares
+        ]
+
+        def combine(
+            results: List[Tuple[List[Tuple[int, int, int]], dict]]
+        ) -> Tuple[Tuple[int, int], List[int], List[dict], Optional[RootResult]]:
+            search_stats = [stats for _, stats in results]
+            completed = [iterations for iterations, _ in results if iterations]
+            if not completed:
+                return divmod(ordered[0], 9), [ordered[0]], search_stats, None
+            depth = min(iterations[-1][0] for iterations in completed)
+            candidates = [
+                (score, move)
+                for iterations in completed
+                for iteration_depth, move, score in iterations
+                if iteration_depth == depth
+            ]
+            score, move = max(candidates)
+            if engine is None or engine.closed:
+                pv = [move]
+            else:
+                # The workers filled the game table, so the line can be read back here
+                pv = AILogic(transposition_table=engine.table).principal_variation(
+                    position, move, depth + 1
+                )
+            return divmod(move, 9), pv, search_stats, RootResult(depth, ((move, score),), tuple(pv))
+
+        return futures, combine
+
+    async def analyze(
+        self,
+        positions: List[BitBoard],
+        max_nodes: int = AI_ANALYSIS_NODES,
+        max_depth: int = ANALYSIS_DEPTH,
+        time_limit: float = ANALYSIS_TIME_LIMIT,
+        key: str = ANALYSIS,
+    ) -> List[dict]:
+        """
+        Analyze positions in the worker pool (see api.utils.analysis).
+
+        Positions found in the analysis cache, and repeats or symmetric
+        images of another position of the batch, are not searched again.
+        The rest go to the workers in chunks of up to AI_ANALYSIS_CHUNK
+        positions, and about AI_ANALYSIS_CHUNK_SECONDS of expected search
+        time, so no chunk holds a worker for long.
+
+        Args:
+            positions: Positions with their side to move
+            key: Requester, for round-robin fairness between batches
+
+        Returns:
+            One format_result dict per position, in order
+
+        Raises:
+            AIOverloadedError: Too many searches are waiting for a worker
+        """
+        self._analysis_requests += 1
+        self._analysis_positions += len(positions)
+        cache = get_analysis_cache()
+        results: List[Optional[dict]] = [None] * len(positions)
+        # cache key -> (index, position, symmetry) of every position sharing it
+        pending: "OrderedDict[str, List[Tuple[int, BitBoard, int]]]" = OrderedDict()
+        for index, position in enumerate(positions):
+            entry_key, symmetry = cache_key(position, max_nodes, max_depth, time_limit)
+            cached = await cache.get(entry_key)
+            if cached is not None:
+                results[index] = format_result(
+                    from_canonical(cached, symmetry, position), cached=True
+                )
+            else:
+                pending.setdefault(entry_key, []).append((index, position, symmetry))
+
+        searches = list(pending.items())
+        position_time = self._expected_analysis_time(max_nodes, time_limit)
+        size = max(1, min(AI_ANALYSIS_CHUNK, int(AI_ANALYSIS_CHUNK_SECONDS / position_time)))
+        chunks = [searches[start:start + size] for start in range(0, len(searches), size)]
+        outcomes = await asyncio.gather(*[
+            self._analyze_chunk(
+                key, [sharing[0][1] for _, sharing in chunk], max_nodes, max_depth, time_limit,
+                position_time,
+            )
+            for chunk in chunks
+        ], return_exceptions=True)
+
+        for chunk, outcome in zip(chunks, outcomes):
+            if isinstance(outcome, asyncio.TimeoutError) and not isinstance(
+                outcome, AIOverloadedError
+            ):
+                self._analysis_timeouts += 1
+                for _, sharing in chunk:
+                    for index, _, _ in sharing:
+                        results[index] = format_result({"error": "Analysis timed out"})
+                continue
+            if isinstance(outcome, BaseException):
+                raise outcome
+            for (entry_key, sharing), result in zip(chunk, outcome):
+                if "error" not in result:
+                    self._analysis_nodes += result["nodes"]
+                    self._analysis_time += result["time_ms"] / 1000
+                canonical = to_canonical(result, sharing[0][2])
+                await cache.set(entry_key, canonical)
+                for number, (index, position, symmetry) in enumerate(sharing):
+                    # Repeats within the batch count as cache hits
+                    results[index] = format_result(
+                        result if number == 0 else from_canonical(canonical, symmetry, position),
+                        cached=number > 0,
+                    )
+        return results
+
+    def _expected_analysis_time(self, max_nodes: int, time_limit: float) -> float:
+        """Seconds one position is expected to search, at the measured speed"""
+        nps = ANALYSIS_NPS
+        if self._analysis_time > 1.0:
+            nps = self._analysis_nodes / self._analysis_time
+        return min(time_limit, max_nodes / nps)
+
+    async def _analyze_chunk(
+        self,
+        key: str,
+        positions: List[BitBoard],
+        max_nodes: int,
+        max_depth: int,
+        time_limit: float,
+        position_time: float,
+    ) -> List[dict]:
+        """Analyze one chunk of positions in a worker (or fallback thread)"""
+        chunk_time = time_limit * len(positions)
+        grant = await self.scheduler.acquire(
+            key, ANALYSIS, max_time=position_time * len(positions), degrade=False
+        )
+        self._analysis_searched += len(positions)
+        items = [
+            (position.to_string(), None if position.active == ANY_BOARD else position.active,
+             position.side)
+            for position in positions
+        ]
+        if self._pool is not None:
+            future = asyncio.wrap_future(self._pool.submit(
+                analyze_positions, items, max_nodes, max_depth, time_limit
+            ))
+        else:
+            future = asyncio.get_running_loop().run_in_executor(
+                None, analyze_positions, items, max_nodes, max_depth, time_limit
+            )
+        # Units are returned when the worker is really done, even after a timeout
+        future.add_done_callback(lambda _: self.scheduler.release(grant.units, grant.level))
+        return await asyncio.wait_for(
+            asyncio.shield(future), timeout=chunk_time + self.deadline_grace
+        )
+
+    async def analyze_stream(
+        self,
+        position: BitBoard,
+        key: str,
+        engine: Optional[GameEngine] = None,
+        max_nodes: int = AI_ANALYSIS_NODES,
+        max_depth: int = ANALYSIS_DEPTH,
+        time_limit: float = ANALYSIS_TIME_LIMIT,
+    ) -> AsyncIterator[dict]:
+        """
+        Analyze a position, yielding a result as each depth completes.
+
+        One worker task runs per depth, against the engine's table, until
+        the depth, node or time budget runs out. Without an engine each
+        depth starts from an empty table in the pool (a private table on
+        the fallback thread). Closing the generator stops the running task.
+
+        Args:
+            position: Position with its side to move
+            key: Requester, for round-robin fairness
+            engine: Game engine whose table the depths share
+
+        Yields:
+            depth, move, score (side to move), pv (encoded moves), nodes
+            (cumulative) and nps
+
+        Raises:
+            AIOverloadedError: Too many searches are waiting for a worker
+        """
+        if position.result() is not None:
+            return
+        grant = await self.scheduler.acquire(key, ANALYSIS, max_time=time_limit, degrade=False)
+        slot = self._free_slots.popleft()
+        self._cancel_flags[slot] = 0
+        self._streams += 1
+        loop = asyncio.get_running_loop()
+        cells = position.to_string()
+        active_board = None if position.active == ANY_BOARD else position.active
+        if engine is not None:
+            table, table_entries = engine.table_name, engine.table_entries
+        elif self._pool is None:
+            table, table_entries = TranspositionTable(ANALYSIS_TABLE_ENTRIES), 0
+        else:
+            table, table_entries = None, 0
+        started = time.monotonic()
+        nodes = 0
+        future = None
+
+        def release(_=None):
+            self._free_slots.append(slot)
+            self.scheduler.release(grant.units, grant.level)
+
+        try:
+            for depth in range(1, max_depth + 1):
+                remaining = time_limit - (time.monotonic() - started)
+                if remaining <= 0 or nodes >= max_nodes:
+                    break
+                args = (slot, cells, active_board, position.side, depth, max_nodes - nodes,
+                        remaining)
+                if self._pool is not None:
+                    future = asyncio.wrap_future(self._pool.submit(
+                        _run_analysis_depth, *args, None, table, table_entries
+                    ))
+                else:
+                    future = loop.run_in_executor(
+                        None, _run_analysis_depth, *args, self._cancel_flags, table,
+                        table_entries,
+                    )
+                result, stats = await asyncio.shield(future)
+                nodes += stats["nodes"]
+                if result is None:
+                    break
+                elapsed = time.monotonic() - started
+                self._stream_updates += 1
+                yield {
+                    **result,
+                    "nodes": nodes,
+                    "nps": round(nodes / elapsed) if elapsed else 0,
+                }
+        finally:
+            if future is not None and not future.done():
+                # Stop the running depth; the slot is free once it has stopped
+                self._cancel_flags[slot] = 1
+                future.add_done_callback(release)
+            else:
+                release()
+
+    def start_ponder(
+        self,
+        game: GameState,
+        engine: GameEngine,
+        difficulty: str,
+        time_limit: Optional[float] = None,
+    ) -> bool:
+        """
+        Search the position after the opponent's expected reply in the background.
+
+        The reply is the second move of the engine's principal variation.
+        Pondering only uses a single idle worker and is skipped when any
+        search waits. A real move that finds every worker busy cancels a
+        ponder, so it waits at most until that worker polls its cancel flag.
+
+        Returns:
+            True if a ponder search was started
+        """
+        self.cancel_ponder(game.id)
+        if len(engine.pv) < 2 or game.winner is not None:
+            return False
+        if not self.scheduler.has_idle_capacity():
+            self._ponder_skipped += 1
+            return False
+
+        position = BitBoard.from_game_state(game)
+        if engine.pv[1] not in position.legal_moves():
+            return False
+        position.play(engine.pv[1])
+        if position.winner() is not None:
+            return False
+
+        # The AI always plays O
+        ponder_game = game.model_copy(update={
+            "players": [],
+            "global_board": position.to_global_board(),
+            "active_board": None if position.active == ANY_BOARD else position.active,
+            "current_player": PlayerSymbol.O,
+            "move_count": game.move_count + 1,
+        }, deep=True)
+        moves = [divmod(move, 9) for move in position.legal_moves()]
+        task = asyncio.create_task(self.get_move(
+            ponder_game, moves, difficulty, time_limit, engine=engine, parallel=False,
+            background=True,
+        ))
+        # Results of abandoned ponders are never awaited
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._ponders[game.id] = (position.key(), task, engine)
+        self._ponder_started += 1
+        return True
+
+    async def take_ponder(self, game: GameState) -> Optional[Tuple[int, int]]:
+        """
+        Use the ponder search of a game if the opponent played the expected reply.
+
+        A ponder for any other position is cancelled, and one that failed
+        (deadline, overload, a crashed worker) counts as a miss, so the
+        caller falls back to a normal search.
+
+        Returns:
+            The pondered move, or None if there was no usable ponder
+        """
+        job = self._ponders.pop(game.id, None)
+        if job is None:
+            return None
+        key, task, engine = job
+        if task.cancelled() or BitBoard.from_game_state(game, side=O).key() != key:
+            task.cancel()
+            self._ponder_misses += 1
+            return None
+
+        try:
+            move = await task
+        except Exception:
+            logger.warning(f"Ponder failed: game={game.id}", exc_info=True)
+            self._ponder_misses += 1
+            return None
+        self._ponder_hits += 1
+        # The game followed the pondered line, so it is the one to reuse
+        engine.pv = engine.ponder_pv
+        return move
+
+    def _preempt_ponder(self) -> bool:
+        """Cancel the oldest running ponder to free its worker"""
+        for game_id, (_, task, _) in self._ponders.items():
+            if not task.done():
+                self.cancel_ponder(game_id)
+                self._ponder_preempted += 1
+                return True
+        return False
+
+    def cancel_ponder(self, game_id: str) -> bool:
+        """Cancel the ponder search of a game, if any"""
+        job = self._ponders.pop(game_id, None)
+        if job is None:
+            return False
+        job[1].cancel()
+        return True
+
+    def _cancel(self, slot: int, futures) -> None:
+        """Drop queued searches and signal running ones to stop"""
+        self._cancel_flags[slot] = 1
+        for future in futures:
+            if isinstance(future, Future):
+                future.cancel()
+
+    def _record_search_depth(self, search_stats: List[dict]) -> None:
+        """Record depth reached and think time of one move's search"""
+        searched = [stats for stats in search_stats if stats["depth"]]
+        if not searched:
+            return  # Book, shortcut or solved move
+        # A split search is only as deep as its shallowest share
+        self._searched_moves += 1
+        self._search_depth_total += min(stats["depth"] for stats in searched)
+        search_time = max(stats["time_ms"] for stats in searched) / 1000
+        self._search_time_total += search_time
+        self._search_time_max = max(self._search_time_max, search_time)
+
+    def get_stats(self) -> dict:
+        """Get executor statistics"""
+        in_flight = self.max_pending - len(self._free_slots)
+        return {
+            "workers": self.max_workers if self._pool is not None else 0,
+            "max_pending": self.max_pending,
+            "in_flight": in_flight,
+            "submitted": self._submitted,
+            "completed": self._completed,
+            "timeouts": self._timeouts,
+            "cancelled": self._cancelled,
+            "cancelled_cpu_ms": round(self._cancelled_cpu * 1000, 2),
+            "rejected": self._rejected,
+            "search_workers": self.search_workers,
+            "parallel_searches": self._parallel_searches,
+            "scheduler": self.scheduler.get_stats(),
+            "analysis": {
+                "requests": self._analysis_requests,
+                "positions": self._analysis_positions,
+                "searched": self._analysis_searched,
+                "timeouts": self._analysis_timeouts,
+                "streams": self._streams,
+                "stream_updates": self._stream_updates,
+            },
+            "ponder": {
+                "active": len(self._ponders),
+                "started": self._ponder_started,
+                "hits": self._ponder_hits,
+                "misses": self._ponder_misses,
+                "skipped": self._ponder_skipped,
+                "preempted": self._ponder_preempted,
+            },
+            "avg_time_ms": round(self._total_time / self._completed * 1000, 2)
+            if self._completed else 0,
+            "search": {
+                "nodes": self._search_nodes,
+                "cutoffs": self._search_cutoffs,
+                "cutoff_rate": round(self._search_cutoffs / self._search_nodes * 100, 2)
+                if self._search_nodes else 0,
+                "first_move_cutoff_rate": round(
+                    self._search_first_move_cutoffs / self._search_cutoffs * 100, 2
+                ) if self._search_cutoffs else 0,
+                "searched_moves": self._searched_moves,
+                "avg_depth": round(self._search_depth_total / self._searched_moves, 2)
+                if self._searched_moves else 0,
+                "avg_search_ms": round(self._search_time_total / self._searched_moves * 1000, 2)
+                if self._searched_moves else 0,
+                "max_search_ms": round(self._search_time_max * 1000, 2),
+                "aborted_iterations": self._aborted_iterations,
+            },
+        }
+
+
+# Global AI executor instance
+ai_executor = AIExecutor()
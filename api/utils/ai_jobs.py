@@ -0,0 +1,120 @@
+"""
+Cancellable AI move jobs tied to the game lifecycle.
+
+Each AI move runs as an asyncio task registered under its game id and the
+move number it answers. Resetting, leaving, removing or cleaning up a game
+cancels its job, which cancels the search (see AIExecutor.get_move), so a
+worker is never kept busy for a game that is gone or has moved on. A job
+is only applied if it is still the game's current job for that move.
+"""
+
+import asyncio
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Coroutine, Dict, Iterable, Optional
+
+
+@dataclass
+class AIJob:
+    """An AI move being computed"""
+    game_id: str
+    move_count: int
+    task: asyncio.Task
+    started: float
+
+
+class AIJobRegistry:
+    """One AI move job per game, cancelled with the game's lifecycle"""
+
+    def __init__(self):
+        self._jobs: Dict[str, AIJob] = {}
+
+        # Statistics
+        self._started = 0
+        self._completed = 0
+        self._failed = 0
+        self._cancelled: Counter = Counter()
+        self._cancelled_time = 0.0
+
+    def start(self, game_id: str, move_count: int, coro: Coroutine) -> asyncio.Task:
+        """
+        Run the AI move of a game as a job, replacing any earlier one.
+
+        Args:
+            game_id: Game the move is for
+            move_count: Move number of the position the AI answers
+            coro: The move computation; it should call finish() once it
+                applies its move, after which it can no longer be cancelled
+        """
+        self.cancel(game_id, "superseded")
+        task = asyncio.create_task(coro)
+        job = AIJob(game_id, move_count, task, time.monotonic())
+        self._jobs[game_id] = job
+        self._started += 1
+        task.add_done_callback(lambda t: self._done(job, t))
+        return task
+
+    def is_current(self, game_id: str, move_count: int) -> bool:
+        """True while a job for this game and move number is registered"""
+        job = self._jobs.get(game_id)
+        return job is not None and job.move_count == move_count
+
+    def finish(self, game_id: str, move_count: int) -> bool:
+        """
+        Mark a job done before it applies its move.
+
+        Returns:
+            False if the job was cancelled or replaced; its move must be dropped
+        """
+        if not self.is_current(game_id, move_count):
+            return False
+        del self._jobs[game_id]
+        self._completed += 1
+        return True
+
+    def cancel(self, game_id: str, reason: str) -> bool:
+        """Cancel the running AI move of a game, if any"""
+        job = self._jobs.pop(game_id, None)
+        if job is None:
+            return False
+        job.task.cancel()
+        self._cancelled[reason] += 1
+        self._cancelled_time += time.monotonic() - job.started
+        return True
+
+    def prune(self, live_game_ids: Iterable[str]) -> int:
+        """Cancel the jobs of every game not in live_game_ids"""
+        live = set(live_game_ids)
+        stale = [game_id for game_id in self._jobs if game_id not in live]
+        for game_id in stale:
+            self.cancel(game_id, "cleanup")
+        return len(stale)
+
+    def _done(self, job: AIJob, task: asyncio.Task) -> None:
+        if self._jobs.get(job.game_id) is job:
+            # Ended without applying a move (no move to make, or it failed)
+            del self._jobs[job.game_id]
+            if task.cancelled() or task.exception() is not None:
+                self._failed += 1
+
+    def get_job(self, game_id: str) -> Optional[AIJob]:
+        """The running AI move job of a game"""
+        return self._jobs.get(game_id)
+
+    def get_stats(self) -> dict:
+        """Get job counts and time spent on cancelled jobs"""
+        return {
+            "active": len(self._jobs),
+            "started": self._started,
+            "completed": self._completed,
+            "failed": self._failed,
+            "cancelled": sum(self._cancelled.values()),
+            "cancelled_by_reason": dict(self._cancelled),
+            # Wall time cancelled jobs had run, queueing included
+            "cancelled_time_ms": round(self._cancelled_time * 1000, 2),
+        }
+
+
+# Global AI job registry
+ai_jobs = AIJobRegistry()
@@ -3,68 +3,184 @@ AI logic for Super Tic Tac Toe using intelligent strategy.
 Supports difficulty levels: easy, medium, hard
 
 Strategy:
-- Easy: Random moves with occasional smart plays
-- Medium: Mix of strategic and random moves
-- Hard: Optimal minimax-based play with alpha-beta pruning
+Every level runs the same minimax search with alpha-beta pruning, bounded
+by the level's node, depth and time budget (see api.utils.difficulty).
+Easy and medium search shallower and sample their move from the root
+scores; hard plays the best move and also uses the opening book and the
+endgame solver.
 
 Performance optimizations:
-- Move ordering for better alpha-beta pruning
-- Transposition table for caching evaluated positions
-- Iterative deepening for time-constrained search
+- Move ordering for better alpha-beta pruning (table move, killer moves
+  and history heuristic on top of static scores)
+- Principal variation search with aspiration windows at the root
+- Transposition table (Zobrist keys, bound flags) for caching evaluated positions;
+  early positions are stored under their canonical key, so the 8
+  rotations and reflections of a position share one entry
+- Threat-based quiescence at the leaves: board-winning and board-blocking
+  moves (from the precomputed threat masks) are searched past the depth
+  limit under a small per-leaf node cap, so a board one move from being
+  won is not misjudged at the horizon
+- Iterative deepening for time-constrained search; the deadline is also
+  checked every few thousand nodes inside the search, so an iteration that
+  runs over is abandoned and the last completed depth is played
+- Opening book of offline-searched replies (see api.utils.opening_book)
+- Exact endgame solving below an empty-cell threshold (see api.utils.endgame)
+- Local-board winner, threats and heuristic come from precomputed tables
+  (see api.utils.board_tables); the position keeps their sum up to date
+  with every move, so leaf evaluation is O(1)
+- Search runs on a compact bitboard (see api.utils.bitboard), converted
+  from GameState once per move and updated with make/unmake
 """
 
-from typing import List, Tuple, Optional, Dict
+from typing import Callable, List, Tuple, Optional
 from api.models.game import GameState, PlayerSymbol
+from api.utils.bitboard import (
+    ANY_BOARD, FULL_BOARD, MASK_BITS, SYMMETRY_INVERSE, BitBoard, O, TIE, WINNING_MASK, X,
+    next_active_board, symbol_to_side, transform_move
+)
+from api.utils.board_tables import (
+    TERNARY, THREATS, board_code, winner_symbol
+)
+from api.utils.difficulty import get_budget, normalize_difficulty
+from api.utils.endgame import ENDGAME_EMPTY_CELLS, SOLVED_LOSS, EndgameSolver
+from api.utils.opening_book import OpeningBook, get_opening_book
+from api.utils.root_cache import RootResult
+from api.utils.transposition import (
+    NO_MOVE, TT_EXACT, TT_LOWER, TT_UPPER, TranspositionTable
+)
+import math
+import os
 import random
-import hashlib
 import time
 
 
-class TranspositionTable:
-    """Cache for storing evaluated positions to avoid recomputation"""
-    
-    def __init__(self, max_size: int = 10000):
-        self._cache: Dict[str, Tuple[float, int]] = {}
-        self._max_size = max_size
-    
-    def get(self, key: str, depth: int) -> Optional[float]:
-        """Get cached score if depth is sufficient"""
-        if key in self._cache:
-            score, cached_depth = self._cache[key]
-            if cached_depth >= depth:
-                return score
-        return None
-    
-    def set(self, key: str, score: float, depth: int):
-        """Store score with depth"""
-        if len(self._cache) >= self._max_size:
-            # Simple eviction: clear half the cache
-            keys = list(self._cache.keys())[:self._max_size // 2]
-            for k in keys:
-                del self._cache[k]
-        self._cache[key] = (score, depth)
-    
-    def clear(self):
-        """Clear the cache"""
-        self._cache.clear()
+# Bound flag of a negated score, by flag
+_FLIPPED_FLAG = (TT_EXACT, TT_UPPER, TT_LOWER)
+
+# Terminal scores dominate any heuristic evaluation
+WIN_SCORE = 10000
+INF_SCORE = 1000000
+# Value of a captured local board in the heuristic evaluation
+BOARD_WIN_SCORE = 100
+# Static ordering scores by cell: center, then corners, then edges
+CELL_ORDER_SCORES = (50, 10, 50, 10, 100, 10, 50, 10, 50)
+# Half-width of the aspiration window around the previous iteration's score
+ASPIRATION_WINDOW = 50
+# Ordering tiers: wins, then blocks, then killer moves, then history + static
+ORDER_WIN = 1 << 30
+ORDER_BLOCK = 1 << 29
+ORDER_KILLER = 1 << 28
+# Killer slots are kept per ply from the root
+MAX_PLY = 64
+# Deadline and cancellation are checked every this many nodes
+_CHECK_INTERVAL = 1024
+# Positions with at most this many stones share table entries with their
+# symmetric images; later on symmetric transpositions are too rare to pay
+# for the canonicalization
+CANONICAL_MAX_STONES = int(os.getenv("AI_CANONICAL_MAX_STONES", "5"))
+# Nodes the quiescence extension may add below each leaf; 0 disables it
+AI_QUIESCENCE_NODES = int(os.getenv("AI_QUIESCENCE_NODES", "16"))
+
+
+class _SearchAborted(Exception):
+    """Raised inside the search when the deadline passes or a stop is requested"""
+
+
+def sample_move(scores: List[Tuple[int, int]], noise: float) -> int:
+    """Pick a move from (move, score) pairs with probability softmax(score / noise)"""
+    best = max(score for _, score in scores)
+    weights = [math.exp((score - best) / noise) for _, score in scores]
+    return random.choices([move for move, _ in scores], weights)[0]
 
 
 class AILogic:
     """AI player for Super Tic Tac Toe with optimized performance"""
 
-    def __init__(self, difficulty: str = "medium"):
+    def __init__(
+        self,
+        difficulty: str = "medium",
+        max_time: Optional[float] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+        transposition_table: Optional[TranspositionTable] = None,
+        max_depth: Optional[int] = None,
+        opening_book: Optional[OpeningBook] = None,
+        endgame_threshold: int = ENDGAME_EMPTY_CELLS,
+        previous_pv: Optional[List[int]] = None,
+        max_nodes: Optional[float] = None,
+        ai_symbol: PlayerSymbol = PlayerSymbol.O,
+        quiescence_nodes: int = AI_QUIESCENCE_NODES,
+        endgame_solver: Optional[EndgameSolver] = None,
+    ):
         """
         Initialize AI with difficulty level
         
         Args:
-            difficulty: "easy", "medium", or "hard"
+            difficulty: "easy", "medium", or "hard"; selects the search budget
+            max_time: Maximum seconds to spend searching a move (budget default)
+            should_stop: Polled during the search; returning True aborts it
+            transposition_table: Table to search with, e.g. one shared
+                between processes; a private table is created otherwise
+            max_depth: Deepest iteration searched (budget default)
+            opening_book: Book consulted by hard mode; defaults to the
+                process-wide book, if one is installed
+            endgame_threshold: Hard mode solves positions with at most this
+                many empty cells exactly
+            previous_pv: Principal variation of this game's previous AI move,
+                used to order the root when the opponent played the expected reply
+            max_nodes: Nodes one move may search (budget default)
+            ai_symbol: Side the AI plays; games against humans always use O
+            quiescence_nodes: Nodes of the tactical extension below each
+                leaf; 0 evaluates leaves statically
+            endgame_solver: Solver to reuse, e.g. a worker's, so positions
+                solved for earlier moves stay cached; a new one otherwise
         """
-        self.difficulty = difficulty.lower()
-        self.ai_symbol = PlayerSymbol.O
-        self.human_symbol = PlayerSymbol.X
-        self._transposition_table = TranspositionTable()
+        self.difficulty = normalize_difficulty(difficulty)
+        self._budget = get_budget(self.difficulty)
+        self.ai_symbol = ai_symbol
+        self.human_symbol = PlayerSymbol.X if ai_symbol == PlayerSymbol.O else PlayerSymbol.O
+        self._ai = symbol_to_side(self.ai_symbol)
+        self._human = symbol_to_side(self.human_symbol)
+        self._transposition_table = transposition_table or TranspositionTable()
         self._nodes_evaluated = 0
-        self._max_time = 2.0  # Maximum seconds for a move
+        # Move ordering state, kept across the iterations of one search
+        self._killers = [[NO_MOVE, NO_MOVE] for _ in range(MAX_PLY)]
+        self._history = [[0] * 81, [0] * 81]
+        self._root_depth = 0
+        # Search statistics
+        self._cutoffs = 0
+        self._first_move_cutoffs = 0
+        self._pvs_researches = 0
+        self._aspiration_researches = 0
+        self._aborted_iterations = 0
+        self._tt_probes = 0
+        self._tt_hits = 0
+        # (depth, nodes, seconds) at the end of each completed iteration
+        self._iteration_log: List[Tuple[int, int, float]] = []
+        self._search_depth = 0
+        self._search_time = 0.0
+        self._deadline: Optional[float] = None
+        self._node_limit = float("inf")
+        # Deepest ply whose positions are looked up by canonical key
+        self._canonical_plies = -1
+        # Quiescence node cap per leaf, and what is left of it at the current leaf
+        self._quiescence_nodes = quiescence_nodes
+        self._quiescence_left = 0
+        self._quiescence_searched = 0
+        # Root moves and exact scores of the last completed iteration (noisy levels)
+        self._root_scores: List[Tuple[int, int]] = []
+        # Maximum seconds, depth and nodes for a move
+        self._max_time = max_time if max_time is not None else self._budget.max_time
+        self._max_depth = max_depth if max_depth is not None else self._budget.max_depth
+        self._max_nodes = max_nodes if max_nodes is not None else self._budget.max_nodes
+        self._opening_book = opening_book if opening_book is not None else get_opening_book()
+        self._endgame_threshold = endgame_threshold
+        self._endgame_solver = endgame_solver
+        self._previous_pv = previous_pv or []
+        # Expected line after the last move: AI move, expected reply, ...
+        self.last_pv: List[int] = []
+        # Root search behind the last move; None for book, endgame and shortcut moves
+        self.last_result: Optional[RootResult] = None
+        self._should_stop = should_stop
 
     def get_next_move(
         self, game: GameState, available_moves: List[Tuple[int, int]]
@@ -83,57 +199,87 @@ class AILogic:
             raise ValueError("No available moves")
         
         # Reset stats
-        self._nodes_evaluated = 0
+        self._reset_search_stats()
+        self.last_pv = []
+        self.last_result = None
         
-        if self.difficulty == "easy":
-            return self._get_easy_move(game, available_moves)
-        elif self.difficulty == "medium":
-            return self._get_medium_move(game, available_moves)
-        else:  # hard
-            return self._get_hard_move(game, available_moves)
+        move = self._get_budgeted_move(game, available_moves)
+        
+        if not self.last_pv:
+            self.last_pv = [move[0] * 9 + move[1]]
+        return move
 
-    def _get_easy_move(
+    def _get_budgeted_move(
         self, game: GameState, available_moves: List[Tuple[int, int]]
     ) -> Tuple[int, int]:
-        """Easy mode: Mostly random with 30% chance of smart moves"""
-        if random.random() < 0.3:
+        """Search within the difficulty's budget, after book and endgame for hard"""
+        # Opening positions were searched deeper offline
+        if self._budget.use_book:
+            book_move = self._get_book_move(game, available_moves)
+            if book_move:
+                return book_move
+        
+        # Few empty cells left: play a proven result instead of a heuristic one
+        if self._budget.use_endgame:
+            endgame_move = self._get_endgame_move(game, available_moves)
+            if endgame_move:
+                return endgame_move
+        
+        # Exact levels take immediate wins and blocks without searching;
+        # noisy levels may miss them, as a weaker player would
+        if not self._budget.noise:
             smart_move = self._get_smart_move(game, available_moves)
             if smart_move:
                 return smart_move
         
-        return random.choice(available_moves)
+        # Use iterative deepening for time-constrained optimal play
+        return self._get_iterative_deepening_move(game, available_moves)
 
-    def _get_medium_move(
+    def _get_book_move(
         self, game: GameState, available_moves: List[Tuple[int, int]]
-    ) -> Tuple[int, int]:
-        """Medium mode: 70% strategic, 30% random"""
-        if random.random() < 0.7:
-            smart_move = self._get_smart_move(game, available_moves)
-            if smart_move:
-                return smart_move
-        
-        return random.choice(available_moves)
+    ) -> Optional[Tuple[int, int]]:
+        """Look the position up in the opening book"""
+        if self._opening_book is None or game.move_count >= self._opening_book.plies:
+            return None
+        
+        entry = self._opening_book.probe(BitBoard.from_game_state(game, side=self._ai))
+        if entry is None:
+            return None
+        move = divmod(entry[0], 9)
+        # Guard against key collisions: only ever play a legal move
+        return move if move in available_moves else None
 
-    def _get_hard_move(
+    def _get_endgame_move(
         self, game: GameState, available_moves: List[Tuple[int, int]]
-    ) -> Tuple[int, int]:
-        """Hard mode: Always make optimal moves using strategic analysis"""
-        # First, check for immediate wins or blocks
-        smart_move = self._get_smart_move(game, available_moves)
-        if smart_move:
-            return smart_move
-        
-        # Use iterative deepening for time-constrained optimal play
-        return self._get_iterative_deepening_move(game, available_moves)
+    ) -> Optional[Tuple[int, int]]:
+        """Solve the position exactly if few enough cells are empty"""
+        position = BitBoard.from_game_state(game, side=self._ai)
+        if EndgameSolver.empty_cells(position) > self._endgame_threshold:
+            return None
+        
+        if self._endgame_solver is None:
+            self._endgame_solver = EndgameSolver(should_stop=self._should_stop)
+        # Leave half the budget for the heuristic search if the proof fails
+        solved = self._endgame_solver.solve(
+            position, max_time=self._max_time / 2, should_stop=self._should_stop
+        )
+        if solved is None or solved[0] == SOLVED_LOSS:
+            # Proven losses are left to the heuristic search, which still
+            # picks the line that is hardest for the opponent to convert
+            return None
+        move = divmod(solved[1], 9)
+        return move if move in available_moves else None
 
     def _get_smart_move(
         self, game: GameState, available_moves: List[Tuple[int, int]]
     ) -> Optional[Tuple[int, int]]:
         """
-        Find immediate strategic moves in priority order:
+        Find immediate tactical moves in priority order:
         1. Winning move (completes a board)
         2. Blocking move (prevents opponent from winning)
-        3. Center of active board or global center
+        
+        Positional preferences (center, corners) are left to the search's
+        move ordering and evaluation.
         """
         
         # Priority 1: Look for winning moves
@@ -152,222 +298,621 @@ class AILogic:
             if self._is_blocking_move(board, cell_idx, self.human_symbol):
                 return move
         
-        # Priority 3: Prefer center positions
-        center_moves = [m for m in available_moves if m[1] == 4]
-        if center_moves:
-            return center_moves[0]
-        
-        # Priority 4: Prefer corners (strong positions)
-        corner_moves = [m for m in available_moves if m[1] in [0, 2, 6, 8]]
-        if corner_moves:
-            return corner_moves[0]
-        
         return None
 
     def _get_iterative_deepening_move(
         self, game: GameState, available_moves: List[Tuple[int, int]]
     ) -> Tuple[int, int]:
         """Use iterative deepening with time limit for optimal move"""
-        start_time = time.time()
-        best_move = available_moves[0]
+        # Convert once; the search itself only works on int masks
+        position = BitBoard.from_game_state(game, side=self._ai)
+        self._transposition_table.new_search()
+        root_moves = [board_idx * 9 + cell_idx for board_idx, cell_idx in available_moves]
+        
+        iterations = self.search_root(position, root_moves)
+        if not iterations:
+            return available_moves[0]
+        depth, best_move, score = iterations[-1]
+        if self._budget.noise and self._root_scores:
+            scores = sorted(self._root_scores, key=lambda item: -item[1])
+            self.last_result = RootResult(depth, tuple(scores))
+            best_move = self._sample_root_move()
+            self.last_pv = self.principal_variation(position, best_move, depth + 1)
+        else:
+            self.last_pv = self.principal_variation(position, best_move, depth + 1)
+            self.last_result = RootResult(depth, ((best_move, score),), tuple(self.last_pv))
+        return divmod(best_move, 9)
+
+    def search_root(
+        self, position: BitBoard, root_moves: List[int]
+    ) -> List[Tuple[int, int, int]]:
+        """
+        Iteratively deepen over the given root moves of a position.
         
-        # Order moves for better pruning
-        ordered_moves = self._order_moves(game, available_moves)
+        Args:
+            position: Position with the AI to move
+            root_moves: Encoded moves (board_index * 9 + cell_index) to consider
+            
+        Returns:
+            (depth, best_move, score) for every completed depth, shallowest first
+        """
+        start_time = time.time()
+        undo_depth = position.undo_depth()
+        self._set_canonical_plies(position)
+        
+        # Order moves for better pruning; the move the previous search
+        # expected to play now goes first
+        ordered_moves = self._order_moves(position, root_moves)
+        hint = self._pv_hint(position)
+        if hint in ordered_moves:
+            ordered_moves.remove(hint)
+            ordered_moves.insert(0, hint)
+        iterations = []
+        
+        # Killers are position specific; history only loses weight between searches
+        self._killers = [[NO_MOVE, NO_MOVE] for _ in range(MAX_PLY)]
+        for side_history in self._history:
+            for move in range(81):
+                side_history[move] >>= 1
         
         # Iterative deepening from depth 1 to max
-        for depth in range(1, 6):
-            if time.time() - start_time > self._max_time:
+        for depth in range(1, self._max_depth + 1):
+            if time.time() - start_time > self._max_time or self._stop_requested():
+                break
+            if self._nodes_evaluated >= self._max_nodes:
                 break
+            # Depth 1 always completes so there is a move to play
+            self._deadline = start_time + self._max_time if iterations else None
+            self._node_limit = self._max_nodes if iterations else float("inf")
             
-            move = self._get_minimax_move(game, ordered_moves, depth)
-            if move:
-                best_move = move
+            try:
+                if iterations and not self._budget.noise:
+                    # Aspiration window around the previous score; re-search on failure
+                    previous = iterations[-1][2]
+                    alpha, beta = previous - ASPIRATION_WINDOW, previous + ASPIRATION_WINDOW
+                    move, score = self._get_minimax_move(position, ordered_moves, depth, alpha, beta)
+                    if score <= alpha or score >= beta:
+                        self._aspiration_researches += 1
+                        move, score = self._get_minimax_move(position, ordered_moves, depth)
+                else:
+                    move, score = self._get_minimax_move(position, ordered_moves, depth)
+            except _SearchAborted:
+                # Unwind the moves the aborted iteration left on the position
+                while position.undo_depth() > undo_depth:
+                    position.undo()
+                self._aborted_iterations += 1
+                break
+            if move is not None:
+                iterations.append((depth, move, score))
+                self._iteration_log.append((depth, self._nodes_evaluated, time.time() - start_time))
+                # Search the best move first in the next iteration
+                ordered_moves.remove(move)
+                ordered_moves.insert(0, move)
+        
+        self._deadline = None
+        self._node_limit = float("inf")
+        self._search_time = time.time() - start_time
+        self._search_depth = iterations[-1][0] if iterations else 0
+        return iterations
+
+    def _pv_hint(self, position: BitBoard) -> Optional[int]:
+        """Third move of the previous PV, if the game followed its first two"""
+        if len(self._previous_pv) < 3:
+            return None
+        ai_move, reply, hint = self._previous_pv[:3]
+        ai_board, ai_cell = divmod(ai_move, 9)
+        reply_board, reply_cell = divmod(reply, 9)
+        if (position.masks[self._ai][ai_board] >> ai_cell & 1
+                and position.masks[self._human][reply_board] >> reply_cell & 1):
+            return hint
+        return None
+
+    def principal_variation(
+        self, position: BitBoard, first_move: int, max_length: int
+    ) -> List[int]:
+        """
+        Expected line of play after first_move, read from the transposition table.
         
-        return best_move
+        Args:
+            position: Position before first_move; restored before returning
+            first_move: Encoded move the line starts with
+            max_length: Maximum number of moves in the line
+        """
+        # The table may have been filled by another AILogic (a worker), so
+        # the canonical keys are worked out from the position itself
+        self._set_canonical_plies(position)
+        pv = [first_move]
+        position.play(first_move)
+        while len(pv) < max_length and position.winner() is None:
+            pos_key, symmetry = self._table_key(position, len(pv))
+            entry = self._transposition_table.probe(pos_key)
+            if entry is None or entry[3] == NO_MOVE:
+                break
+            move = transform_move(entry[3], SYMMETRY_INVERSE[symmetry])
+            if move not in position.legal_moves():
+                break
+            pv.append(move)
+            position.play(move)
+        for _ in pv:
+            position.undo()
+        return pv
 
-    def _order_moves(
-        self, game: GameState, moves: List[Tuple[int, int]]
-    ) -> List[Tuple[int, int]]:
+    def _set_canonical_plies(self, position: BitBoard) -> None:
+        """Plies from the root of position that are stored under canonical keys"""
+        stones = sum(mask.bit_count() for masks in position.masks for mask in masks)
+        self._canonical_plies = CANONICAL_MAX_STONES - stones
+
+    def _table_key(self, position: BitBoard, ply: int) -> Tuple[int, int]:
+        """
+        Transposition table key of a position and the symmetry of its entry.
+
+        Early positions are stored under their canonical key (see
+        BitBoard.canonical_key) with the best move in the canonical frame,
+        so symmetric transpositions share one entry.
+        """
+        if ply <= self._canonical_plies:
+            return position.canonical_key()
+        return position.key(), 0
+
+    def _stop_requested(self) -> bool:
+        """Check the caller's cancellation hook, if any"""
+        return self._should_stop is not None and self._should_stop()
+
+    def _check_budget(self) -> None:
+        """Abort the running iteration once nodes or time run out or a stop is requested"""
+        if self._nodes_evaluated >= self._node_limit:
+            raise _SearchAborted()
+        if self._deadline is not None and time.time() > self._deadline:
+            raise _SearchAborted()
+        if self._stop_requested():
+            raise _SearchAborted()
+
+    def _order_moves(self, position: BitBoard, moves: List[int], ply: int = 0) -> List[int]:
         """
         Order moves for better alpha-beta pruning.
-        Winning moves first, then center, then corners, then edges.
+        Winning moves first, then blocks, then killer moves of this ply, then
+        by history score plus the static cell score (center, corners, edges).
         """
-        scored_moves = []
-        
-        for move in moves:
-            board_idx, cell_idx = move
-            board = game.global_board[board_idx]
-            score = 0
-            
+        own = position.masks[position.side]
+        other = position.masks[position.side ^ 1]
+        history = self._history[position.side]
+        killers = self._killers[ply] if 0 < ply < MAX_PLY else ()
+        
+        def score(move: int) -> int:
+            board_idx, cell_idx = divmod(move, 9)
+            bit = 1 << cell_idx
             # Winning moves get highest priority
-            if self._is_winning_move(board, cell_idx, self.ai_symbol):
-                score = 1000
+            if WINNING_MASK[own[board_idx] | bit]:
+                return ORDER_WIN
             # Blocking moves get second priority
-            elif self._is_blocking_move(board, cell_idx, self.human_symbol):
-                score = 500
-            # Center positions
-            elif cell_idx == 4:
-                score = 100
-            # Corners
-            elif cell_idx in [0, 2, 6, 8]:
-                score = 50
-            # Edges
-            else:
-                score = 10
-            
-            scored_moves.append((move, score))
-        
-        # Sort by score descending
-        scored_moves.sort(key=lambda x: x[1], reverse=True)
-        return [move for move, _ in scored_moves]
+            if WINNING_MASK[other[board_idx] | bit]:
+                return ORDER_BLOCK
+            # Quiet moves that caused a cutoff at this ply in a sibling
+            if move in killers:
+                return ORDER_KILLER
+            return history[move] + CELL_ORDER_SCORES[cell_idx]
+        
+        return sorted(moves, key=score, reverse=True)
+
+    def _record_cutoff(
+        self, position: BitBoard, move: int, depth: int, ply: int, index: int
+    ) -> None:
+        """Update killers, history and statistics after a beta cutoff"""
+        self._cutoffs += 1
+        if index == 0:
+            self._first_move_cutoffs += 1
+        if 0 < ply < MAX_PLY:
+            killers = self._killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        self._history[position.side][move] += depth * depth
 
     def _get_minimax_move(
-        self, game: GameState, available_moves: List[Tuple[int, int]], depth: int = 2
-    ) -> Tuple[int, int]:
-        """Use minimax algorithm to find optimal move"""
-        best_move = available_moves[0]
-        best_score = float('-inf')
+        self,
+        position: BitBoard,
+        available_moves: List[int],
+        depth: int = 2,
+        alpha: int = -INF_SCORE,
+        beta: int = INF_SCORE,
+    ) -> Tuple[Optional[int], int]:
+        """
+        Use minimax algorithm to find optimal move and its score.
+        
+        The first move is searched with the full window, the rest with a
+        null window that only proves them worse (principal variation search).
+        A score <= alpha or >= beta means the window was too narrow.
+        
+        Noisy levels search every move with the full window instead, so
+        the exact root scores are available to sample from.
+        """
+        best_move = None
+        best_score = -INF_SCORE
+        self._root_depth = depth + 1
+        exact = bool(self._budget.noise)
+        root_scores = []
         
         for move in available_moves:
-            # Evaluate each move
-            game_copy = self._copy_game(game)
-            game_copy.global_board[move[0]][move[1]] = self.ai_symbol
-            
-            score = self._minimax(game_copy, depth=depth, is_maximizing=False)
+            # Evaluate each move in place; undo restores the root position
+            position.play(move)
+            if best_move is None or exact:
+                score = self._minimax(position, depth, False, alpha, beta)
+                root_scores.append((move, score))
+            else:
+                bound = max(alpha, best_score)
+                score = self._minimax(position, depth, False, bound, bound + 1)
+                if bound < score < beta:
+                    self._pvs_researches += 1
+                    score = self._minimax(position, depth, False, bound, beta)
+            position.undo()
             
             if score > best_score:
                 best_score = score
                 best_move = move
+                if best_score >= beta:
+                    break
         
-        return best_move
+        if exact:
+            self._root_scores = root_scores
+        return best_move, best_score
 
-    def _get_position_hash(self, game: GameState) -> str:
-        """Generate a hash for the current board position"""
-        board_str = ""
-        for board in game.global_board:
-            for cell in board:
-                if cell is None:
-                    board_str += "."
-                else:
-                    board_str += cell.value
-        return hashlib.md5(board_str.encode()).hexdigest()[:16]
+    def _sample_root_move(self) -> int:
+        """Pick a root move with probability softmax(score / noise)"""
+        return sample_move(self._root_scores, self._budget.noise)
 
     def _minimax(
         self, 
-        game: GameState, 
+        position: BitBoard, 
         depth: int, 
         is_maximizing: bool,
-        alpha: float = float('-inf'),
-        beta: float = float('inf')
-    ) -> float:
+        alpha: int = -INF_SCORE,
+        beta: int = INF_SCORE
+    ) -> int:
         """
-        Minimax with alpha-beta pruning and transposition table.
-        Evaluates positions up to specified depth.
+        Minimax with alpha-beta pruning, principal variation search and
+        transposition table. Evaluates positions up to specified depth.
         """
         self._nodes_evaluated += 1
-        
-        # Check transposition table
-        pos_hash = self._get_position_hash(game)
-        cached = self._transposition_table.get(pos_hash, depth)
-        if cached is not None:
-            return cached
+        if self._nodes_evaluated % _CHECK_INTERVAL == 0:
+            self._check_budget()
+        
+        # Check transposition table; bounds are only usable against the current window
+        ply = self._root_depth - depth
+        pos_key, symmetry = self._table_key(position, ply)
+        tt_move = NO_MOVE
+        # Entries hold scores from the side to move's point of view (as in
+        # the endgame solver), so searches for either side, such as an
+        # analysis of the human's move, can share one table
+        sign = 1 if is_maximizing else -1
+        entry = self._transposition_table.probe(pos_key)
+        self._tt_probes += 1
+        if entry is not None:
+            self._tt_hits += 1
+            tt_score, tt_depth, tt_flag, tt_move = entry
+            if not is_maximizing:
+                tt_score, tt_flag = -tt_score, _FLIPPED_FLAG[tt_flag]
+            if symmetry and tt_move != NO_MOVE:
+                tt_move = transform_move(tt_move, SYMMETRY_INVERSE[symmetry])
+            if tt_depth >= depth:
+                if tt_flag == TT_EXACT:
+                    return tt_score
+                if tt_flag == TT_LOWER and tt_score >= beta:
+                    return tt_score
+                if tt_flag == TT_UPPER and tt_score <= alpha:
+                    return tt_score
         
         # Check terminal states
-        winner = self._get_game_winner(game)
-        if winner == self.ai_symbol:
-            return 100 + depth
-        elif winner == self.human_symbol:
-            return -100 - depth
-        elif winner == PlayerSymbol.T:  # Tie
+        winner = position.winner()
+        if winner == self._ai:
+            return WIN_SCORE + depth
+        elif winner == self._human:
+            return -WIN_SCORE - depth
+        elif winner == TIE:
             return 0
         
-        # Depth limit - evaluate position
+        # Depth limit - evaluate position, past pending board wins and blocks
         if depth == 0:
-            score = self._evaluate_position(game)
-            self._transposition_table.set(pos_hash, score, depth)
+            if not self._quiescence_nodes:
+                score = self._evaluate_position(position)
+                self._transposition_table.store(pos_key, sign * score, depth, TT_EXACT)
+                return score
+            self._quiescence_left = self._quiescence_nodes
+            score = self._quiescence(position, is_maximizing, alpha, beta)
+            if score <= alpha:
+                flag = TT_UPPER
+            elif score >= beta:
+                flag = TT_LOWER
+            else:
+                flag = TT_EXACT
+            self._transposition_table.store(
+                pos_key, sign * score, depth, flag if is_maximizing else _FLIPPED_FLAG[flag]
+            )
             return score
         
-        # Get available moves (ordered for better pruning)
-        available = self._get_available_moves_static(game)
+        available = position.legal_moves()
         if not available:
-            score = self._evaluate_position(game)
-            self._transposition_table.set(pos_hash, score, depth)
+            score = self._evaluate_position(position)
+            self._transposition_table.store(pos_key, sign * score, depth, TT_EXACT)
             return score
         
         # Order moves for better pruning in deeper search
         if depth >= 2:
-            available = self._order_moves(game, available)
-        
+            available = self._order_moves(position, available, ply)
+        # Previous best move from the table goes first
+        if tt_move != NO_MOVE and tt_move in available:
+            available.remove(tt_move)
+            available.insert(0, tt_move)
+        
+        alpha_orig, beta_orig = alpha, beta
+        best_move = NO_MOVE
         if is_maximizing:
             # AI's turn - maximize score
-            max_eval = float('-inf')
-            for move in available:
-                game_copy = self._copy_game(game)
-                game_copy.global_board[move[0]][move[1]] = self.ai_symbol
-                eval_score = self._minimax(game_copy, depth - 1, False, alpha, beta)
-                max_eval = max(max_eval, eval_score)
+            best_eval = -INF_SCORE
+            for index, move in enumerate(available):
+                position.play(move)
+                if index == 0:
+                    eval_score = self._minimax(position, depth - 1, False, alpha, beta)
+                else:
+                    # Null window: only prove the move is no better
+                    eval_score = self._minimax(position, depth - 1, False, alpha, alpha + 1)
+                    if alpha < eval_score < beta:
+                        self._pvs_researches += 1
+                        eval_score = self._minimax(position, depth - 1, False, alpha, beta)
+                position.undo()
+                if eval_score > best_eval:
+                    best_eval = eval_score
+                    best_move = move
                 alpha = max(alpha, eval_score)
                 if beta <= alpha:
+                    self._record_cutoff(position, move, depth, ply, index)
                     break  # Pruning
-            self._transposition_table.set(pos_hash, max_eval, depth)
-            return max_eval
         else:
             # Human's turn - minimize score
-            min_eval = float('inf')
-            for move in available:
-                game_copy = self._copy_game(game)
-                game_copy.global_board[move[0]][move[1]] = self.human_symbol
-                eval_score = self._minimax(game_copy, depth - 1, True, alpha, beta)
-                min_eval = min(min_eval, eval_score)
+            best_eval = INF_SCORE
+            for index, move in enumerate(available):
+                position.play(move)
+                if index == 0:
+                    eval_score = self._minimax(position, depth - 1, True, alpha, beta)
+                else:
+                    # Null window: only prove the move is no better
+                    eval_score = self._minimax(position, depth - 1, True, beta - 1, beta)
+                    if alpha < eval_score < beta:
+                        self._pvs_researches += 1
+                        eval_score = self._minimax(position, depth - 1, True, alpha, beta)
+                position.undo()
+                if eval_score < best_eval:
+                    best_eval = eval_score
+                    best_move = move
                 beta = min(beta, eval_score)
                 if beta <= alpha:
+                    self._record_cutoff(position, move, depth, ply, index)
                     break  # Pruning
-            self._transposition_table.set(pos_hash, min_eval, depth)
-            return min_eval
-
-    def _evaluate_position(self, game: GameState) -> float:
-        """Evaluate a board position without terminal state"""
-        score = 0
         
-        # Evaluate each small board
-        for board_idx, board in enumerate(game.global_board):
-            board_score = self._evaluate_board(board)
-            score += board_score
-        
-        return score
+        if best_eval <= alpha_orig:
+            flag = TT_UPPER
+        elif best_eval >= beta_orig:
+            flag = TT_LOWER
+        else:
+            flag = TT_EXACT
+        if symmetry and best_move != NO_MOVE:
+            best_move = transform_move(best_move, symmetry)
+        self._transposition_table.store(
+            pos_key, sign * best_eval, depth, flag if is_maximizing else _FLIPPED_FLAG[flag],
+            best_move,
+        )
+        return best_eval
 
-    def _evaluate_board(self, board: List[Optional[PlayerSymbol]]) -> float:
-        """Evaluate a single 3x3 board"""
-        score = 0
-        
-        win_patterns = [
-            [0, 1, 2], [3, 4, 5], [6, 7, 8],
-            [0, 3, 6], [1, 4, 7], [2, 5, 8],
-            [0, 4, 8], [2, 4, 6]
-        ]
+    def _quiescence(
+        self, position: BitBoard, is_maximizing: bool, alpha: int, beta: int
+    ) -> int:
+        """
+        Search only board-winning and board-blocking moves below a leaf.
+
+        The side to move may stand pat on the static evaluation, unless
+        every legal move sends the opponent to a board it can win at once;
+        then all moves are searched. The leaf's node cap bounds the whole
+        extension, and nodes count towards the search budget.
+        """
+        winner = position.winner()
+        if winner == self._ai:
+            return WIN_SCORE
+        elif winner == self._human:
+            return -WIN_SCORE
+        elif winner == TIE:
+            return 0
+
+        stand_pat = self._evaluate_position(position)
+        if self._quiescence_left <= 0:
+            return stand_pat
+        moves, forced = self._tactical_moves(position)
+        if not moves:
+            return stand_pat
+
+        if forced:
+            best = -INF_SCORE if is_maximizing else INF_SCORE
+        else:
+            best = stand_pat
+            if is_maximizing:
+                if best >= beta:
+                    return best
+                alpha = max(alpha, best)
+            else:
+                if best <= alpha:
+                    return best
+                beta = min(beta, best)
+
+        for move in moves:
+            if self._quiescence_left <= 0:
+                break
+            self._quiescence_left -= 1
+            self._quiescence_searched += 1
+            self._nodes_evaluated += 1
+            if self._nodes_evaluated % _CHECK_INTERVAL == 0:
+                self._check_budget()
+            position.play(move)
+            score = self._quiescence(position, not is_maximizing, alpha, beta)
+            position.undo()
+            if is_maximizing:
+                best = max(best, score)
+                alpha = max(alpha, score)
+            else:
+                best = min(best, score)
+                beta = min(beta, score)
+            if beta <= alpha:
+                break
+        # A forced leaf whose cap ran out before any move keeps its evaluation
+        return stand_pat if abs(best) == INF_SCORE else best
+
+    def _tactical_moves(self, position: BitBoard) -> Tuple[List[int], bool]:
+        """
+        Board-winning and board-blocking moves of the side to move.
+
+        Returns:
+            (moves, forced): wins first, then blocks; forced (with every
+            legal move) when each move sends the opponent to a board it
+            can win at once. The board is the one next_active_board picks
+            after the move: a cell whose board is decided, or a move that
+            decides its own target board, sends the opponent to the first
+            open board.
+        """
+        side = position.side
+        x_masks, o_masks = position.masks
+        own_threats = THREATS[side]
+        other_threats = THREATS[side ^ 1]
+        closed = position.closed
+        open_boards = FULL_BOARD & ~closed
+        if position.active != ANY_BOARD and open_boards >> position.active & 1:
+            boards = (position.active,)
+        else:
+            boards = MASK_BITS[open_boards]
+
+        wins = []
+        blocks = []
+        # Forced unless some move sends the opponent to a board it cannot win at once
+        forced = bool(boards)
+        # Boards whose threats were looked up, and those the opponent can win
+        checked = winnable = 0
+        for board_idx in boards:
+            x_mask = x_masks[board_idx]
+            o_mask = o_masks[board_idx]
+            code = TERNARY[x_mask] + 2 * TERNARY[o_mask]
+            base = board_idx * 9
+            own = own_threats[code]
+            if own:
+                wins.extend(base + cell_idx for cell_idx in MASK_BITS[own])
+            other = other_threats[code] & ~own
+            if other:
+                blocks.extend(base + cell_idx for cell_idx in MASK_BITS[other])
+            if not forced:
+                continue
+
+            for cell_idx in MASK_BITS[FULL_BOARD & ~(x_mask | o_mask)]:
+                if cell_idx != board_idx and open_boards >> cell_idx & 1:
+                    # Only the board played in can close, so this one stays the target
+                    target = cell_idx
+                else:
+                    if side == X:
+                        x_after, o_after = x_mask | 1 << cell_idx, o_mask
+                    else:
+                        x_after, o_after = x_mask, o_mask | 1 << cell_idx
+                    closed_after = closed
+                    if (WINNING_MASK[x_after if side == X else o_after]
+                            or x_after | o_after == FULL_BOARD):
+                        closed_after |= 1 << board_idx
+                    target = next_active_board(cell_idx, closed_after)
+                    if target == ANY_BOARD:
+                        forced = False  # The move ends the game
+                        break
+                    if target == board_idx:
+                        # The opponent plays in the board this move changed
+                        if not other_threats[TERNARY[x_after] + 2 * TERNARY[o_after]]:
+                            forced = False
+                            break
+                        continue
+                bit = 1 << target
+                if not checked & bit:
+                    checked |= bit
+                    if other_threats[TERNARY[x_masks[target]] + 2 * TERNARY[o_masks[target]]]:
+                        winnable |= bit
+                if not winnable & bit:
+                    forced = False
+                    break
+
+        tactical = wins + blocks
+        if forced:
+            quiet = set(position.legal_moves()).difference(tactical)
+            return tactical + sorted(quiet), True
+        return tactical, False
+
+    def _reset_search_stats(self) -> None:
+        """Clear the per-move search counters"""
+        self._nodes_evaluated = 0
+        self._cutoffs = 0
+        self._first_move_cutoffs = 0
+        self._pvs_researches = 0
+        self._aspiration_researches = 0
+        self._aborted_iterations = 0
+        self._tt_probes = 0
+        self._tt_hits = 0
+        self._quiescence_searched = 0
+        self._iteration_log = []
+        self._search_depth = 0
+        self._search_time = 0.0
+
+    def get_search_stats(self) -> dict:
+        """Get statistics of the last search"""
+        return {
+            "nodes": self._nodes_evaluated,
+            "cutoffs": self._cutoffs,
+            "first_move_cutoffs": self._first_move_cutoffs,
+            # Share of nodes that were cut off, and of cutoffs on the first move tried
+            "cutoff_rate": round(self._cutoffs / self._nodes_evaluated * 100, 2)
+            if self._nodes_evaluated else 0,
+            "first_move_cutoff_rate": round(self._first_move_cutoffs / self._cutoffs * 100, 2)
+            if self._cutoffs else 0,
+            "pvs_researches": self._pvs_researches,
+            "aspiration_researches": self._aspiration_researches,
+            # Nodes searched by the tactical extension below the leaves
+            "quiescence_nodes": self._quiescence_searched,
+            # Deepest completed iteration and wall time of the search
+            "depth": self._search_depth,
+            "time_ms": round(self._search_time * 1000, 2),
+            "aborted_iterations": self._aborted_iterations,
+            "tt_probes": self._tt_probes,
+            "tt_hits": self._tt_hits,
+            "tt_hit_rate": round(self._tt_hits / self._tt_probes * 100, 2)
+            if self._tt_probes else 0,
+            "branching_factor": round(self._branching_factor(), 2),
+            # Cumulative nodes and milliseconds when each depth completed
+            "iterations": [
+                {"depth": depth, "nodes": nodes, "time_ms": round(elapsed * 1000, 2)}
+                for depth, nodes, elapsed in self._iteration_log
+            ],
+        }
+
+    def _branching_factor(self) -> float:
+        """Effective branching factor: geometric mean growth of nodes per iteration"""
+        nodes_per_depth = []
+        previous = 0
+        for _, nodes, _ in self._iteration_log:
+            nodes_per_depth.append(nodes - previous)
+            previous = nodes
+        if len(nodes_per_depth) < 2 or not nodes_per_depth[0]:
+            return 0.0
+        return (nodes_per_depth[-1] / nodes_per_depth[0]) ** (1 / (len(nodes_per_depth) - 1))
+
+    def _evaluate_position(self, position: BitBoard) -> int:
+        """
+        Evaluate a board position without terminal state.
         
-        for pattern in win_patterns:
-            a, b, c = pattern
-            cells = [board[a], board[b], board[c]]
-            
-            ai_count = sum(1 for cell in cells if cell == self.ai_symbol)
-            human_count = sum(1 for cell in cells if cell == self.human_symbol)
-            empty_count = sum(1 for cell in cells if cell is None)
-            
-            # AI has 2, opponent 0, 1 empty: very strong
-            if ai_count == 2 and human_count == 0 and empty_count == 1:
-                score += 20
-            # AI has 1, opponent 0, 2 empty: somewhat strong
-            elif ai_count == 1 and human_count == 0 and empty_count == 2:
-                score += 2
-            # Opponent has 2, AI 0, 1 empty: very weak
-            elif human_count == 2 and ai_count == 0 and empty_count == 1:
-                score -= 20
-            # Opponent has 1, AI 0, 2 empty: somewhat weak
-            elif human_count == 1 and ai_count == 0 and empty_count == 2:
-                score -= 2
-        
-        return score
+        The open local boards come from the position's running board_eval,
+        so this is O(1); captured boards count towards the final board tally.
+        """
+        meta = position.meta
+        score = position.board_eval + BOARD_WIN_SCORE * (
+            meta[X].bit_count() - meta[O].bit_count()
+        )
+        return score if self._ai == X else -score
 
     def _is_winning_move(
         self, 
@@ -376,9 +921,7 @@ class AILogic:
         symbol: PlayerSymbol
     ) -> bool:
         """Check if placing symbol at cell_idx wins this board"""
-        board_copy = board.copy()
-        board_copy[cell_idx] = symbol
-        return self._get_board_winner(board_copy) == symbol
+        return bool(THREATS[symbol_to_side(symbol)][board_code(board)] >> cell_idx & 1)
 
     def _is_blocking_move(
         self, 
@@ -387,80 +930,10 @@ class AILogic:
         symbol: PlayerSymbol
     ) -> bool:
         """Check if placing opponent's symbol at cell_idx would win"""
-        board_copy = board.copy()
-        board_copy[cell_idx] = symbol
-        return self._get_board_winner(board_copy) == symbol
+        return bool(THREATS[symbol_to_side(symbol)][board_code(board)] >> cell_idx & 1)
 
     def _get_board_winner(
         self, board: List[Optional[PlayerSymbol]]
     ) -> Optional[PlayerSymbol]:
         """Get the winner of a single 3x3 board"""
-        win_patterns = [
-            [0, 1, 2], [3, 4, 5], [6, 7, 8],
-            [0, 3, 6], [1, 4, 7], [2, 5, 8],
-            [0, 4, 8], [2, 4, 6]
-        ]
-        
-        for pattern in win_patterns:
-            a, b, c = pattern
-            if (board[a] is not None and 
-                board[a] == board[b] and 
-                board[a] == board[c]):
-                return board[a]
-        
-        if all(cell is not None for cell in board):
-            return PlayerSymbol.T  # Tie
-        
-        return None
-
-    def _get_game_winner(self, game: GameState) -> Optional[PlayerSymbol]:
-        """Determine winner of the entire super tic-tac-toe game"""
-        board_winners = []
-        for board in game.global_board:
-            winner = self._get_board_winner(board)
-            board_winners.append(winner)
-        
-        x_wins = sum(1 for w in board_winners if w == PlayerSymbol.X)
-        o_wins = sum(1 for w in board_winners if w == PlayerSymbol.O)
-        empty_boards = sum(1 for w in board_winners if w is None)
-        
-        # Check meta game winner
-        if x_wins > o_wins + empty_boards:
-            return PlayerSymbol.X
-        elif o_wins > x_wins + empty_boards:
-            return PlayerSymbol.O
-        elif empty_boards == 0:
-            if x_wins > o_wins:
-                return PlayerSymbol.X
-            elif o_wins > x_wins:
-                return PlayerSymbol.O
-            else:
-                return PlayerSymbol.T
-        
-        return None
-
-    def _get_available_moves_static(
-        self, game: GameState
-    ) -> List[Tuple[int, int]]:
-        """Get all available moves in a game state"""
-        moves = []
-        
-        if game.active_board is not None:
-            # Specific board is active
-            board = game.global_board[game.active_board]
-            for cell_idx, cell in enumerate(board):
-                if cell is None:
-                    moves.append((game.active_board, cell_idx))
-        else:
-            # Any board with space is valid
-            for board_idx, board in enumerate(game.global_board):
-                for cell_idx, cell in enumerate(board):
-                    if cell is None:
-                        moves.append((board_idx, cell_idx))
-        
-        return moves
-
-    def _copy_game(self, game: GameState) -> GameState:
-        """Create a deep copy of game state"""
-        from copy import deepcopy
-        return deepcopy(game)
+        return winner_symbol(board_code(board))
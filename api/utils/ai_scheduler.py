@@ -0,0 +1,291 @@
+"""
+Fair scheduling and admission control for AI searches.
+
+Every AI search asks the scheduler for CPU units (one per worker process
+it occupies) before it is submitted, and returns them once its workers
+have finished. At most `capacity` units run at a time, normally one per
+worker process, so the process pool never builds a hidden FIFO backlog of
+its own.
+
+Waiting searches are kept per difficulty level, and within a level per
+game in round-robin order, so one game (or one batch) with many requests
+cannot hold up the others. Between levels the request with the earliest
+virtual start time is served: its enqueue time plus PRIORITY_DELAY times
+its level's time budget. Cheap levels therefore go first, but a waiting
+hard search is not starved for longer than a fraction of its own budget.
+Batch analysis queues as its own level, with the expected run time of each
+chunk standing in for the time budget. Analysis never takes the last
+`reserved` units, so a game move arriving while a batch runs finds a free
+worker. Background work (pondering) is only served when nothing else waits.
+
+Under load, searches that waited longer than `degrade_wait` get a smaller
+budget (time and nodes scaled by degrade_wait / wait, at least
+`min_scale`), and once `max_queued` searches wait new ones are refused
+with AIOverloadedError.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional
+
+from api.utils.difficulty import DIFFICULTY_BUDGETS
+
+AI_MAX_QUEUED = int(os.getenv("AI_MAX_QUEUED", "256"))
+# Queue wait (seconds) after which a search runs with a reduced budget
+AI_DEGRADE_WAIT = float(os.getenv("AI_DEGRADE_WAIT", "0.25"))
+# Smallest share of its budget a degraded search keeps
+AI_MIN_BUDGET_SCALE = float(os.getenv("AI_MIN_BUDGET_SCALE", "0.125"))
+# Units analysis may not use, kept for game moves (when there are more than this)
+AI_RESERVED_UNITS = int(os.getenv("AI_RESERVED_UNITS", "1"))
+
+# Share of a level's time budget its requests may be overtaken by cheaper ones
+PRIORITY_DELAY = 0.25
+# Level of searches that only use idle capacity
+BACKGROUND = "background"
+# Level of stateless position analysis (see api.utils.analysis)
+ANALYSIS = "analysis"
+# Recent waits kept per level for the percentile metrics
+WAIT_SAMPLES = 256
+
+
+class AIOverloadedError(asyncio.TimeoutError):
+    """Raised when too many searches are already waiting"""
+
+
+@dataclass(frozen=True)
+class Grant:
+    """An admitted search"""
+    units: int  # Worker processes it may occupy
+    scale: float  # Share of its time and node budget it may use
+    wait: float  # Seconds it waited in the queue
+    level: str
+
+
+@dataclass
+class _Waiter:
+    key: str
+    level: str
+    units: int
+    enqueued: float
+    start_by: float
+    degrade: bool
+    future: asyncio.Future
+
+
+class _LevelStats:
+    """Admission counters and recent queue waits of one level"""
+
+    def __init__(self):
+        self.admitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.degraded = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.recent_waits: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+
+    def to_dict(self, queued: int) -> dict:
+        waits = sorted(self.recent_waits)
+        p95 = waits[min(len(waits), math.ceil(len(waits) * 0.95)) - 1] if waits else 0.0
+        return {
+            "queued": queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "degraded": self.degraded,
+            "avg_wait_ms": round(self.wait_total / self.admitted * 1000, 2)
+            if self.admitted else 0,
+            "p95_wait_ms": round(p95 * 1000, 2),
+            "max_wait_ms": round(self.wait_max * 1000, 2),
+        }
+
+
+class AIScheduler:
+    """Grants CPU units to AI searches fairly, with admission control"""
+
+    def __init__(
+        self,
+        capacity: int,
+        max_queued: int = AI_MAX_QUEUED,
+        degrade_wait: float = AI_DEGRADE_WAIT,
+        min_scale: float = AI_MIN_BUDGET_SCALE,
+        reserved: int = AI_RESERVED_UNITS,
+    ):
+        """
+        Args:
+            capacity: Units that may run at once (worker processes)
+            max_queued: Waiting searches beyond which new ones are refused
+            degrade_wait: Queue wait in seconds after which budgets shrink
+            min_scale: Smallest budget share of a degraded search
+            reserved: Units analysis may not use; with a single unit
+                analysis shares it
+        """
+        self.capacity = max(1, capacity)
+        self.max_queued = max(0, max_queued)
+        self.degrade_wait = degrade_wait
+        self.min_scale = min_scale
+        self.analysis_capacity = self.capacity - min(max(0, reserved), self.capacity - 1)
+        self.running = 0
+        self.analysis_running = 0
+        self.queued = 0
+        # level -> game key -> waiters; games are served in round-robin order
+        self._queues: Dict[str, "OrderedDict[str, Deque[_Waiter]]"] = {}
+        self._stats: Dict[str, _LevelStats] = {}
+
+    def _priority_delay(self, level: str, max_time: Optional[float]) -> float:
+        if level == BACKGROUND:
+            return math.inf
+        if max_time is None:
+            budget = DIFFICULTY_BUDGETS.get(level)
+            max_time = budget.max_time if budget is not None else 0.0
+        return max_time * PRIORITY_DELAY
+
+    def _level_stats(self, level: str) -> _LevelStats:
+        stats = self._stats.get(level)
+        if stats is None:
+            stats = self._stats[level] = _LevelStats()
+        return stats
+
+    def has_idle_capacity(self) -> bool:
+        """True when nothing waits and a unit is free"""
+        return not self.queued and self.running < self.capacity
+
+    def _free_units(self, level: str) -> int:
+        """Units a search of the level could be granted now"""
+        free = self.capacity - self.running
+        if level == ANALYSIS:
+            free = min(free, self.analysis_capacity - self.analysis_running)
+        return free
+
+    async def acquire(
+        self,
+        key: str,
+        level: str,
+        units: int = 1,
+        timeout: Optional[float] = None,
+        max_time: Optional[float] = None,
+        degrade: bool = True,
+    ) -> Grant:
+        """
+        Wait for CPU units; return them with release() when the search is done.
+
+        Args:
+            key: Game (or batch) the search belongs to, for round-robin fairness
+            level: Difficulty level, or BACKGROUND
+            units: Worker processes the search would like; fewer may be granted
+            timeout: Seconds to wait at most
+            max_time: Expected run time, for the priority; the level's
+                time budget by default
+            degrade: Allow a smaller budget after a long wait
+
+        Raises:
+            AIOverloadedError: The queue is full
+            asyncio.TimeoutError: No units before the timeout
+        """
+        stats = self._level_stats(level)
+        now = time.monotonic()
+        # Waiters are admitted as soon as they can run, so any left waiting
+        # are analyses at their share; they cannot use a free unit either
+        if self._free_units(level) > 0:
+            return self._grant(level, units, now, now, degrade)
+        if self.queued >= self.max_queued:
+            stats.rejected += 1
+            raise AIOverloadedError(f"{self.queued} AI searches already waiting")
+
+        waiter = _Waiter(
+            key, level, units, now, now + self._priority_delay(level, max_time), degrade,
+            asyncio.get_running_loop().create_future(),
+        )
+        self._queues.setdefault(level, OrderedDict()).setdefault(key, deque()).append(waiter)
+        self.queued += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done():
+                # Granted just as the wait ended: hand the units back
+                grant = waiter.future.result()
+                self.release(grant.units, grant.level)
+            else:
+                waiter.future.cancel()
+                self._remove(waiter)
+                if isinstance(e, asyncio.TimeoutError):
+                    stats.timeouts += 1
+            raise
+
+    def release(self, units: int, level: Optional[str] = None) -> None:
+        """Return a grant's units (and level) and admit waiting searches"""
+        self.running -= units
+        if level == ANALYSIS:
+            self.analysis_running -= units
+        self._dispatch()
+
+    def _remove(self, waiter: _Waiter) -> None:
+        games = self._queues[waiter.level]
+        waiters = games[waiter.key]
+        waiters.remove(waiter)
+        if not waiters:
+            del games[waiter.key]
+        self.queued -= 1
+
+    def _dispatch(self) -> None:
+        """Grant units to waiting searches while capacity is free"""
+        while self.queued and self.running < self.capacity:
+            # Head of each level is the first waiter of its next game in turn
+            heads = [
+                next(iter(games.values()))[0]
+                for level, games in self._queues.items()
+                if games and self._free_units(level) > 0
+            ]
+            if not heads:
+                break  # Only analysis waits, at its share of the units
+            waiter = min(heads, key=lambda w: w.start_by)
+            self._remove(waiter)
+            games = self._queues[waiter.level]
+            if waiter.key in games:
+                games.move_to_end(waiter.key)
+            waiter.future.set_result(
+                self._grant(
+                    waiter.level, waiter.units, waiter.enqueued, time.monotonic(), waiter.degrade
+                )
+            )
+
+    def _grant(
+        self, level: str, units: int, enqueued: float, now: float, degrade: bool
+    ) -> Grant:
+        """Take units for a search and size its budget by how long it waited"""
+        units = max(1, min(units, self._free_units(level)))
+        self.running += units
+        if level == ANALYSIS:
+            self.analysis_running += units
+        wait = now - enqueued
+        scale = 1.0
+        if degrade and level != BACKGROUND and wait > self.degrade_wait:
+            scale = max(self.min_scale, self.degrade_wait / wait)
+
+        stats = self._level_stats(level)
+        stats.admitted += 1
+        stats.wait_total += wait
+        stats.wait_max = max(stats.wait_max, wait)
+        stats.recent_waits.append(wait)
+        if scale < 1.0:
+            stats.degraded += 1
+        return Grant(units, scale, wait, level)
+
+    def get_stats(self) -> dict:
+        """Get queue depth, admission and wait-time statistics per level"""
+        return {
+            "capacity": self.capacity,
+            "analysis_capacity": self.analysis_capacity,
+            "running": self.running,
+            "analysis_running": self.analysis_running,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "levels": {
+                level: stats.to_dict(sum(len(w) for w in self._queues.get(level, {}).values()))
+                for level, stats in self._stats.items()
+            },
+        }
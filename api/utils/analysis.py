@@ -0,0 +1,175 @@
+"""
+Stateless position analysis.
+
+A position is an 81-character cell string (see BitBoard.to_string), the
+board to play in and the side to move. Analysis runs the plain search
+(no book, no shortcuts, no sampling) to a node, depth and time budget and
+reports the best move, its score for the side to move, the principal
+variation and search statistics.
+
+A game's position can also be analyzed as a stream: each completed depth
+is reported as soon as it is searched (see AIExecutor.analyze_stream).
+
+Results are cached by canonical position (see BitBoard.canonical_key)
+with moves in the canonical frame, so the 8 rotations and reflections of
+a position share one entry. Moves are mapped back to the frame of each
+request, and the principal variation is cut where a mapped move is not
+legal (the "first open board" redirect is not symmetric).
+"""
+
+import os
+import time
+from typing import List, Optional
+
+from api.utils.ai_logic import AILogic
+from api.utils.bitboard import SYMMETRY_INVERSE, BitBoard, side_to_symbol, transform_move
+from api.utils.transposition import TranspositionTable
+
+# Positions one request may analyze
+AI_ANALYSIS_MAX_POSITIONS = int(os.getenv("AI_ANALYSIS_MAX_POSITIONS", "1000"))
+# Default and largest node budget per position
+AI_ANALYSIS_NODES = int(os.getenv("AI_ANALYSIS_NODES", "20000"))
+AI_ANALYSIS_MAX_NODES = int(os.getenv("AI_ANALYSIS_MAX_NODES", "1000000"))
+# Default and deepest iteration per position
+ANALYSIS_DEPTH = 8
+ANALYSIS_MAX_DEPTH = 32
+# Default and largest time budget per position, seconds
+ANALYSIS_TIME_LIMIT = 1.0
+ANALYSIS_MAX_TIME_LIMIT = 10.0
+# Default time budget of a streamed analysis (see AIExecutor.analyze_stream)
+STREAM_TIME_LIMIT = 5.0
+# Most positions searched per worker task
+AI_ANALYSIS_CHUNK = int(os.getenv("AI_ANALYSIS_CHUNK", "8"))
+# Expected seconds of one worker task; chunks of slow positions are smaller
+AI_ANALYSIS_CHUNK_SECONDS = float(os.getenv("AI_ANALYSIS_CHUNK_SECONDS", "0.5"))
+# Nodes per second assumed for a position until analyses have been timed
+ANALYSIS_NPS = 100000
+# Entries of the table each position is searched with
+TABLE_ENTRIES = 1 << 16
+
+
+def analyze_position(
+    position: BitBoard,
+    max_nodes: int = AI_ANALYSIS_NODES,
+    max_depth: int = ANALYSIS_DEPTH,
+    time_limit: float = ANALYSIS_TIME_LIMIT,
+    table: Optional[TranspositionTable] = None,
+) -> dict:
+    """
+    Search a position for the side to move.
+
+    Args:
+        table: Table to search with; it is cleared first, so results do
+            not depend on earlier positions
+
+    Returns:
+        move, score (side to move), pv (encoded moves), depth, nodes and
+        time_ms; an "error" instead when the game is already decided
+    """
+    if position.result() is not None:
+        return {"error": "Game is already decided"}
+    if table is None:
+        table = TranspositionTable(TABLE_ENTRIES)
+    else:
+        table.clear()
+
+    ai = AILogic(
+        difficulty="hard",
+        max_time=time_limit,
+        transposition_table=table,
+        max_depth=max_depth,
+        max_nodes=max_nodes,
+        ai_symbol=side_to_symbol(position.side),
+    )
+    started = time.perf_counter()
+    iterations = ai.search_root(position, position.legal_moves())
+    depth, move, score = iterations[-1]
+    pv = ai.principal_variation(position, move, depth + 1)
+    elapsed = time.perf_counter() - started
+    stats = ai.get_search_stats()
+    return {
+        "move": move,
+        "score": score,
+        "pv": pv,
+        "depth": depth,
+        "nodes": stats["nodes"],
+        "time_ms": round(elapsed * 1000, 2),
+    }
+
+
+def analyze_positions(
+    items: List[tuple], max_nodes: int, max_depth: int, time_limit: float
+) -> List[dict]:
+    """
+    Analyze (cells, active_board, side) items with one reused table.
+
+    Runs inside an AI worker process (see AIExecutor.analyze).
+    """
+    table = TranspositionTable(TABLE_ENTRIES)
+    return [
+        analyze_position(
+            BitBoard.from_string(cells, active_board, side), max_nodes, max_depth,
+            time_limit, table,
+        )
+        for cells, active_board, side in items
+    ]
+
+
+def cache_key(
+    position: BitBoard, max_nodes: int, max_depth: int, time_limit: float
+) -> tuple:
+    """
+    Analysis cache key of a position and budget.
+
+    Returns:
+        (cache key, symmetry mapping the position onto its canonical image)
+    """
+    key, symmetry = position.canonical_key()
+    return f"analysis:{key:016x}:{max_nodes}:{max_depth}:{time_limit}", symmetry
+
+
+def to_canonical(result: dict, symmetry: int) -> dict:
+    """A result with its moves in the canonical frame, for the cache"""
+    if "error" in result:
+        return result
+    return {
+        **result,
+        "move": transform_move(result["move"], symmetry),
+        "pv": [transform_move(move, symmetry) for move in result["pv"]],
+    }
+
+
+def from_canonical(result: dict, symmetry: int, position: BitBoard) -> dict:
+    """
+    A cached result with its moves mapped back onto position.
+
+    The line is replayed and cut at the first move that is not legal here.
+    """
+    if "error" in result:
+        return result
+    inverse = SYMMETRY_INVERSE[symmetry]
+    pv = []
+    replay = position.copy()
+    for move in result["pv"]:
+        move = transform_move(move, inverse)
+        if replay.winner() is not None or move not in replay.legal_moves():
+            break
+        pv.append(move)
+        replay.play(move)
+    return {**result, "move": transform_move(result["move"], inverse), "pv": pv}
+
+
+def format_result(result: dict, cached: bool = False) -> dict:
+    """Result with moves as [board_index, cell_index] pairs, for the API"""
+    if "error" in result:
+        return {"error": result["error"], "cached": cached}
+    return {
+        "best_move": list(divmod(result["move"], 9)),
+        "score": result["score"],
+        "pv": [list(divmod(move, 9)) for move in result["pv"]],
+        "depth": result["depth"],
+        "nodes": result["nodes"],
+        "time_ms": result["time_ms"],
+        "nps": round(result["nodes"] / result["time_ms"] * 1000) if result["time_ms"] else 0,
+        "cached": cached,
+    }
@@ -0,0 +1,318 @@
+"""
+Self-play arena for measuring AI strength against its cost.
+
+Engine configurations (a difficulty plus optional time, node, depth and
+quiescence overrides) play each other over many games in a process pool. Every pair
+of engines plays each randomized opening twice with colors swapped, so
+neither the opening nor the first move favors one side. Games are played
+on BitBoard, which holds the same rules GameService.make_move applies;
+each AI move goes through AILogic.get_next_move as in production, with a
+transposition table and principal variation kept per side between moves
+like the per-game engines of the server.
+
+Results go to a compact JSON-lines log (one game per line: engines,
+result, moves and per-move think time) and are summarized as Elo
+differences with 95% confidence intervals.
+
+Run with:
+    python -m api.utils.arena --engine fast=hard:time=0.05 \\
+        --engine slow=hard:time=0.2 --games 1000 --log arena.jsonl
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from api.models.game import GameMode, GameState, PlayerSymbol
+from api.utils.ai_logic import AILogic
+from api.utils.bitboard import ANY_BOARD, X, BitBoard, side_to_symbol
+from api.utils.difficulty import normalize_difficulty
+from api.utils.transposition import TranspositionTable
+
+# Random plies played before the engines take over
+OPENING_PLIES = 4
+# Per-side table carried between moves, as the server's game engines do
+TABLE_ENTRIES = 1 << 16
+# Two-sided 95% normal quantile
+Z_95 = 1.96
+
+
+@dataclass(frozen=True)
+class EngineConfig:
+    """An AILogic configuration entered in the arena"""
+    name: str
+    difficulty: str = "hard"
+    max_time: Optional[float] = None
+    max_nodes: Optional[int] = None
+    max_depth: Optional[int] = None
+    quiescence_nodes: Optional[int] = None
+
+    @classmethod
+    def parse(cls, spec: str) -> "EngineConfig":
+        """
+        Parse ``name=difficulty[:time=S][:nodes=N][:depth=D][:qnodes=Q]``.
+
+        Raises:
+            ValueError: Malformed spec
+        """
+        name, _, rest = spec.partition("=")
+        difficulty, *options = rest.split(":") if rest else ["hard"]
+        values = {}
+        keys = {"time": ("max_time", float), "nodes": ("max_nodes", int),
+                "depth": ("max_depth", int), "qnodes": ("quiescence_nodes", int)}
+        for option in options:
+            key, _, value = option.partition("=")
+            if key not in keys:
+                raise ValueError(f"Unknown engine option {key!r} in {spec!r}")
+            attribute, convert = keys[key]
+            values[attribute] = convert(value)
+        if not name:
+            raise ValueError(f"Engine spec {spec!r} has no name")
+        return cls(name, normalize_difficulty(difficulty or "hard"), **values)
+
+
+@dataclass
+class GameRecord:
+    """Outcome of one arena game"""
+    x: str
+    o: str
+    opening: List[int]
+    moves: List[int] = field(default_factory=list)
+    # Think time per engine move, milliseconds
+    times_ms: List[float] = field(default_factory=list)
+    result: Optional[str] = None  # "X", "O" or "T"
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "x": self.x, "o": self.o, "result": self.result,
+            "opening": len(self.opening),
+            "moves": "".join(f"{move:02d}" for move in self.opening + self.moves),
+            "times_ms": [round(t, 1) for t in self.times_ms],
+        }, separators=(",", ":"))
+
+
+def random_opening(rng: random.Random, plies: int = OPENING_PLIES) -> List[int]:
+    """Random legal moves from the empty board (game still open afterwards)"""
+    while True:
+        position = BitBoard()
+        moves = []
+        for _ in range(plies):
+            move = rng.choice(position.legal_moves())
+            position.play(move)
+            moves.append(move)
+        if position.result() is None:
+            return moves
+
+
+def play_game(x: EngineConfig, o: EngineConfig, opening: List[int], seed: int) -> GameRecord:
+    """Play one game between two engines from an opening (runs in a worker)"""
+    random.seed(seed)  # Noisy levels sample their moves
+    position = BitBoard()
+    for move in opening:
+        position.play(move)
+    record = GameRecord(x=x.name, o=o.name, opening=list(opening))
+
+    engines = {X: x, X ^ 1: o}
+    tables = {side: TranspositionTable(TABLE_ENTRIES) for side in engines}
+    pvs: Dict[int, List[int]] = {side: [] for side in engines}
+    move_count = len(opening)
+
+    while position.result() is None:
+        side = position.side
+        config = engines[side]
+        game = GameState(
+            id="arena",
+            mode=GameMode.AI,
+            ai_difficulty=config.difficulty,
+            global_board=position.to_global_board(),
+            active_board=None if position.active == ANY_BOARD else position.active,
+            current_player=side_to_symbol(side),
+            move_count=move_count,
+        )
+        ai = AILogic(
+            difficulty=config.difficulty,
+            max_time=config.max_time,
+            transposition_table=tables[side],
+            max_depth=config.max_depth,
+            previous_pv=pvs[side],
+            max_nodes=config.max_nodes,
+            ai_symbol=side_to_symbol(side),
+            **({} if config.quiescence_nodes is None
+               else {"quiescence_nodes": config.quiescence_nodes}),
+        )
+        available_moves = [divmod(move, 9) for move in position.legal_moves()]
+        started = time.perf_counter()
+        board_idx, cell_idx = ai.get_next_move(game, available_moves)
+        record.times_ms.append((time.perf_counter() - started) * 1000)
+        pvs[side] = ai.last_pv
+
+        move = board_idx * 9 + cell_idx
+        position.play(move)
+        record.moves.append(move)
+        move_count += 1
+
+    record.result = side_to_symbol(position.result()).value
+    return record
+
+
+def _play_game_task(args: Tuple[EngineConfig, EngineConfig, List[int], int]) -> GameRecord:
+    return play_game(*args)
+
+
+def schedule_games(
+    engines: List[EngineConfig], games: int, opening_plies: int, seed: int
+) -> List[Tuple[EngineConfig, EngineConfig, List[int], int]]:
+    """
+    Game list for a round robin: each pair plays every opening with both colors.
+
+    Args:
+        games: Games per pair of engines (rounded up to an even number)
+    """
+    rng = random.Random(seed)
+    tasks = []
+    for first, second in itertools.combinations(engines, 2):
+        for _ in range((games + 1) // 2):
+            opening = random_opening(rng, opening_plies)
+            tasks.append((first, second, opening, rng.getrandbits(32)))
+            tasks.append((second, first, opening, rng.getrandbits(32)))
+    return tasks
+
+
+def run_arena(
+    engines: List[EngineConfig],
+    games: int,
+    workers: int = 1,
+    opening_plies: int = OPENING_PLIES,
+    seed: int = 0,
+    log_path: Optional[str] = None,
+) -> List[GameRecord]:
+    """
+    Play the round robin, in a process pool when workers > 1.
+
+    Args:
+        log_path: JSON-lines file the games are appended to as they finish
+    """
+    tasks = schedule_games(engines, games, opening_plies, seed)
+    log = open(log_path, "a") if log_path else None
+    records = []
+    try:
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = pool.map(_play_game_task, tasks, chunksize=4)
+                for record in results:
+                    records.append(record)
+                    if log:
+                        log.write(record.to_json() + "\n")
+        else:
+            for task in tasks:
+                record = play_game(*task)
+                records.append(record)
+                if log:
+                    log.write(record.to_json() + "\n")
+    finally:
+        if log:
+            log.close()
+    return records
+
+
+def elo_difference(score: float) -> float:
+    """Elo difference matching an expected score (clamped away from 0 and 1)"""
+    score = min(max(score, 1e-3), 1 - 1e-3)
+    return -400 * math.log10(1 / score - 1)
+
+
+def summarize(records: List[GameRecord], first: str, second: str) -> dict:
+    """
+    Head-to-head result of two engines with a 95% confidence interval.
+
+    Returns:
+        wins/draws/losses and Elo of `first` relative to `second`
+    """
+    points = []
+    for record in records:
+        if {record.x, record.o} != {first, second}:
+            continue
+        if record.result == PlayerSymbol.T.value:
+            points.append(0.5)
+        else:
+            winner = record.x if record.result == PlayerSymbol.X.value else record.o
+            points.append(1.0 if winner == first else 0.0)
+    if not points:
+        return {"games": 0}
+
+    n = len(points)
+    score = sum(points) / n
+    variance = sum((p - score) ** 2 for p in points) / n
+    margin = Z_95 * math.sqrt(variance / n)
+    return {
+        "games": n,
+        "wins": points.count(1.0),
+        "draws": points.count(0.5),
+        "losses": points.count(0.0),
+        "score": round(score, 4),
+        "elo": round(elo_difference(score), 1),
+        "elo_low": round(elo_difference(score - margin), 1),
+        "elo_high": round(elo_difference(score + margin), 1),
+    }
+
+
+def timing_summary(records: List[GameRecord]) -> Dict[str, dict]:
+    """Think time per engine move: mean and 95th percentile"""
+    times: Dict[str, List[float]] = {}
+    for record in records:
+        for index, ms in enumerate(record.times_ms):
+            # Opening plies are random; engine moves alternate from there
+            side = (len(record.opening) + index) % 2
+            times.setdefault(record.x if side == X else record.o, []).append(ms)
+    summary = {}
+    for name, values in times.items():
+        values.sort()
+        summary[name] = {
+            "moves": len(values),
+            "mean_ms": round(sum(values) / len(values), 2),
+            "p95_ms": round(values[min(len(values), math.ceil(len(values) * 0.95)) - 1], 2),
+        }
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Self-play arena for AI configurations")
+    parser.add_argument("--engine", action="append", required=True,
+                        help="name=difficulty[:time=S][:nodes=N][:depth=D]; give two or more")
+    parser.add_argument("--games", type=int, default=100, help="games per pair of engines")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--opening-plies", type=int, default=OPENING_PLIES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log", help="append games to this JSON-lines file")
+    args = parser.parse_args()
+
+    engines = [EngineConfig.parse(spec) for spec in args.engine]
+    if len(engines) < 2 or len({engine.name for engine in engines}) != len(engines):
+        parser.error("give at least two engines with distinct names")
+
+    started = time.time()
+    records = run_arena(engines, args.games, args.workers, args.opening_plies,
+                        args.seed, args.log)
+    print(f"{len(records)} games in {time.time() - started:.1f}s")
+
+    for first, second in itertools.combinations(engines, 2):
+        result = summarize(records, first.name, second.name)
+        print(
+            f"{first.name} vs {second.name}: +{result['wins']} ={result['draws']} "
+            f"-{result['losses']}  Elo {result['elo']:+.1f} "
+            f"[{result['elo_low']:+.1f}, {result['elo_high']:+.1f}]"
+        )
+    for name, timing in timing_summary(records).items():
+        print(f"{name}: {timing['moves']} moves, mean {timing['mean_ms']} ms, "
+              f"p95 {timing['p95_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Search benchmark over a fixed corpus of positions.
+
+Every position of the corpus is searched to a fixed depth with a fresh
+transposition table and no node or time limit, so node counts and chosen
+moves are deterministic and any engine change can be measured on the same
+positions. The report has nodes, nodes per second, time to each depth,
+transposition table hit rate, effective branching factor and the chosen
+move per position, and is compared against a saved baseline:
+- more nodes than the baseline by MAX_NODE_INCREASE is a regression
+- total nodes per second below the baseline by MAX_NPS_DROP is a regression
+- a different move or score is reported, but is not a regression
+
+Corpus format (one position per line, '#' starts a comment):
+    name depth active cells
+with active a board index or '-' for a free move and cells the 81-character
+string of BitBoard.to_string. The AI (O) is to move in every position.
+
+Run with:
+    python -m api.utils.benchmark
+    python -m api.utils.benchmark --save-baseline
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from api.utils.ai_logic import AILogic
+from api.utils.bitboard import BitBoard, O
+from api.utils.transposition import TranspositionTable
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+DEFAULT_CORPUS_PATH = os.path.join(DATA_DIR, "benchmark_positions.txt")
+DEFAULT_BASELINE_PATH = os.path.join(DATA_DIR, "benchmark_baseline.json")
+
+# Fixed-depth node counts are deterministic, so the node threshold is tight
+MAX_NODE_INCREASE = 0.10
+# Speed depends on the machine and its load
+MAX_NPS_DROP = 0.25
+# Entries of the table each position is searched with
+TABLE_ENTRIES = 1 << 20
+
+
+@dataclass
+class BenchmarkPosition:
+    """One corpus position"""
+    name: str
+    depth: int
+    active_board: Optional[int]
+    cells: str
+
+    def to_bitboard(self) -> BitBoard:
+        return BitBoard.from_string(self.cells, self.active_board, side=O)
+
+
+def load_corpus(path: str = DEFAULT_CORPUS_PATH) -> List[BenchmarkPosition]:
+    """Read the corpus file"""
+    positions = []
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            try:
+                name, depth, active, cells = line.split()
+                positions.append(BenchmarkPosition(
+                    name, int(depth), None if active == "-" else int(active), cells
+                ))
+            except ValueError as e:
+                raise ValueError(f"{path}:{line_number}: malformed position ({e})")
+    return positions
+
+
+def run_position(position: BenchmarkPosition) -> dict:
+    """Search one position to its fixed depth and collect its statistics"""
+    bitboard = position.to_bitboard()
+    ai = AILogic(
+        difficulty="hard",
+        max_time=float("inf"),
+        transposition_table=TranspositionTable(TABLE_ENTRIES),
+        max_depth=position.depth,
+        max_nodes=float("inf"),
+    )
+    started = time.perf_counter()
+    iterations = ai.search_root(bitboard, bitboard.legal_moves())
+    elapsed = time.perf_counter() - started
+    depth, move, score = iterations[-1]
+    stats = ai.get_search_stats()
+
+    return {
+        "name": position.name,
+        "depth": depth,
+        "move": move,
+        "score": score,
+        "nodes": stats["nodes"],
+        "time_ms": round(elapsed * 1000, 2),
+        "nps": round(stats["nodes"] / elapsed) if elapsed else 0,
+        "tt_hit_rate": stats["tt_hit_rate"],
+        "branching_factor": stats["branching_factor"],
+        "time_to_depth_ms": {
+            str(iteration["depth"]): iteration["time_ms"] for iteration in stats["iterations"]
+        },
+    }
+
+
+def run_benchmark(positions: List[BenchmarkPosition]) -> dict:
+    """Run every corpus position and total the results"""
+    results = [run_position(position) for position in positions]
+    nodes = sum(result["nodes"] for result in results)
+    time_ms = sum(result["time_ms"] for result in results)
+    return {
+        "positions": results,
+        "total": {
+            "nodes": nodes,
+            "time_ms": round(time_ms, 2),
+            "nps": round(nodes / time_ms * 1000) if time_ms else 0,
+        },
+    }
+
+
+def compare(
+    report: dict,
+    baseline: dict,
+    max_node_increase: float = MAX_NODE_INCREASE,
+    max_nps_drop: float = MAX_NPS_DROP,
+) -> Tuple[List[str], List[str]]:
+    """
+    Compare a report with a baseline.
+
+    Returns:
+        (regressions, changes): threshold violations, and moves or scores
+        that differ from the baseline
+    """
+    regressions = []
+    changes = []
+    previous = {result["name"]: result for result in baseline["positions"]}
+    for result in report["positions"]:
+        old = previous.get(result["name"])
+        if old is None:
+            changes.append(f"{result['name']}: not in baseline")
+            continue
+        if old["depth"] != result["depth"]:
+            changes.append(f"{result['name']}: depth {old['depth']} -> {result['depth']}")
+            continue
+        if result["nodes"] > old["nodes"] * (1 + max_node_increase):
+            regressions.append(
+                f"{result['name']}: {result['nodes']} nodes, baseline {old['nodes']}"
+            )
+        if (result["move"], result["score"]) != (old["move"], old["score"]):
+            changes.append(
+                f"{result['name']}: move {old['move']} ({old['score']}) -> "
+                f"{result['move']} ({result['score']})"
+            )
+
+    nps, old_nps = report["total"]["nps"], baseline["total"]["nps"]
+    if nps < old_nps * (1 - max_nps_drop):
+        regressions.append(f"total: {nps} nodes/s, baseline {old_nps}")
+    return regressions, changes
+
+
+def format_report(report: dict, baseline: Optional[dict] = None) -> str:
+    """Render a report as a table, with node deltas against the baseline"""
+    previous = {r["name"]: r for r in baseline["positions"]} if baseline else {}
+    lines = [
+        f"{'position':<16}{'depth':>6}{'move':>6}{'score':>8}{'nodes':>10}"
+        f"{'delta':>9}{'ms':>10}{'knps':>7}{'tt hit%':>9}{'ebf':>6}"
+    ]
+    for r in report["positions"]:
+        old = previous.get(r["name"])
+        delta = f"{(r['nodes'] / old['nodes'] - 1) * 100:+.1f}%" if old and old["nodes"] else "-"
+        lines.append(
+            f"{r['name']:<16}{r['depth']:>6}{r['move']:>6}{r['score']:>8}{r['nodes']:>10}"
+            f"{delta:>9}{r['time_ms']:>10.1f}{r['nps'] / 1000:>7.0f}"
+            f"{r['tt_hit_rate']:>9.1f}{r['branching_factor']:>6.2f}"
+        )
+    total = report["total"]
+    lines.append(
+        f"{'total':<16}{'':>6}{'':>6}{'':>8}{total['nodes']:>10}{'':>9}"
+        f"{total['time_ms']:>10.1f}{total['nps'] / 1000:>7.0f}"
+    )
+    if baseline:
+        lines.append(f"baseline: {baseline['total']['nodes']} nodes, "
+                     f"{baseline['total']['nps'] / 1000:.0f} knps")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the AI search on a fixed corpus")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_PATH)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="write this run as the new baseline")
+    parser.add_argument("--max-node-increase", type=float, default=MAX_NODE_INCREASE)
+    parser.add_argument("--max-nps-drop", type=float, default=MAX_NPS_DROP)
+    parser.add_argument("--json", action="store_true", help="print the raw report")
+    args = parser.parse_args()
+
+    report = run_benchmark(load_corpus(args.corpus))
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print(json.dumps(report, indent=2) if args.json else format_report(report, baseline))
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Wrote baseline to {args.baseline}")
+        return
+    if baseline is None:
+        print("No baseline to compare with; record one with --save-baseline")
+        return
+
+    regressions, changes = compare(report, baseline, args.max_node_increase, args.max_nps_drop)
+    for change in changes:
+        print(f"changed: {change}")
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,522 @@
+"""
+Compact bitboard position and the game rules on it.
+
+Each local board is stored as one 9-bit mask per player (bit i = cell i),
+and the meta-board as one 9-bit mask of boards won per player plus a mask
+of decided (won or full) boards. Moves are encoded as a single int
+``board_index * 9 + cell_index`` so the search never touches pydantic
+models or PlayerSymbol enums.
+
+This module is the single implementation of the rules: legal moves,
+board capture, the next active board and the game result. The AI search
+plays on BitBoard directly and GameService.make_move applies moves
+through it (see api.utils.game_logic.apply_move).
+"""
+
+import random
+from typing import List, Optional, Tuple
+
+from api.models.game import GameState, PlayerSymbol
+from api.utils.board_tables import EVAL, O, TERNARY, TIE, WIN_LINES, X
+
+ANY_BOARD = -1
+FULL_BOARD = 0x1FF
+
+# WINNING_MASK[m] is True when mask m contains a complete line
+WINNING_MASK = tuple(
+    any((mask & line) == line for line in WIN_LINES) for mask in range(512)
+)
+
+# MASK_BITS[m] lists the set cell indexes of mask m in ascending order
+MASK_BITS = tuple(
+    tuple(i for i in range(9) if mask >> i & 1) for mask in range(512)
+)
+
+SIDE_TO_SYMBOL = (PlayerSymbol.X, PlayerSymbol.O, PlayerSymbol.T)
+
+# SIDE_TERNARY[side][mask] is that side's share of a board's base-3 code,
+# so a board's code is SIDE_TERNARY[X][x_mask] + SIDE_TERNARY[O][o_mask]
+SIDE_TERNARY = (TERNARY, tuple(2 * code for code in TERNARY))
+
+
+def _build_symmetries():
+    """Cell permutations of the 8 rotations and reflections of a 3x3 grid"""
+    transforms = (
+        lambda r, c: (r, c),          # identity
+        lambda r, c: (c, 2 - r),      # rotate 90
+        lambda r, c: (2 - r, 2 - c),  # rotate 180
+        lambda r, c: (2 - c, r),      # rotate 270
+        lambda r, c: (r, 2 - c),      # mirror left-right
+        lambda r, c: (2 - r, c),      # mirror top-bottom
+        lambda r, c: (c, r),          # main diagonal
+        lambda r, c: (2 - c, 2 - r),  # anti-diagonal
+    )
+    perms = []
+    for transform in transforms:
+        perm = [0] * 9
+        for cell in range(9):
+            row, col = transform(*divmod(cell, 3))
+            perm[cell] = row * 3 + col
+        perms.append(tuple(perm))
+    inverse = tuple(
+        next(j for j, other in enumerate(perms) if all(other[p[i]] == i for i in range(9)))
+        for p in perms
+    )
+    masks = tuple(
+        tuple(sum(1 << perm[i] for i in MASK_BITS[mask]) for mask in range(512))
+        for perm in perms
+    )
+    return tuple(perms), inverse, masks
+
+
+# SYMMETRY_CELLS[s][i]: where transform s sends cell (or board) i;
+# SYMMETRY_INVERSE[s] undoes s; SYMMETRY_MASKS[s][m] is mask m transformed
+SYMMETRY_CELLS, SYMMETRY_INVERSE, SYMMETRY_MASKS = _build_symmetries()
+
+
+def transform_move(move: int, symmetry: int) -> int:
+    """Apply a symmetry to an encoded move (board and cell move together)"""
+    board_idx, cell_idx = divmod(move, 9)
+    cells = SYMMETRY_CELLS[symmetry]
+    return cells[board_idx] * 9 + cells[cell_idx]
+
+
+def _build_zobrist_tables():
+    """Fixed-seed 64-bit Zobrist keys so hashes are stable across processes"""
+    rng = random.Random(0x5EED_7AC7)
+    cell_keys = [
+        [[rng.getrandbits(64) for _ in range(9)] for _ in range(9)]
+        for _ in range(2)
+    ]
+    # Pre-XOR the cell keys of every possible mask so that replacing a
+    # whole board (as a capture does) costs one lookup per player
+    board_keys = []
+    for player in range(2):
+        per_board = []
+        for board_idx in range(9):
+            keys = [0] * 512
+            for mask in range(1, 512):
+                low = mask & -mask
+                keys[mask] = keys[mask ^ low] ^ cell_keys[player][board_idx][low.bit_length() - 1]
+            per_board.append(tuple(keys))
+        board_keys.append(tuple(per_board))
+    side_key = rng.getrandbits(64)
+    # Indexed by active board + 1 so ANY_BOARD maps to slot 0
+    active_keys = tuple(rng.getrandbits(64) for _ in range(10))
+    return tuple(board_keys), side_key, active_keys
+
+
+# ZOBRIST_BOARD[player][board][mask], ZOBRIST_SIDE (O to move), ZOBRIST_ACTIVE[active + 1]
+ZOBRIST_BOARD, ZOBRIST_SIDE, ZOBRIST_ACTIVE = _build_zobrist_tables()
+
+
+def _build_symmetry_zobrist_tables():
+    """Zobrist tables of each symmetric image, indexed by the untransformed board and mask"""
+    board_keys = tuple(
+        tuple(
+            tuple(
+                ZOBRIST_BOARD[player][SYMMETRY_CELLS[symmetry][board_idx]][
+                    SYMMETRY_MASKS[symmetry][mask]
+                ]
+                for mask in range(512)
+            )
+            for board_idx in range(9)
+        )
+        for player in range(2)
+        for symmetry in range(8)
+    )
+    board_keys = tuple((board_keys[s], board_keys[8 + s]) for s in range(8))
+    active_keys = tuple(
+        (ZOBRIST_ACTIVE[0],) + tuple(ZOBRIST_ACTIVE[cells[board_idx] + 1] for board_idx in range(9))
+        for cells in SYMMETRY_CELLS
+    )
+    return board_keys, active_keys
+
+
+# SYMMETRY_ZOBRIST_BOARD[s][player][board][mask] is the key that board's mask
+# contributes to image s, and SYMMETRY_ZOBRIST_ACTIVE[s][active + 1] likewise,
+# so the key of an image costs one lookup per occupied board and player
+SYMMETRY_ZOBRIST_BOARD, SYMMETRY_ZOBRIST_ACTIVE = _build_symmetry_zobrist_tables()
+
+
+def next_active_board(cell_idx: int, closed: int) -> int:
+    """
+    Board the opponent must play in after a move to cell_idx.
+
+    That is the board matching the cell, or the first open board by index
+    if that one is decided; ANY_BOARD once every board is decided.
+    """
+    open_boards = FULL_BOARD & ~closed
+    if not open_boards:
+        return ANY_BOARD
+    if open_boards >> cell_idx & 1:
+        return cell_idx
+    return MASK_BITS[open_boards][0]
+
+
+def game_result(meta: List[int], closed: int) -> Optional[int]:
+    """
+    Final result once every board is decided: the side that won more boards,
+    or TIE on equal counts. None while any board is still open.
+    """
+    if closed != FULL_BOARD:
+        return None
+    x_wins = meta[X].bit_count()
+    o_wins = meta[O].bit_count()
+    if x_wins > o_wins:
+        return X
+    if o_wins > x_wins:
+        return O
+    return TIE
+
+
+def symbol_to_side(symbol: Optional[PlayerSymbol]) -> Optional[int]:
+    """Map a PlayerSymbol to its side code (None for empty cells)"""
+    if symbol == PlayerSymbol.X:
+        return X
+    if symbol == PlayerSymbol.O:
+        return O
+    return None
+
+
+def side_to_symbol(side: Optional[int]) -> Optional[PlayerSymbol]:
+    """Map X/O/TIE back to a PlayerSymbol (None stays None)"""
+    return None if side is None else SIDE_TO_SYMBOL[side]
+
+
+class BitBoard:
+    """Super tic-tac-toe position built from int masks"""
+
+    __slots__ = ("masks", "meta", "closed", "active", "side", "zobrist", "board_eval", "_undo")
+
+    def __init__(self):
+        self.masks: List[List[int]] = [[0] * 9, [0] * 9]
+        self.meta: List[int] = [0, 0]
+        self.closed = 0
+        self.active = ANY_BOARD
+        self.side = X
+        self.zobrist = ZOBRIST_ACTIVE[0]
+        # Sum of EVAL over the open local boards (X's point of view), kept
+        # up to date by play/undo so leaf evaluation does not rescan the boards
+        self.board_eval = 0
+        # (board_idx, own mask, other mask, own meta, closed, active, zobrist,
+        # board_eval) per move
+        self._undo: List[Tuple[int, int, int, int, int, int, int, int]] = []
+
+    @classmethod
+    def from_game_state(
+        cls, game: GameState, side: Optional[int] = None
+    ) -> "BitBoard":
+        """
+        Build a position from a GameState.
+
+        Args:
+            game: Current game state
+            side: Side to move; defaults to game.current_player (X if unset)
+        """
+        if side is None:
+            side = symbol_to_side(game.current_player)
+        return cls.from_global_board(game.global_board, game.active_board, side)
+
+    @classmethod
+    def from_global_board(
+        cls,
+        global_board: List[List[Optional[PlayerSymbol]]],
+        active_board: Optional[int] = None,
+        side: Optional[int] = None,
+    ) -> "BitBoard":
+        """
+        Build a position from GameState-style board lists.
+
+        Args:
+            global_board: 9 lists of 9 cells
+            active_board: Board to play in, None for any board
+            side: Side to move (X if unset)
+        """
+        position = cls()
+        for board_idx, board in enumerate(global_board):
+            for cell_idx, cell in enumerate(board):
+                player = symbol_to_side(cell)
+                if player is not None:
+                    position.masks[player][board_idx] |= 1 << cell_idx
+            position._update_board_status(board_idx)
+
+        if active_board is not None:
+            position.active = active_board
+        position.side = X if side is None else side
+        position.zobrist = position.compute_zobrist()
+        position.board_eval = position.compute_board_eval()
+        return position
+
+    def to_global_board(self) -> List[List[Optional[PlayerSymbol]]]:
+        """Cells as GameState.global_board lists (won boards are captured)"""
+        return [self.board_cells(board_idx) for board_idx in range(9)]
+
+    def to_string(self) -> str:
+        """Cells as an 81-character string, board by board: 'X', 'O' or '.'"""
+        x_masks = self.masks[X]
+        o_masks = self.masks[O]
+        return "".join(
+            "X" if x_masks[board_idx] >> cell_idx & 1
+            else "O" if o_masks[board_idx] >> cell_idx & 1
+            else "."
+            for board_idx in range(9)
+            for cell_idx in range(9)
+        )
+
+    @classmethod
+    def from_string(
+        cls, cells: str, active_board: Optional[int] = None, side: Optional[int] = None
+    ) -> "BitBoard":
+        """
+        Build a position from an 81-character cell string (see to_string).
+
+        Raises:
+            ValueError: Wrong length or characters other than X, O and '.'
+        """
+        cells = cells.strip().upper()
+        if len(cells) != 81 or set(cells) - set("XO."):
+            raise ValueError("Cells must be 81 characters of 'X', 'O' or '.'")
+        symbols = {"X": PlayerSymbol.X, "O": PlayerSymbol.O, ".": None}
+        global_board = [
+            [symbols[cell] for cell in cells[board_idx * 9:board_idx * 9 + 9]]
+            for board_idx in range(9)
+        ]
+        return cls.from_global_board(global_board, active_board, side)
+
+    def board_cells(self, board_idx: int) -> List[Optional[PlayerSymbol]]:
+        """Cells of one local board as a GameState.global_board list"""
+        x_mask = self.masks[X][board_idx]
+        o_mask = self.masks[O][board_idx]
+        return [
+            PlayerSymbol.X if x_mask >> cell_idx & 1
+            else PlayerSymbol.O if o_mask >> cell_idx & 1
+            else None
+            for cell_idx in range(9)
+        ]
+
+    def copy(self) -> "BitBoard":
+        """Return an independent copy of this position"""
+        position = BitBoard.__new__(BitBoard)
+        position.masks = [self.masks[X][:], self.masks[O][:]]
+        position.meta = self.meta[:]
+        position.closed = self.closed
+        position.active = self.active
+        position.side = self.side
+        position.zobrist = self.zobrist
+        position.board_eval = self.board_eval
+        position._undo = self._undo[:]
+        return position
+
+    def key(self) -> int:
+        """64-bit Zobrist key of the position, including active board and side"""
+        return self.zobrist
+
+    def compute_zobrist(self) -> int:
+        """Compute the Zobrist key from scratch (play/undo keep it incremental)"""
+        key = ZOBRIST_ACTIVE[self.active + 1]
+        if self.side == O:
+            key ^= ZOBRIST_SIDE
+        for player in (X, O):
+            player_keys = ZOBRIST_BOARD[player]
+            for board_idx, mask in enumerate(self.masks[player]):
+                key ^= player_keys[board_idx][mask]
+        return key
+
+    def compute_board_eval(self) -> int:
+        """Compute board_eval from scratch (play/undo keep it incremental)"""
+        x_masks = self.masks[X]
+        o_masks = self.masks[O]
+        return sum(
+            EVAL[TERNARY[x_masks[board_idx]] + 2 * TERNARY[o_masks[board_idx]]]
+            for board_idx in MASK_BITS[FULL_BOARD & ~self.closed]
+        )
+
+    def canonical_key(self) -> Tuple[int, int]:
+        """
+        Smallest Zobrist key over the 8 symmetric images of the position.
+
+        The same transform is applied to the meta-board and to every local
+        board, which preserves lines, captures and the active board. The
+        "first open board" redirect is index based and not symmetric, so
+        subtrees that reach a closed board can differ between images; the
+        key is meant for caches of search results, not proofs.
+
+        Returns:
+            (canonical key, symmetry mapping this position onto the canonical one)
+        """
+        x_masks, o_masks = self.masks
+        occupied = [
+            (board_idx, x_masks[board_idx], o_masks[board_idx])
+            for board_idx in range(9)
+            if x_masks[board_idx] | o_masks[board_idx]
+        ]
+        best_key = self.zobrist
+        best_symmetry = 0
+        base = ZOBRIST_SIDE if self.side == O else 0
+        active = self.active + 1
+        for symmetry in range(1, 8):
+            x_keys, o_keys = SYMMETRY_ZOBRIST_BOARD[symmetry]
+            key = base ^ SYMMETRY_ZOBRIST_ACTIVE[symmetry][active]
+            for board_idx, x_mask, o_mask in occupied:
+                key ^= x_keys[board_idx][x_mask] ^ o_keys[board_idx][o_mask]
+            if key < best_key:
+                best_key = key
+                best_symmetry = symmetry
+        return best_key, best_symmetry
+
+    def transformed(self, symmetry: int) -> "BitBoard":
+        """
+        Image of the position under a symmetry (see SYMMETRY_CELLS).
+
+        The image has no move history, so it cannot be undone past.
+        """
+        cells = SYMMETRY_CELLS[symmetry]
+        sym_masks = SYMMETRY_MASKS[symmetry]
+        position = BitBoard()
+        for player in (X, O):
+            for board_idx, mask in enumerate(self.masks[player]):
+                position.masks[player][cells[board_idx]] = sym_masks[mask]
+            position.meta[player] = sym_masks[self.meta[player]]
+        position.closed = sym_masks[self.closed]
+        position.active = self.active if self.active == ANY_BOARD else cells[self.active]
+        position.side = self.side
+        position.zobrist = position.compute_zobrist()
+        # Line values do not change under rotation or reflection
+        position.board_eval = self.board_eval
+        return position
+
+    def canonical(self) -> Tuple["BitBoard", int]:
+        """
+        Canonical image of the position and the symmetry that produced it.
+
+        Moves found on the image map back with
+        transform_move(move, SYMMETRY_INVERSE[symmetry]).
+        """
+        _, symmetry = self.canonical_key()
+        return self.transformed(symmetry), symmetry
+
+    def _update_board_status(self, board_idx: int) -> None:
+        """Recompute won/closed bits of one local board from its cell masks"""
+        bit = 1 << board_idx
+        x_mask = self.masks[X][board_idx]
+        o_mask = self.masks[O][board_idx]
+        for player, mask in ((X, x_mask), (O, o_mask)):
+            if WINNING_MASK[mask]:
+                # Won boards are stored captured, as make_move leaves them
+                self.masks[player][board_idx] = FULL_BOARD
+                self.masks[player ^ 1][board_idx] = 0
+                self.meta[player] |= bit
+                self.closed |= bit
+                return
+        if x_mask | o_mask == FULL_BOARD:
+            self.closed |= bit
+
+    def play(self, move: int) -> None:
+        """
+        Apply a move for the side to move; revert it with undo().
+
+        A won board is captured (filled with the winner's symbol) and the
+        opponent is sent to the board matching the cell played, or to the
+        first open board if that one is decided. GameService.make_move
+        applies moves through here as well.
+        """
+        board_idx, cell_idx = divmod(move, 9)
+        side = self.side
+        own = self.masks[side]
+        other = self.masks[side ^ 1]
+        own_before = own[board_idx]
+        other_before = other[board_idx]
+        self._undo.append((
+            board_idx, own_before, other_before,
+            self.meta[side], self.closed, self.active, self.zobrist, self.board_eval,
+        ))
+        own_keys = ZOBRIST_BOARD[side][board_idx]
+        own_after = own_before | 1 << cell_idx
+        own_codes = SIDE_TERNARY[side]
+        other_code = SIDE_TERNARY[side ^ 1][other_before]
+        board_eval = self.board_eval - EVAL[own_codes[own_before] + other_code]
+
+        bit = 1 << board_idx
+        key = self.zobrist ^ own_keys[own_before] ^ ZOBRIST_SIDE ^ ZOBRIST_ACTIVE[self.active + 1]
+        if WINNING_MASK[own_after]:
+            own_after = FULL_BOARD
+            other[board_idx] = 0
+            key ^= ZOBRIST_BOARD[side ^ 1][board_idx][other_before]
+            self.meta[side] |= bit
+            self.closed |= bit
+        elif own_after | other_before == FULL_BOARD:
+            self.closed |= bit
+        else:
+            # Decided boards drop out of the evaluation
+            board_eval += EVAL[own_codes[own_after] + other_code]
+        own[board_idx] = own_after
+        key ^= own_keys[own_after]
+        self.board_eval = board_eval
+
+        self.active = next_active_board(cell_idx, self.closed)
+        self.side = side ^ 1
+        self.zobrist = key ^ ZOBRIST_ACTIVE[self.active + 1]
+
+    def undo(self) -> None:
+        """Revert the last move applied with play()"""
+        (board_idx, own_mask, other_mask, own_meta, closed, active, zobrist,
+         board_eval) = self._undo.pop()
+        side = self.side ^ 1
+        self.masks[side][board_idx] = own_mask
+        self.masks[side ^ 1][board_idx] = other_mask
+        self.meta[side] = own_meta
+        self.closed = closed
+        self.active = active
+        self.side = side
+        self.zobrist = zobrist
+        self.board_eval = board_eval
+
+    def undo_depth(self) -> int:
+        """Number of moves applied with play() that undo() can still revert"""
+        return len(self._undo)
+
+    def result(self) -> Optional[int]:
+        """Final game result (X, O or TIE) by the game rules, else None"""
+        return game_result(self.meta, self.closed)
+
+    def winner(self) -> Optional[int]:
+        """
+        Return X, O or TIE once the game result is decided, else None.
+
+        Unlike result(), which waits for every board to be decided as the
+        game does, a side that already owns more boards than the opponent
+        can still reach is treated as the winner; the search stops there
+        because the outcome can no longer change.
+        """
+        x_wins = self.meta[X].bit_count()
+        o_wins = self.meta[O].bit_count()
+        open_count = 9 - self.closed.bit_count()
+
+        if x_wins > o_wins + open_count:
+            return X
+        if o_wins > x_wins + open_count:
+            return O
+        if open_count == 0:
+            if x_wins > o_wins:
+                return X
+            if o_wins > x_wins:
+                return O
+            return TIE
+        return None
+
+    def legal_moves(self) -> List[int]:
+        """Get all legal moves for the side to move"""
+        x_masks = self.masks[X]
+        o_masks = self.masks[O]
+        if self.active != ANY_BOARD and not self.closed >> self.active & 1:
+            boards = (self.active,)
+        else:
+            boards = MASK_BITS[FULL_BOARD & ~self.closed]
+
+        moves = []
+        for board_idx in boards:
+            base = board_idx * 9
+            empty = FULL_BOARD & ~(x_masks[board_idx] | o_masks[board_idx])
+            moves.extend(base + cell_idx for cell_idx in MASK_BITS[empty])
+        return moves
@@ -0,0 +1,136 @@
+"""
+Precomputed lookup tables for a single 3x3 local board.
+
+A local board has only 3^9 = 19683 states, so everything the game and AI
+need to know about one board is computed once at import and read back by
+index. A state is addressed by its base-3 code: cell i contributes
+3^i * v with v = 0 (empty), 1 (X) or 2 (O). For bitboard masks the code
+is ``TERNARY[x_mask] + 2 * TERNARY[o_mask]``.
+
+Tables (all indexed by code):
+- WINNER: 0 undecided, 1 X won, 2 O won, 3 tie (full, no line)
+- LEGAL: mask of empty cells, 0 once the board is decided
+- EVAL: heuristic line score from X's point of view (negate for O)
+- THREATS_X / THREATS_O: empty cells that would complete a line
+- NEAR_WINS_X / NEAR_WINS_O: lines holding two marks and one empty cell
+"""
+
+from array import array
+from typing import List, Optional
+
+from api.models.game import PlayerSymbol
+
+# Side / result codes (shared with api.utils.bitboard)
+X = 0
+O = 1
+TIE = 2
+
+# Rows, columns and diagonals of a 3x3 board as cell masks
+WIN_LINES = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+)
+
+STATE_COUNT = 3 ** 9
+POW3 = tuple(3 ** i for i in range(9))
+
+# TERNARY[mask] is the base-3 code of a board holding X on every set bit
+TERNARY = tuple(
+    sum(POW3[i] for i in range(9) if mask >> i & 1) for mask in range(512)
+)
+
+WINNER_NONE = 0
+WINNER_X = 1
+WINNER_O = 2
+WINNER_TIE = 3
+
+# Line scores of the heuristic: two with an empty cell, one with two empty
+TWO_IN_LINE_SCORE = 20
+ONE_IN_LINE_SCORE = 2
+
+_CELL_VALUES = {PlayerSymbol.X: 1, PlayerSymbol.O: 2}
+_WINNER_SYMBOLS = (None, PlayerSymbol.X, PlayerSymbol.O, PlayerSymbol.T)
+_WINNER_SIDES = (None, X, O, TIE)
+
+
+def _build_tables():
+    """Enumerate every local board state once"""
+    winner = bytearray(STATE_COUNT)
+    legal = array("H", bytes(2 * STATE_COUNT))
+    evaluation = array("h", bytes(2 * STATE_COUNT))
+    threats = (array("H", bytes(2 * STATE_COUNT)), array("H", bytes(2 * STATE_COUNT)))
+    near_wins = (bytearray(STATE_COUNT), bytearray(STATE_COUNT))
+
+    for code in range(STATE_COUNT):
+        masks = [0, 0]
+        rest = code
+        for cell in range(9):
+            rest, value = divmod(rest, 3)
+            if value:
+                masks[value - 1] |= 1 << cell
+        x_mask, o_mask = masks
+        empty = 0x1FF & ~(x_mask | o_mask)
+
+        score = 0
+        for line in WIN_LINES:
+            x_count = (x_mask & line).bit_count()
+            o_count = (o_mask & line).bit_count()
+            line_empty = empty & line
+
+            if x_count == 3 and not winner[code]:
+                winner[code] = WINNER_X
+            elif o_count == 3 and not winner[code]:
+                winner[code] = WINNER_O
+
+            for player, own, other in ((X, x_count, o_count), (O, o_count, x_count)):
+                if own == 2 and other == 0:
+                    threats[player][code] |= line_empty
+                    near_wins[player][code] += 1
+
+            if o_count == 0:
+                if x_count == 2:
+                    score += TWO_IN_LINE_SCORE
+                elif x_count == 1:
+                    score += ONE_IN_LINE_SCORE
+            elif x_count == 0:
+                if o_count == 2:
+                    score -= TWO_IN_LINE_SCORE
+                elif o_count == 1:
+                    score -= ONE_IN_LINE_SCORE
+
+        if not winner[code] and not empty:
+            winner[code] = WINNER_TIE
+        legal[code] = 0 if winner[code] else empty
+        evaluation[code] = score
+
+    return winner, legal, evaluation, threats, near_wins
+
+
+WINNER, LEGAL, EVAL, (THREATS_X, THREATS_O), (NEAR_WINS_X, NEAR_WINS_O) = _build_tables()
+THREATS = (THREATS_X, THREATS_O)
+NEAR_WINS = (NEAR_WINS_X, NEAR_WINS_O)
+
+
+def mask_code(x_mask: int, o_mask: int) -> int:
+    """Base-3 code of a board given as X and O cell masks"""
+    return TERNARY[x_mask] + 2 * TERNARY[o_mask]
+
+
+def board_code(board: List[Optional[PlayerSymbol]]) -> int:
+    """Base-3 code of a board given as a list of 9 cells"""
+    code = 0
+    for cell, weight in zip(board, POW3):
+        if cell:
+            code += _CELL_VALUES.get(cell, 0) * weight
+    return code
+
+
+def winner_symbol(code: int) -> Optional[PlayerSymbol]:
+    """Winner of a board state as a PlayerSymbol (T for a tie)"""
+    return _WINNER_SYMBOLS[WINNER[code]]
+
+
+def winner_side(code: int) -> Optional[int]:
+    """Winner of a board state as a side code (X, O or TIE)"""
+    return _WINNER_SIDES[WINNER[code]]
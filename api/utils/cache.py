@@ -13,6 +13,8 @@ import logging
 from dataclasses import dataclass
 from collections import OrderedDict
 
+from api.utils.root_cache import root_cache
+
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
@@ -169,6 +171,8 @@ class InMemoryCache:
 _game_cache = InMemoryCache(max_size=500, default_ttl=300)  # Game states
 _leaderboard_cache = InMemoryCache(max_size=10, default_ttl=60)  # Leaderboard
 _user_cache = InMemoryCache(max_size=1000, default_ttl=600)  # User data
+# Position analysis results by canonical position (see api.utils.analysis)
+_analysis_cache = InMemoryCache(max_size=20000, default_ttl=3600)
 
 
 def get_game_cache() -> InMemoryCache:
@@ -186,6 +190,11 @@ def get_user_cache() -> InMemoryCache:
     return _user_cache
 
 
+def get_analysis_cache() -> InMemoryCache:
+    """Get the position analysis cache"""
+    return _analysis_cache
+
+
 def make_cache_key(*args, **kwargs) -> str:
     """
     Create a cache key from arguments.
@@ -272,4 +281,6 @@ async def get_cache_stats() -> dict:
         "game_cache": _game_cache.get_stats(),
         "leaderboard_cache": _leaderboard_cache.get_stats(),
         "user_cache": _user_cache.get_stats(),
+        "analysis_cache": _analysis_cache.get_stats(),
+        "ai_result_cache": root_cache.get_stats(),
     }
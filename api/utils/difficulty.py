@@ -0,0 +1,78 @@
+"""
+AI difficulty levels defined as search budgets.
+
+Every level runs the same search, bounded by a node budget, a depth limit
+and a wall-clock limit, so the CPU cost of a move is known per level and
+capacity can be planned as AI games per core. Weaker levels are made
+weaker by searching less and by sampling their move from the root scores
+(softmax with the level's noise as temperature, in evaluation units)
+instead of always playing the best one.
+
+The table is shared by AILogic and the API's difficulty validation; node
+budgets can be overridden per level with AI_<LEVEL>_MAX_NODES.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+DEFAULT_DIFFICULTY = "medium"
+
+
+@dataclass(frozen=True)
+class SearchBudget:
+    """Search limits of one difficulty level"""
+    max_nodes: int
+    max_depth: int
+    max_time: float
+    # Softmax temperature over root scores; 0 always plays the best move
+    noise: float = 0.0
+    # Consult the opening book and the exact endgame solver
+    use_book: bool = False
+    use_endgame: bool = False
+
+
+DIFFICULTY_BUDGETS: Dict[str, SearchBudget] = {
+    "easy": SearchBudget(
+        max_nodes=int(os.getenv("AI_EASY_MAX_NODES", "2000")),
+        max_depth=1,
+        max_time=0.1,
+        noise=150.0,
+    ),
+    "medium": SearchBudget(
+        max_nodes=int(os.getenv("AI_MEDIUM_MAX_NODES", "20000")),
+        max_depth=3,
+        max_time=0.5,
+        noise=30.0,
+    ),
+    "hard": SearchBudget(
+        max_nodes=int(os.getenv("AI_HARD_MAX_NODES", "250000")),
+        max_depth=8,
+        max_time=2.0,
+        use_book=True,
+        use_endgame=True,
+    ),
+}
+
+
+def normalize_difficulty(difficulty: Optional[str]) -> str:
+    """
+    Validate a difficulty name against the budget table.
+
+    Returns:
+        Lower-cased level name, DEFAULT_DIFFICULTY if none was given
+
+    Raises:
+        ValueError: Unknown difficulty
+    """
+    if not difficulty:
+        return DEFAULT_DIFFICULTY
+    difficulty = str(difficulty).lower().strip()
+    if difficulty not in DIFFICULTY_BUDGETS:
+        raise ValueError(f"Must be one of: {', '.join(DIFFICULTY_BUDGETS)}")
+    return difficulty
+
+
+def get_budget(difficulty: Optional[str]) -> SearchBudget:
+    """Search budget of a difficulty level"""
+    return DIFFICULTY_BUDGETS[normalize_difficulty(difficulty)]
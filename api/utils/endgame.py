@@ -0,0 +1,218 @@
+"""
+Exact endgame solver for positions with few empty cells.
+
+Late in the game the remaining tree is small enough to search to the end,
+so instead of a heuristic score the solver proves the result (win, draw
+or loss for the side to move) with a win/draw/loss alpha-beta search on
+the bitboard. Proven results are kept in the solver's own transposition
+table, which persists across calls on the same solver.
+
+The search is bounded by a node budget and an optional deadline and
+cancellation hook; when any of them runs out the solver gives up and the
+caller falls back to the heuristic search.
+"""
+
+import os
+import time
+from typing import Callable, Optional, Tuple
+
+from api.utils.bitboard import BitBoard, TIE, WINNING_MASK
+from api.utils.transposition import (
+    NO_MOVE, TT_EXACT, TT_LOWER, TT_UPPER, TranspositionTable
+)
+
+# Solve exactly once this many cells (or fewer) are still empty
+ENDGAME_EMPTY_CELLS = int(os.getenv("AI_ENDGAME_EMPTY_CELLS", "24"))
+# Node budget of one solve
+ENDGAME_MAX_NODES = int(os.getenv("AI_ENDGAME_MAX_NODES", "200000"))
+
+# Results from the point of view of the side to move
+SOLVED_WIN = 1
+SOLVED_DRAW = 0
+SOLVED_LOSS = -1
+
+# Budget and cancellation are checked every this many nodes
+_CHECK_INTERVAL = 1024
+
+
+class _SolverAborted(Exception):
+    """Raised inside the search when the budget runs out"""
+
+
+class EndgameSolver:
+    """Proves game results with an exhaustive win/draw/loss search"""
+
+    def __init__(
+        self,
+        max_nodes: int = ENDGAME_MAX_NODES,
+        should_stop: Optional[Callable[[], bool]] = None,
+        table_size: int = 1 << 16,
+    ):
+        """
+        Args:
+            max_nodes: Nodes one solve may visit before giving up
+            should_stop: Polled during the search; returning True aborts it
+            table_size: Entries of the solver's transposition table
+        """
+        self.max_nodes = max_nodes
+        self._should_stop = should_stop
+        # Hook of the running solve; the table outlives it, so one solver
+        # can serve every move of a worker
+        self._stop = should_stop
+        self._table = TranspositionTable(table_size)
+        self._nodes = 0
+        self._deadline = None
+
+        # Statistics
+        self._solves = 0
+        self._proven = 0
+        self._total_nodes = 0
+
+    def solve(
+        self,
+        position: BitBoard,
+        max_time: Optional[float] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+    ) -> Optional[Tuple[int, int]]:
+        """
+        Solve a position.
+
+        Args:
+            position: Position to solve; restored before returning
+            max_time: Optional wall-clock budget in seconds
+            should_stop: Cancellation hook of this solve, instead of the
+                solver's own
+
+        Returns:
+            (result, best move) with result one of SOLVED_WIN, SOLVED_DRAW
+            or SOLVED_LOSS for the side to move, or None if the budget ran
+            out before the result was proven
+        """
+        self._solves += 1
+        self._nodes = 0
+        self._deadline = time.time() + max_time if max_time is not None else None
+        self._stop = should_stop if should_stop is not None else self._should_stop
+        moves = position.legal_moves()
+        if not moves:
+            return None
+
+        depth = position.undo_depth()
+        try:
+            result, move = self._solve_root(position, moves)
+        except _SolverAborted:
+            # Unwind the moves the aborted search left on the position
+            while position.undo_depth() > depth:
+                position.undo()
+            return None
+        finally:
+            self._total_nodes += self._nodes
+
+        self._proven += 1
+        return result, move
+
+    @staticmethod
+    def empty_cells(position: BitBoard) -> int:
+        """Number of empty cells left on the board"""
+        return 81 - sum(
+            (x_mask | o_mask).bit_count()
+            for x_mask, o_mask in zip(position.masks[0], position.masks[1])
+        )
+
+    def _solve_root(self, position: BitBoard, moves) -> Tuple[int, int]:
+        """Search the root moves, stopping at the first proven win"""
+        best_result = SOLVED_LOSS - 1
+        best_move = moves[0]
+        for move in self._order_moves(position, moves, NO_MOVE):
+            position.play(move)
+            result = -self._negamax(position, -SOLVED_WIN, -best_result)
+            position.undo()
+            if result > best_result:
+                best_result = result
+                best_move = move
+                if result == SOLVED_WIN:
+                    break
+        return best_result, best_move
+
+    def _negamax(self, position: BitBoard, alpha: int, beta: int) -> int:
+        """Win/draw/loss alpha-beta search to the end of the game"""
+        self._nodes += 1
+        if self._nodes % _CHECK_INTERVAL == 0:
+            self._check_budget()
+
+        winner = position.winner()
+        if winner is not None:
+            if winner == TIE:
+                return SOLVED_DRAW
+            return SOLVED_WIN if winner == position.side else SOLVED_LOSS
+
+        key = position.key()
+        tt_move = NO_MOVE
+        entry = self._table.probe(key)
+        if entry is not None:
+            score, _, flag, tt_move = entry
+            if flag == TT_EXACT:
+                return score
+            if flag == TT_LOWER and score >= beta:
+                return score
+            if flag == TT_UPPER and score <= alpha:
+                return score
+
+        alpha_orig = alpha
+        best = SOLVED_LOSS - 1
+        best_move = NO_MOVE
+        for move in self._order_moves(position, position.legal_moves(), tt_move):
+            position.play(move)
+            score = -self._negamax(position, -beta, -alpha)
+            position.undo()
+            if score > best:
+                best = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if best <= alpha_orig:
+            flag = TT_UPPER
+        elif best >= beta:
+            flag = TT_LOWER
+        else:
+            flag = TT_EXACT
+        self._table.store(key, best, 0, flag, best_move)
+        return best
+
+    def _order_moves(self, position: BitBoard, moves, tt_move: int):
+        """Table move first, then board-winning moves, then blocks"""
+        own = position.masks[position.side]
+        other = position.masks[position.side ^ 1]
+
+        def score(move: int) -> int:
+            if move == tt_move:
+                return 3
+            board_idx, cell_idx = divmod(move, 9)
+            bit = 1 << cell_idx
+            if WINNING_MASK[own[board_idx] | bit]:
+                return 2
+            if WINNING_MASK[other[board_idx] | bit]:
+                return 1
+            return 0
+
+        return sorted(moves, key=score, reverse=True)
+
+    def _check_budget(self) -> None:
+        """Abort the search once nodes, time or the caller say so"""
+        if self._nodes >= self.max_nodes:
+            raise _SolverAborted()
+        if self._deadline is not None and time.time() > self._deadline:
+            raise _SolverAborted()
+        if self._stop is not None and self._stop():
+            raise _SolverAborted()
+
+    def get_stats(self) -> dict:
+        """Get solver statistics"""
+        return {
+            "solves": self._solves,
+            "proven": self._proven,
+            "total_nodes": self._total_nodes,
+            "table_entries": self._table._max_size,
+        }
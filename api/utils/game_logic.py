@@ -1,34 +1,17 @@
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 from fastapi import HTTPException
 from api.db.database import get_db
 from api.db.models import GameDB, PlayerDB
 from api.models.game import GameMove, GameState, PlayerStatus, PlayerSymbol
+from api.utils.bitboard import (
+    ANY_BOARD, BitBoard, game_result, next_active_board, side_to_symbol, symbol_to_side
+)
+from api.utils.board_tables import board_code, winner_symbol
 
 def check_board_winner(board: List[Optional[PlayerSymbol]]) -> Optional[PlayerSymbol]:
-    win_patterns = [
-        [0, 1, 2],
-        [3, 4, 5],
-        [6, 7, 8],
-        [0, 3, 6],
-        [1, 4, 7],
-        [2, 5, 8],
-        [0, 4, 8],
-        [2, 4, 6]
-    ]
-
-    for pattern in win_patterns:
-        a, b, c = pattern
-        if (board[a] is not None and 
-            board[a] == board[b] and 
-            board[a] == board[c]):
-            return board[a]
-
-    if all(cell is not None for cell in board):
-        return PlayerSymbol.T
-
-    return None
+    return winner_symbol(board_code(board))
 
 def find_next_active_board(
     current_cell_index: int, 
@@ -38,14 +21,35 @@ def find_next_active_board(
     if final_winner is not None:
         return None
 
-    if all(cell is not None for cell in current_global_board[current_cell_index]):
-        available_boards = [
-            index for index, board in enumerate(current_global_board)
-            if any(cell is None for cell in board)
-        ]
-        return available_boards[0] if available_boards else None
-    
-    return current_cell_index
+    closed = 0
+    for board_idx, board in enumerate(current_global_board):
+        if all(cell is not None for cell in board):
+            closed |= 1 << board_idx
+    active = next_active_board(current_cell_index, closed)
+    return None if active == ANY_BOARD else active
+
+def get_available_moves(game: GameState) -> List[Tuple[int, int]]:
+    """Legal (board_index, cell_index) moves of the player to move"""
+    if game.winner is not None:
+        return []
+    position = BitBoard.from_game_state(game)
+    return [divmod(move, 9) for move in position.legal_moves()]
+
+def apply_move(game: GameState, board_index: int, cell_index: int, symbol: PlayerSymbol) -> None:
+    """Play a validated move on the game: capture, next active board and result.
+
+    The rules themselves live in BitBoard, which the AI search plays on too.
+    """
+    position = BitBoard.from_global_board(
+        game.global_board, game.active_board, symbol_to_side(symbol)
+    )
+    position.play(board_index * 9 + cell_index)
+
+    game.global_board[board_index] = position.board_cells(board_index)
+    game.current_player = PlayerSymbol.X if symbol == PlayerSymbol.O else PlayerSymbol.O
+    game.move_count += 1
+    game.winner = side_to_symbol(position.result())
+    game.active_board = None if position.active == ANY_BOARD else position.active
 
 def convert_global_board_to_db(board: List[List[Optional[PlayerSymbol]]]) -> List[str]:
     return [cell.value if cell else '' for row in board for cell in row]
@@ -77,27 +81,8 @@ def check_global_winner(global_board):
     Winner is determined after ALL 9 boards are complete.
     The player who won more boards wins the game.
     """
-    # Get winner for each small board
-    local_board_winners = []
-    for local_board in global_board:
-        winner = check_board_winner(local_board)
-        local_board_winners.append(winner)
-    
-    # Game continues if any board is still in progress
-    if any(winner is None for winner in local_board_winners):
-        return None
-    
-    # All boards are complete - count wins
-    x_wins = sum(1 for w in local_board_winners if w == PlayerSymbol.X)
-    o_wins = sum(1 for w in local_board_winners if w == PlayerSymbol.O)
-    
-    # Determine winner based on board count
-    if x_wins > o_wins:
-        return PlayerSymbol.X
-    elif o_wins > x_wins:
-        return PlayerSymbol.O
-    else:
-        return PlayerSymbol.T  # Tie
+    position = BitBoard.from_global_board(global_board)
+    return side_to_symbol(game_result(position.meta, position.closed))
 
 def remove_player_from_game(games: Dict[str, GameState], game_id: str, user_id: str) -> None:
     if game_id in games:
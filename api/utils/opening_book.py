@@ -0,0 +1,242 @@
+"""
+Opening book for the AI, memory-mapped from a compact binary file.
+
+Every AI game starts from the same empty board, so the first replies are
+searched offline (deeper than the live time budget allows) and stored by
+canonical position key (see BitBoard.canonical_key). At runtime a lookup
+is a binary search over the mapped file; all worker processes share its
+pages through the OS page cache.
+
+File layout (little endian):
+- header: magic (8 bytes), version (u16), plies (u16), search depth (u16),
+  reserved (u16), entry count (u64)
+- keys: entry count u64 canonical keys, ascending
+- values: entry count u64 words, move (7 bits) | depth (8) << 7 |
+  score + SCORE_BIAS (32) << 15; the move is in the canonical frame
+
+Build a book with:
+    python -m api.utils.opening_book --plies 4 --depth 7
+"""
+
+import argparse
+import logging
+import mmap
+import os
+import struct
+import time
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from api.utils.bitboard import BitBoard, O, SYMMETRY_INVERSE, transform_move
+
+logger = logging.getLogger(__name__)
+
+BOOK_MAGIC = b"UTTTBOOK"
+BOOK_VERSION = 1
+HEADER = struct.Struct("<8sHHHHQ")
+SCORE_BIAS = 1 << 31
+
+DEFAULT_BOOK_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "opening_book.bin"
+)
+AI_OPENING_BOOK = os.getenv("AI_OPENING_BOOK", DEFAULT_BOOK_PATH)
+
+
+class OpeningBook:
+    """Read-only opening book mapped from a file built by build_book()"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Book file to map
+
+        Raises:
+            ValueError: The file is not a book of a supported version
+        """
+        self.path = path
+        with open(path, "rb") as book_file:
+            self._mmap = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, plies, depth, _, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != BOOK_MAGIC or version != BOOK_VERSION:
+            self._mmap.close()
+            raise ValueError(f"{path} is not an opening book (version {BOOK_VERSION})")
+        if len(self._mmap) < HEADER.size + count * 16:
+            self._mmap.close()
+            raise ValueError(f"{path} is truncated")
+
+        self.plies = plies
+        self.depth = depth
+        self._count = count
+        view = memoryview(self._mmap)
+        self._keys = view[HEADER.size:HEADER.size + count * 8].cast("Q")
+        self._values = view[HEADER.size + count * 8:HEADER.size + count * 16].cast("Q")
+
+        # Statistics
+        self._lookups = 0
+        self._hits = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def probe(self, position: BitBoard) -> Optional[Tuple[int, int, int]]:
+        """
+        Look up a position.
+
+        Returns:
+            (move, score, depth) with the move in the position's own frame,
+            or None if the position is not in the book
+        """
+        self._lookups += 1
+        key, symmetry = position.canonical_key()
+        index = bisect_left(self._keys, key)
+        if index == self._count or self._keys[index] != key:
+            return None
+
+        self._hits += 1
+        value = self._values[index]
+        move = transform_move(value & 0x7F, SYMMETRY_INVERSE[symmetry])
+        return move, (value >> 15) - SCORE_BIAS, value >> 7 & 0xFF
+
+    def close(self) -> None:
+        """Unmap the book file"""
+        self._keys.release()
+        self._values.release()
+        self._mmap.close()
+
+    def get_stats(self) -> dict:
+        """Get book statistics"""
+        return {
+            "path": self.path,
+            "entries": self._count,
+            "plies": self.plies,
+            "depth": self.depth,
+            "lookups": self._lookups,
+            "hits": self._hits,
+            "hit_rate": round(self._hits / self._lookups * 100, 2) if self._lookups else 0,
+        }
+
+
+_book: Optional[OpeningBook] = None
+_book_loaded = False
+
+
+def get_opening_book() -> Optional[OpeningBook]:
+    """Map the configured book once per process; None if there is none"""
+    global _book, _book_loaded
+    if not _book_loaded:
+        _book_loaded = True
+        if AI_OPENING_BOOK and os.path.exists(AI_OPENING_BOOK):
+            try:
+                _book = OpeningBook(AI_OPENING_BOOK)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Opening book not loaded: {e}")
+    return _book
+
+
+def write_book(
+    path: str, entries: Dict[int, Tuple[int, int, int]], plies: int, depth: int
+) -> None:
+    """
+    Write a book file.
+
+    Args:
+        path: Output file
+        entries: canonical key -> (canonical move, score, depth)
+        plies: Plies covered by the book
+        depth: Search depth used to build it
+    """
+    keys = sorted(entries)
+    with open(path, "wb") as book_file:
+        book_file.write(HEADER.pack(BOOK_MAGIC, BOOK_VERSION, plies, depth, 0, len(keys)))
+        book_file.write(struct.pack(f"<{len(keys)}Q", *keys))
+        book_file.write(struct.pack(f"<{len(keys)}Q", *(
+            entries[key][0] | entries[key][2] << 7 | (entries[key][1] + SCORE_BIAS) << 15
+            for key in keys
+        )))
+
+
+def _search_book_position(position: BitBoard, depth: int) -> Tuple[int, int, int]:
+    """Search one book position to a fixed depth (runs in a worker process)"""
+    # Imported here: ai_logic consults this module for book moves
+    from api.utils.ai_logic import AILogic, TranspositionTable
+
+    ai = AILogic(
+        difficulty="hard",
+        max_time=float("inf"),
+        transposition_table=TranspositionTable(1 << 20),
+        max_depth=depth,
+        max_nodes=float("inf"),
+    )
+    reached, move, score = ai.search_root(position, position.legal_moves())[-1]
+    return move, score, reached
+
+
+def _unique_children(positions: Iterable[BitBoard]) -> List[BitBoard]:
+    """All positions one move after the given ones, one per canonical key"""
+    children = {}
+    for position in positions:
+        for move in position.legal_moves():
+            child = position.copy()
+            child.play(move)
+            children.setdefault(child.canonical_key()[0], child)
+    return list(children.values())
+
+
+def build_book(
+    plies: int, depth: int, book_side: int = O, workers: int = 1
+) -> Dict[int, Tuple[int, int, int]]:
+    """
+    Search every position the book side can face in its first moves.
+
+    The opponent's moves are expanded exhaustively; for the book side only
+    the searched reply is followed, so the book stays small.
+
+    Args:
+        plies: Cover positions with fewer than this many moves played
+        depth: Search depth per position
+        book_side: Side the book plays (the AI plays O)
+        workers: Worker processes used for the searches
+
+    Returns:
+        canonical key -> (canonical move, score, depth)
+    """
+    entries: Dict[int, Tuple[int, int, int]] = {}
+    frontier = [BitBoard()]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for ply in range(plies):
+            if frontier[0].side != book_side:
+                frontier = _unique_children(frontier)
+                continue
+
+            started = time.time()
+            results = list(pool.map(_search_book_position, frontier, [depth] * len(frontier)))
+            next_frontier = []
+            for position, (move, score, reached) in zip(frontier, results):
+                key, symmetry = position.canonical_key()
+                entries[key] = (transform_move(move, symmetry), score, reached)
+                child = position.copy()
+                child.play(move)
+                next_frontier.append(child)
+            print(f"ply {ply + 1}: {len(frontier)} positions in {time.time() - started:.1f}s")
+            frontier = next_frontier
+    return entries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the AI opening book")
+    parser.add_argument("--plies", type=int, default=4, help="cover positions before this ply")
+    parser.add_argument("--depth", type=int, default=7, help="search depth per position")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", default=DEFAULT_BOOK_PATH)
+    args = parser.parse_args()
+
+    entries = build_book(args.plies, args.depth, workers=args.workers)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    write_book(args.output, entries, args.plies, args.depth)
+    print(f"Wrote {len(entries)} positions to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
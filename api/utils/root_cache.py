@@ -0,0 +1,172 @@
+"""
+Process-wide cache of completed AI root searches.
+
+Many AI games pass through the same positions, in the openings and in
+common midgame structures. A completed root search is stored by canonical
+position (see BitBoard.canonical_key) and difficulty, so the next game to
+reach the position, or one of its symmetric images, plays from the cache
+instead of queueing another search (see AIExecutor.get_move).
+
+An entry keeps the deepest completed depth, the root moves with their
+scores and the principal variation. A hit is only served at a minimum
+depth (the executor asks for the level's full depth), so a search that a
+busy machine, a degraded budget or a node limit cut short is never played
+in place of a full one. Exact levels keep only the best move;
+noisy levels keep every root move, so they still sample their move from
+the scores on a hit. Moves are stored in the canonical frame and mapped
+back on lookup. An entry is only used when it covers exactly the legal
+moves of the requesting position (the "first open board" redirect is not
+symmetric). A deeper result replaces a shallower one.
+
+The cache is bounded by an estimate of its memory use and evicts the
+least recently used entries first.
+"""
+
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from api.utils.bitboard import SYMMETRY_INVERSE, BitBoard, transform_move
+
+AI_ROOT_CACHE_MB = float(os.getenv("AI_ROOT_CACHE_MB", "16"))
+# Estimated bytes of an entry (key, result and tuples), plus per root or pv move
+ENTRY_BYTES = 400
+MOVE_BYTES = 120
+PV_MOVE_BYTES = 40
+
+
+@dataclass(frozen=True)
+class RootResult:
+    """Completed root search of one position"""
+    depth: int
+    scores: Tuple[Tuple[int, int], ...]  # (move, score), best first
+    pv: Tuple[int, ...] = ()
+
+    @property
+    def move(self) -> int:
+        return self.scores[0][0]
+
+    @property
+    def nbytes(self) -> int:
+        return ENTRY_BYTES + MOVE_BYTES * len(self.scores) + PV_MOVE_BYTES * len(self.pv)
+
+    def transformed(self, symmetry: int) -> "RootResult":
+        """The result with its moves mapped by a symmetry"""
+        return RootResult(
+            self.depth,
+            tuple((transform_move(move, symmetry), score) for move, score in self.scores),
+            tuple(transform_move(move, symmetry) for move in self.pv),
+        )
+
+
+def _moves_mask(moves: List[int]) -> int:
+    mask = 0
+    for move in moves:
+        mask |= 1 << move
+    return mask
+
+
+class RootResultCache:
+    """LRU of root search results by canonical position and difficulty"""
+
+    def __init__(self, max_mb: float = AI_ROOT_CACHE_MB):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.nbytes = 0
+        # (canonical key, difficulty) -> (canonical root moves mask, result)
+        self._entries: "OrderedDict[Tuple[int, str], Tuple[int, RootResult]]" = OrderedDict()
+
+        # Statistics
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+
+    def lookup(
+        self, position: BitBoard, difficulty: str, root_moves: List[int], min_depth: int = 0
+    ) -> Optional[RootResult]:
+        """
+        Find the result of an earlier search of the position.
+
+        Args:
+            position: Position with the AI to move
+            difficulty: Level the result must come from
+            root_moves: Legal moves of the position (encoded)
+            min_depth: Shallowest result that may be served
+
+        Returns:
+            The result in the position's frame, or None
+        """
+        key, symmetry = position.canonical_key()
+        entry = self._entries.get((key, difficulty))
+        if entry is None or entry[1].depth < min_depth or entry[0] != _moves_mask(
+            [transform_move(move, symmetry) for move in root_moves]
+        ):
+            self._misses += 1
+            return None
+        self._entries.move_to_end((key, difficulty))
+        self._hits += 1
+
+        result = entry[1].transformed(SYMMETRY_INVERSE[symmetry])
+        # Keep the part of the line that is legal here
+        pv = []
+        replay = position.copy()
+        for move in result.pv:
+            if replay.winner() is not None or move not in replay.legal_moves():
+                break
+            pv.append(move)
+            replay.play(move)
+        return RootResult(result.depth, result.scores, tuple(pv))
+
+    def store(
+        self, position: BitBoard, difficulty: str, root_moves: List[int], result: RootResult
+    ) -> bool:
+        """
+        Keep a completed search unless a deeper one is cached.
+
+        Returns:
+            True if the result was stored
+        """
+        key, symmetry = position.canonical_key()
+        entry_key = (key, difficulty)
+        existing = self._entries.pop(entry_key, None)
+        if existing is not None:
+            if existing[1].depth > result.depth:
+                self._entries[entry_key] = existing
+                return False
+            self.nbytes -= existing[1].nbytes
+
+        canonical = result.transformed(symmetry)
+        self._entries[entry_key] = (
+            _moves_mask([transform_move(move, symmetry) for move in root_moves]), canonical
+        )
+        self.nbytes += canonical.nbytes
+        self._stores += 1
+        while self.nbytes > self.max_bytes and self._entries:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+            self._evictions += 1
+        return True
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        self._entries.clear()
+        self.nbytes = 0
+
+    def get_stats(self) -> dict:
+        """Get hit rate and memory statistics"""
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "memory_kb": round(self.nbytes / 1024, 2),
+            "max_memory_kb": round(self.max_bytes / 1024, 2),
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups * 100, 2) if lookups else 0,
+            "stores": self._stores,
+            "evictions": self._evictions,
+        }
+
+
+# Global root result cache
+root_cache = RootResultCache()
@@ -0,0 +1,132 @@
+"""
+Per-difficulty histograms of AI search statistics.
+
+Every completed AI search (see AIExecutor.get_move) records its nodes,
+depth reached, search time, TT hit rate, beta cutoffs and effective
+branching factor, plus two numbers that separate slow moves by cause:
+- nps: searches on a contended machine run at fewer nodes per second
+- overhead_ms: time from submission to result beyond the search itself
+  (process pool IPC, a blocked event loop), queue waits excluded
+while many nodes or a high branching factor at a normal nps point at the
+search itself.
+
+Ponder searches are recorded under their own "background" level, so
+speculative work does not blur the latency of real moves.
+
+Histograms have fixed bucket bounds, so recording is O(buckets) and the
+memory use does not grow with traffic.
+"""
+
+import bisect
+import math
+from typing import Dict, List, Sequence
+
+# Upper bucket bounds per recorded value; larger values go to "+Inf"
+HISTOGRAM_BOUNDS: Dict[str, Sequence[float]] = {
+    "nodes": (100, 300, 1000, 3000, 10000, 30000, 100000, 300000, 1000000),
+    "depth": tuple(range(1, 13)),
+    "time_ms": (5, 10, 25, 50, 100, 250, 500, 1000, 2000, 5000),
+    "overhead_ms": (1, 2, 5, 10, 25, 50, 100, 250, 1000),
+    "nps": (10000, 25000, 50000, 100000, 150000, 200000, 300000, 500000),
+    "tt_hit_rate": (10, 20, 30, 40, 50, 60, 70, 80, 90, 100),
+    "cutoffs": (10, 100, 1000, 10000, 100000),
+    "branching_factor": (1.5, 2, 3, 4, 6, 8, 12, 16),
+}
+
+
+class Histogram:
+    """Counts of values in fixed buckets, with count, mean and max"""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (max for the last one)"""
+        if not self.count:
+            return 0
+        rank = max(1, math.ceil(self.count * q))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.bounds[index] if index < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self) -> dict:
+        labels = [f"{bound:g}" for bound in self.bounds] + ["+Inf"]
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 2) if self.count else 0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "max": round(self.max, 2),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class SearchMetrics:
+    """Search statistics histograms per difficulty level"""
+
+    def __init__(self):
+        self._levels: Dict[str, Dict[str, Histogram]] = {}
+
+    def record(self, difficulty: str, search_stats: List[dict], wall_ms: float) -> bool:
+        """
+        Record one move's search.
+
+        Args:
+            difficulty: Level of the search, or BACKGROUND for a ponder
+            search_stats: AILogic.get_search_stats() of each worker; a split
+                search has one per share of the root moves
+            wall_ms: Time from submission to result
+
+        Returns:
+            False for moves that were not searched (book, shortcut, solved)
+        """
+        searched = [stats for stats in search_stats if stats["depth"]]
+        if not searched:
+            return False
+        # Shares run side by side: work adds up, the move is as deep as
+        # its shallowest share and takes as long as its slowest one
+        nodes = sum(stats["nodes"] for stats in searched)
+        time_ms = max(stats["time_ms"] for stats in searched)
+        probes = sum(stats["tt_probes"] for stats in searched)
+        factors = [stats["branching_factor"] for stats in searched if stats["branching_factor"]]
+        values = {
+            "nodes": nodes,
+            "depth": min(stats["depth"] for stats in searched),
+            "time_ms": time_ms,
+            "overhead_ms": max(0.0, wall_ms - time_ms),
+            "nps": nodes / time_ms * 1000 if time_ms else 0,
+            "tt_hit_rate": sum(stats["tt_hits"] for stats in searched) / probes * 100
+            if probes else 0,
+            "cutoffs": sum(stats["cutoffs"] for stats in searched),
+        }
+        if factors:
+            values["branching_factor"] = sum(factors) / len(factors)
+
+        histograms = self._levels.get(difficulty)
+        if histograms is None:
+            histograms = self._levels[difficulty] = {
+                name: Histogram(bounds) for name, bounds in HISTOGRAM_BOUNDS.items()
+            }
+        for name, value in values.items():
+            histograms[name].record(value)
+        return True
+
+    def get_stats(self) -> dict:
+        """Get the histograms of every level that has searched"""
+        return {
+            level: {name: histogram.to_dict() for name, histogram in histograms.items()}
+            for level, histograms in self._levels.items()
+        }
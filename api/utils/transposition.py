@@ -0,0 +1,128 @@
+"""
+Fixed-size transposition table shared by the AI searches.
+
+The table is a flat array of 64-bit words, so it can live in a private
+bytearray or in shared memory used by several worker processes.
+"""
+
+from typing import Optional, Tuple
+
+
+# Transposition table bound flags
+TT_EXACT = 0
+TT_LOWER = 1  # Score is a lower bound (search failed high)
+TT_UPPER = 2  # Score is an upper bound (search failed low)
+NO_MOVE = 127
+
+
+class TranspositionTable:
+    """
+    Fixed-size transposition table backed by a flat array of 64-bit words.
+
+    Entries live in buckets of BUCKET_SIZE; each entry is two words:
+    ``key ^ data`` and ``data``, so a torn or foreign entry fails the key
+    check instead of returning a wrong score. Replacement prefers keeping
+    deeper results from the current search generation.
+
+    data layout: score + SCORE_BIAS (32 bits) | depth (8) | flag (2) |
+    best move (7) | generation (8) | valid (1)
+    """
+    
+    BUCKET_SIZE = 4
+    SCORE_BIAS = 1 << 31
+    # Header word 0 holds the search generation, so it is shared with the entries
+    HEADER_BYTES = 16
+    
+    def __init__(self, max_size: int = 1 << 16, buffer: Optional[memoryview] = None):
+        """
+        Args:
+            max_size: Number of entries (rounded down to a power-of-two bucket count)
+            buffer: Optional external buffer, e.g. shared memory, of at least
+                required_bytes(max_size) bytes; a private one is allocated otherwise
+        """
+        # Round the bucket count down to a power of two for mask indexing
+        buckets = 1 << max(0, (max_size // self.BUCKET_SIZE).bit_length() - 1)
+        self._bucket_mask = buckets - 1
+        self._max_size = buckets * self.BUCKET_SIZE
+        size = self.required_bytes(self._max_size)
+        if buffer is None:
+            buffer = memoryview(bytearray(size))
+        elif len(buffer) < size:
+            raise ValueError(f"Transposition table buffer needs {size} bytes")
+        self._buffer = memoryview(buffer)[:size]
+        self._header = self._buffer[:self.HEADER_BYTES].cast("Q")
+        self._slots = self._buffer[self.HEADER_BYTES:].cast("Q")
+        if not self._header[0]:
+            self._header[0] = 1
+    
+    @classmethod
+    def required_bytes(cls, max_size: int) -> int:
+        """Bytes needed for a table of max_size entries"""
+        return cls.HEADER_BYTES + max_size * 16
+    
+    def new_search(self):
+        """Age existing entries so they are replaced before fresh ones"""
+        self._header[0] = self._header[0] % 255 + 1
+    
+    def probe(self, key: int) -> Optional[Tuple[int, int, int, int]]:
+        """Return (score, depth, flag, move) stored for key, or None"""
+        slots = self._slots
+        base = (key & self._bucket_mask) * self.BUCKET_SIZE * 2
+        for index in range(base, base + self.BUCKET_SIZE * 2, 2):
+            data = slots[index + 1]
+            if data and slots[index] ^ data == key:
+                return (
+                    (data & 0xFFFFFFFF) - self.SCORE_BIAS,
+                    data >> 32 & 0xFF,
+                    data >> 40 & 0x3,
+                    data >> 42 & 0x7F,
+                )
+        return None
+    
+    def store(self, key: int, score: int, depth: int, flag: int, move: int = NO_MOVE):
+        """Store a search result using bucketed depth-preferred replacement"""
+        slots = self._slots
+        generation = self._header[0]
+        base = (key & self._bucket_mask) * self.BUCKET_SIZE * 2
+        victim = base
+        victim_value = None
+        for index in range(base, base + self.BUCKET_SIZE * 2, 2):
+            data = slots[index + 1]
+            if not data:
+                victim = index
+                break
+            if slots[index] ^ data == key:
+                # Same position: keep a deeper result from this search
+                if (data >> 49 & 0xFF) == generation and (data >> 32 & 0xFF) > depth:
+                    return
+                if move == NO_MOVE:
+                    move = data >> 42 & 0x7F
+                victim = index
+                break
+            # Stale generations are worth less than any current entry
+            value = (data >> 32 & 0xFF) - (256 if (data >> 49 & 0xFF) != generation else 0)
+            if victim_value is None or value < victim_value:
+                victim = index
+                victim_value = value
+        
+        data = (
+            (int(score) + self.SCORE_BIAS)
+            | min(depth, 0xFF) << 32
+            | flag << 40
+            | move << 42
+            | generation << 49
+            | 1 << 57
+        )
+        slots[victim] = key ^ data
+        slots[victim + 1] = data
+    
+    def clear(self):
+        """Clear the cache"""
+        self._buffer[:] = bytes(len(self._buffer))
+        self._header[0] = 1
+    
+    def close(self):
+        """Release views on the buffer (required before closing shared memory)"""
+        self._slots.release()
+        self._header.release()
+        self._buffer.release()
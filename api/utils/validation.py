@@ -10,6 +10,8 @@ from pydantic import validator, field_validator
 from functools import wraps
 import logging
 
+from api.utils.difficulty import DEFAULT_DIFFICULTY, DIFFICULTY_BUDGETS, normalize_difficulty
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,7 +19,7 @@ logger = logging.getLogger(__name__)
 MAX_USER_ID_LENGTH = 128
 MAX_GAME_ID_LENGTH = 64
 VALID_GAME_MODES = {"local", "remote", "ai"}
-VALID_AI_DIFFICULTIES = {"easy", "medium", "hard"}
+VALID_AI_DIFFICULTIES = set(DIFFICULTY_BUDGETS)
 VALID_PLAYERS = {"X", "O"}
 
 
@@ -90,14 +92,12 @@ def validate_game_mode(mode: str) -> str:
 def validate_ai_difficulty(difficulty: Optional[str]) -> str:
     """Validate AI difficulty level"""
     if not difficulty:
-        return "medium"  # Default
-    
-    difficulty = str(difficulty).lower().strip()
+        return DEFAULT_DIFFICULTY
     
-    if difficulty not in VALID_AI_DIFFICULTIES:
-        raise ValidationError("ai_difficulty", f"Must be one of: {', '.join(VALID_AI_DIFFICULTIES)}", difficulty)
-    
-    return difficulty
+    try:
+        return normalize_difficulty(difficulty)
+    except ValueError as e:
+        raise ValidationError("ai_difficulty", str(e), difficulty)
 
 
 def validate_player(player: str) -> str:
@@ -7,8 +7,12 @@ from typing import List, Optional
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from api.utils.ai_logic import AILogic
+from api.utils.ai_logic import (
+    AILogic, TranspositionTable, TT_EXACT, TT_LOWER, TT_UPPER, WIN_SCORE, INF_SCORE
+)
 from api.models.game import GameState, PlayerSymbol, GameMode
+from api.utils.bitboard import BitBoard, O, TIE, transform_move
+from api.utils.difficulty import DIFFICULTY_BUDGETS, get_budget
 
 def create_empty_game():
     # Create a basic empty game state manually
@@ -91,5 +95,282 @@ def test_ai_performance():
 
     print("\n AI Test Completed")
 
+def test_transposition_table():
+    print("Testing Transposition Table...")
+
+    table = TranspositionTable(max_size=64)
+    key = 0x1234_5678_9ABC_DEF0
+    assert table.probe(key) is None
+
+    table.store(key, -250, 3, TT_LOWER, 40)
+    assert table.probe(key) == (-250, 3, TT_LOWER, 40)
+    print("   Store and probe with bound flag: OK")
+
+    # A shallower result for the same search does not overwrite a deeper one
+    table.store(key, 10, 1, TT_EXACT)
+    assert table.probe(key) == (-250, 3, TT_LOWER, 40)
+    table.store(key, 10, 4, TT_UPPER)
+    assert table.probe(key) == (10, 4, TT_UPPER, 40), "Best move should be kept"
+    print("   Depth-preferred replacement: OK")
+
+    # Fill one bucket past capacity: the shallowest entry is evicted
+    bucket_keys = [key + (i << 20) * 64 for i in range(1, TranspositionTable.BUCKET_SIZE + 1)]
+    for depth, bucket_key in enumerate(bucket_keys, start=5):
+        table.store(bucket_key, depth, depth, TT_EXACT)
+    assert table.probe(key) is None
+    assert all(table.probe(k) is not None for k in bucket_keys)
+    print("   Bucket eviction: OK")
+
+    table.clear()
+    assert table.probe(bucket_keys[0]) is None
+    print("✅ Transposition Table Tests Passed!")
+
+
+def test_hard_search_finds_board_win():
+    ai = AILogic(difficulty="hard")
+    game = create_empty_game()
+    game.current_player = PlayerSymbol.O
+    game.active_board = 3
+    # O threatens board 3 via cells 0-1; X is forced elsewhere afterwards
+    game.global_board[3][0] = PlayerSymbol.O
+    game.global_board[3][1] = PlayerSymbol.O
+    game.global_board[3][4] = PlayerSymbol.X
+    game.global_board[5][4] = PlayerSymbol.X
+    moves = [(3, c) for c in range(9) if game.global_board[3][c] is None]
+
+    assert ai._get_iterative_deepening_move(game, moves) == (3, 2)
+    assert ai._nodes_evaluated > 0
+
+
+def test_pvs_matches_plain_minimax():
+    print("\nTesting PVS and aspiration windows against plain minimax...")
+
+    import random
+
+    def plain_minimax(ai, position, depth, maximizing):
+        winner = position.winner()
+        if winner == TIE:
+            return 0
+        if winner is not None:
+            return WIN_SCORE + depth if winner == ai._ai else -WIN_SCORE - depth
+        if depth == 0:
+            return ai._evaluate_position(position)
+        scores = []
+        for move in position.legal_moves():
+            position.play(move)
+            scores.append(plain_minimax(ai, position, depth - 1, not maximizing))
+            position.undo()
+        return max(scores) if maximizing else min(scores)
+
+    rng = random.Random(4)
+    for _ in range(6):
+        position = BitBoard()
+        for _ in range(rng.randint(8, 20)):
+            position.play(rng.choice(position.legal_moves()))
+        if position.winner() is not None:
+            continue
+        position.side = 1
+        position.zobrist = position.compute_zobrist()
+
+        # Static leaves, as in the reference
+        ai = AILogic(difficulty="hard", max_time=60, max_depth=3, quiescence_nodes=0)
+        iterations = ai.search_root(position, position.legal_moves())
+        depth, move, score = iterations[-1]
+
+        # Root moves search depth + 1 plies: root move plus `depth` replies
+        reference = AILogic(difficulty="hard")
+        expected = max(
+            _score_after(reference, position, root_move, depth, plain_minimax)
+            for root_move in position.legal_moves()
+        )
+        assert score == expected, f"PVS score {score} != minimax {expected}"
+        assert _score_after(reference, position, move, depth, plain_minimax) == expected
+
+    stats = ai.get_search_stats()
+    assert stats["cutoffs"] > 0 and 0 < stats["first_move_cutoff_rate"] <= 100
+    print(f"   Cutoff rate: {stats['cutoff_rate']}%, first move: {stats['first_move_cutoff_rate']}%")
+    print("✅ PVS Tests Passed!")
+
+
+def test_deadline_inside_iteration():
+    print("\nTesting deadline checks inside an iteration...")
+
+    # Free move over edge cells only: deep iterations cannot finish in time
+    game = create_empty_game()
+    game.current_player = PlayerSymbol.O
+    moves = [(b, c) for b in range(9) for c in (1, 3, 5, 7)]
+
+    ai = AILogic(difficulty="hard", max_time=0.1, max_depth=12)
+    start_time = time.time()
+    move = ai._get_iterative_deepening_move(game, moves)
+    duration = time.time() - start_time
+
+    assert move in moves
+    stats = ai.get_search_stats()
+    assert stats["aborted_iterations"] == 1, "Running iteration should be abandoned"
+    assert 1 <= stats["depth"] < 12
+    assert stats["time_ms"] <= duration * 1000
+    assert duration < 0.3, f"Search overran its deadline: {duration:.3f}s"
+    print(f"   Depth {stats['depth']} in {stats['time_ms']}ms: OK")
+
+    # A stop request aborts just as promptly and leaves the position intact
+    position = BitBoard.from_game_state(game, side=1)
+    key = position.key()
+    calls = []
+    ai = AILogic(difficulty="hard", max_time=60, max_depth=12,
+                 should_stop=lambda: calls.append(1) or len(calls) > 5)
+    iterations = ai.search_root(position, position.legal_moves())
+    assert iterations and position.key() == key and position.undo_depth() == 0
+    print("✅ Deadline Tests Passed!")
+
+
+def test_difficulty_budgets():
+    print("\nTesting difficulty budgets...")
+
+    from pydantic import ValidationError
+    from api.models.game import GameCreateRequest
+
+    assert GameCreateRequest(mode="ai", ai_difficulty=" Hard ").ai_difficulty == "hard"
+    assert GameCreateRequest(mode="ai", ai_difficulty=None).ai_difficulty == "medium"
+    try:
+        GameCreateRequest(mode="ai", ai_difficulty="impossible")
+        assert False, "Unknown difficulty should be rejected"
+    except ValidationError:
+        pass
+    print("   Request validation: OK")
+
+    # Edge cells only, so no level can shortcut the search
+    game = create_empty_game()
+    game.current_player = PlayerSymbol.O
+    moves = [(b, c) for b in range(9) for c in (1, 3, 5, 7)]
+    for difficulty, budget in DIFFICULTY_BUDGETS.items():
+        ai = AILogic(difficulty=difficulty, opening_book=None)
+        assert ai.get_next_move(game, moves) in moves
+        stats = ai.get_search_stats()
+        # Budget checks run every 1024 nodes; depth 1 always completes
+        assert stats["nodes"] <= max(budget.max_nodes, 81 * 10) + 1024, (difficulty, stats)
+        assert stats["depth"] <= budget.max_depth
+        print(f"   {difficulty}: {stats['nodes']} nodes, depth {stats['depth']}: OK")
+
+    # Noisy levels sample from the root scores: a lost move is never chosen
+    ai = AILogic(difficulty="medium")
+    ai._root_scores = [(10, 0), (20, -WIN_SCORE), (30, -5)]
+    picks = {ai._sample_root_move() for _ in range(200)}
+    assert picks == {10, 30}, f"Unexpected sample {picks}"
+    print("   Root score sampling: OK")
+
+    # Hard no longer plays an open center without searching
+    game.active_board = 4
+    game.move_count = 10
+    ai = AILogic(difficulty="hard")
+    ai.get_next_move(game, [(4, c) for c in range(9)])
+    assert ai.get_search_stats()["nodes"] > 0
+    assert get_budget(None) is DIFFICULTY_BUDGETS["medium"]
+    print("✅ Difficulty Budget Tests Passed!")
+
+
+def test_symmetric_table_entries():
+    print("\nTesting symmetric transpositions in the table...")
+
+    import api.utils.ai_logic as ai_logic
+
+    # After a center opening, rotated replies lead to the same positions
+    position = BitBoard()
+    position.play(40)
+    results = {}
+    for max_stones in (0, ai_logic.CANONICAL_MAX_STONES):
+        ai_logic.CANONICAL_MAX_STONES, saved = max_stones, ai_logic.CANONICAL_MAX_STONES
+        try:
+            ai = AILogic(difficulty="hard", max_time=60, max_depth=4, max_nodes=float("inf"))
+            depth, move, score = ai.search_root(position, position.legal_moves())[-1]
+        finally:
+            ai_logic.CANONICAL_MAX_STONES = saved
+        results[max_stones] = (score, ai.get_search_stats()["nodes"])
+    (plain_score, plain_nodes), (score, nodes) = results.values()
+    assert score == plain_score
+    assert nodes < plain_nodes, f"{nodes} nodes with canonical keys, {plain_nodes} without"
+    print(f"   {plain_nodes} -> {nodes} nodes, same score: OK")
+
+    # A mirrored game finds the entries of the original one
+    table = TranspositionTable(1 << 16)
+    searcher = AILogic(difficulty="hard", transposition_table=table, max_time=60, max_depth=3,
+                       max_nodes=float("inf"))
+    depth, move, score = searcher.search_root(position, position.legal_moves())[-1]
+    mirrored = BitBoard()
+    mirrored.play(40)
+    mirrored.play(transform_move(36, 4))
+    original = BitBoard()
+    original.play(40)
+    original.play(36)
+    assert mirrored.canonical_key()[0] == original.canonical_key()[0]
+    assert table.probe(mirrored.canonical_key()[0]) is not None
+    print("   Mirrored game finds the entries: OK")
+
+    # Another AILogic on the table (as after a parallel search) reads the same line
+    pv = searcher.principal_variation(position, move, depth + 1)
+    assert len(pv) > 2
+    assert AILogic(transposition_table=table).principal_variation(position, move, depth + 1) == pv
+    print(f"   Line {pv} read back by a fresh search: OK")
+    print("✅ Symmetric Table Tests Passed!")
+
+
+def test_quiescence_extension():
+    print("\nTesting the quiescence extension...")
+
+    # O can win board 0 at cell 2 and must block X at cell 5
+    position = BitBoard.from_string("OO.XX...." + "." * 72, active_board=0, side=O)
+    ai = AILogic(difficulty="hard")
+    assert ai._tactical_moves(position) == ([2, 5], False)
+    ai._quiescence_left = 16
+    static = ai._evaluate_position(position)
+    assert ai._quiescence(position, True, -INF_SCORE, INF_SCORE) > static
+    print("   Pending board win counted at the leaf: OK")
+
+    # O's only move sends X to board 8, which X wins at once
+    position = BitBoard.from_string(
+        "XOXXOOOX." + "." * 63 + "XX.......", active_board=0, side=O
+    )
+    assert ai._tactical_moves(position) == ([8], True)
+    ai._quiescence_left = 16
+    static = ai._evaluate_position(position)
+    assert ai._quiescence(position, True, -INF_SCORE, INF_SCORE) < static
+    print("   Forced move into a lost board: OK")
+
+    # O's only move (cell 4) targets the decided board 4, so X goes to the
+    # first open board: board 1, quiet, unless X can win it
+    decided = "OOO......"
+    for board_1, forced in (("." * 9, False), ("XX.......", True)):
+        position = BitBoard.from_string(
+            "XOXO.OXOX" + board_1 + "." * 18 + decided + "." * 27 + "XX.......",
+            active_board=0, side=O,
+        )
+        assert ai._tactical_moves(position) == ([4], forced)
+    print("   Redirect to the first open board: OK")
+
+    # The extension has its own node cap, and can be switched off
+    position = BitBoard.from_string("OO.XX...." + "." * 72, active_board=0, side=O)
+    ai = AILogic(difficulty="hard", max_time=60, max_depth=2)
+    ai.search_root(position, position.legal_moves())
+    assert ai.get_search_stats()["quiescence_nodes"] > 0
+    ai = AILogic(difficulty="hard", max_time=60, max_depth=2, quiescence_nodes=0)
+    ai.search_root(position, position.legal_moves())
+    assert ai.get_search_stats()["quiescence_nodes"] == 0
+    print("✅ Quiescence Tests Passed!")
+
+
+def _score_after(ai, position, move, depth, plain_minimax):
+    position.play(move)
+    score = plain_minimax(ai, position, depth, False)
+    position.undo()
+    return score
+
+
 if __name__ == "__main__":
     test_ai_performance()
+    test_transposition_table()
+    test_hard_search_finds_board_win()
+    test_pvs_matches_plain_minimax()
+    test_deadline_inside_iteration()
+    test_difficulty_budgets()
+    test_symmetric_table_entries()
+    test_quiescence_extension()
@@ -0,0 +1,225 @@
+"""
+Tests for the per-game AI engine registry.
+"""
+
+import sys
+import os
+import asyncio
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.models.game import GameState, GameMode, PlayerSymbol
+from api.utils import ai_engines
+from api.utils.ai_engines import AIEngineRegistry
+from api.utils.ai_executor import AIExecutor
+from api.utils.bitboard import ANY_BOARD, BitBoard
+
+
+def test_registry_lru_and_cleanup():
+    print("Testing engine registry...")
+
+    # 1 MB budget with 16K-entry tables (256 KB plus a header): three fit
+    registry = AIEngineRegistry(memory_limit_mb=1, table_entries=1 << 14)
+    assert registry.max_engines == 3
+
+    first = registry.get("game_1")
+    assert registry.get("game_1") is first, "Same game should reuse its engine"
+    registry.get("game_2")
+    registry.get("game_3")
+    registry.get("game_1")  # game_2 is now least recently used
+    registry.get("game_4")
+
+    stats = registry.get_stats()
+    assert stats["engines"] == 3 and stats["evicted"] == 1
+    assert registry.get("game_1") is first
+    print("   LRU eviction: OK")
+
+    assert registry.remove("game_1") and first.closed
+    assert not registry.remove("game_1")
+    assert registry.prune(["game_3"]) == 1
+    assert registry.get_stats()["engines"] == 1
+    registry.clear()
+    assert registry.get_stats()["engines"] == 0
+
+    # Without room in /dev/shm the game searches without an engine
+    has_room = ai_engines.shm_has_room
+    ai_engines.shm_has_room = lambda nbytes: False
+    try:
+        assert registry.get("game_5") is None
+    finally:
+        ai_engines.shm_has_room = has_room
+    assert registry.get_stats()["shm_full"] == 1 and registry.get_stats()["engines"] == 0
+    assert ai_engines.shm_has_room(1024)
+    print("   No engine when shared memory is short: OK")
+    print("✅ Engine Registry Tests Passed!")
+
+
+def test_engine_reused_across_moves():
+    """Test consecutive searches sharing a game engine using asyncio.run"""
+    asyncio.run(_test_engine_reused_async())
+
+
+async def _test_engine_reused_async():
+    print("\nTesting engine reuse across moves...")
+
+    registry = AIEngineRegistry(memory_limit_mb=4, table_entries=1 << 14)
+    executor = AIExecutor(max_workers=1, max_pending=2, search_workers=1, result_cache=None)
+    await executor.start()
+    try:
+        game = GameState(
+            id="test_game",
+            mode=GameMode.AI,
+            ai_difficulty="hard",
+            current_player=PlayerSymbol.O,
+        )
+        # Free move over edge cells only, so the position is searched
+        moves = [(b, c) for b in range(9) for c in (1, 3, 5, 7)]
+        engine = registry.get(game.id)
+
+        move = await executor.get_move(game, moves, "hard", time_limit=0.2, engine=engine)
+        assert move in moves
+        assert engine.searches == 1
+        assert engine.pv[0] == move[0] * 9 + move[1]
+        assert len(engine.pv) >= 2, "Search should leave an expected reply"
+        print("   Principal variation stored: OK")
+
+        # The worker filled the game's table in shared memory
+        position = BitBoard.from_game_state(game, side=1)
+        position.play(engine.pv[0])
+        # Opening positions are stored under their canonical key
+        assert engine.table.probe(position.canonical_key()[0]) is not None
+        print("   Shared game table filled: OK")
+
+        # Second move of the same game reuses the engine
+        position.play(engine.pv[1])
+        board_idx, cell_idx = divmod(engine.pv[0], 9)
+        game.global_board[board_idx][cell_idx] = PlayerSymbol.O
+        board_idx, cell_idx = divmod(engine.pv[1], 9)
+        game.global_board[board_idx][cell_idx] = PlayerSymbol.X
+        game.active_board = position.active if position.active >= 0 else None
+        moves = [divmod(m, 9) for m in position.legal_moves()]
+        move = await executor.get_move(game, moves, "hard", time_limit=0.2, engine=engine)
+        assert move in moves and engine.searches == 2
+        print("   Second search: OK")
+    finally:
+        await executor.stop()
+        registry.clear()
+
+    print("✅ Engine Reuse Tests Passed!")
+
+
+def game_from_position(position, move_count):
+    return GameState(
+        id="test_game",
+        mode=GameMode.AI,
+        ai_difficulty="hard",
+        global_board=position.to_global_board(),
+        active_board=None if position.active == ANY_BOARD else position.active,
+        current_player=PlayerSymbol.X if position.side == 0 else PlayerSymbol.O,
+        move_count=move_count,
+    )
+
+
+def test_ponder_hit_and_miss():
+    """Test pondering on the expected reply using asyncio.run"""
+    asyncio.run(_test_ponder_async())
+
+
+async def _test_ponder_async():
+    print("\nTesting pondering...")
+
+    registry = AIEngineRegistry(memory_limit_mb=4, table_entries=1 << 14)
+    executor = AIExecutor(max_workers=1, max_pending=4, search_workers=1, result_cache=None)
+    await executor.start()
+    try:
+        # Edge cells only on a free move, so the position is searched
+        game = GameState(
+            id="test_game",
+            mode=GameMode.AI,
+            ai_difficulty="hard",
+            current_player=PlayerSymbol.O,
+        )
+        engine = registry.get(game.id)
+        moves = [(b, c) for b in range(9) for c in (1, 3, 5, 7)]
+        await executor.get_move(game, moves, "hard", time_limit=0.2, engine=engine)
+        assert len(engine.pv) >= 2
+
+        # AI plays its move; ponder on the expected reply
+        position = BitBoard.from_game_state(game, side=1)
+        position.play(engine.pv[0])
+        after_ai = game_from_position(position, 1)
+        expected_reply = engine.pv[1]
+        pv = engine.pv
+        assert executor.start_ponder(after_ai, engine, "hard", time_limit=0.2)
+
+        position.play(expected_reply)
+        move = await executor.take_ponder(game_from_position(position, 2))
+        assert move in [divmod(m, 9) for m in position.legal_moves()]
+        print("   Ponder hit: OK")
+
+        # A different reply cancels the ponder
+        position.undo()
+        engine.pv = pv  # The hit replaced it with the pondered line
+        assert executor.start_ponder(after_ai, engine, "hard", time_limit=0.2)
+        other_reply = next(m for m in position.legal_moves() if m != expected_reply)
+        position.play(other_reply)
+        assert await executor.take_ponder(game_from_position(position, 2)) is None
+        print("   Ponder miss: OK")
+
+        # A ponder that finished keeps its line apart until it is used
+        assert executor.start_ponder(after_ai, engine, "hard", time_limit=0.2)
+        await executor._ponders[game.id][1]
+        assert engine.pv == pv and engine.ponder_pv
+        assert await executor.take_ponder(game_from_position(position, 2)) is None
+        assert engine.pv == pv
+        print("   Finished ponder leaves the game's line: OK")
+
+        # A failed ponder is a miss, so the caller falls back to a normal search
+        get_move = executor.get_move
+
+        async def crashed_search(*args, **kwargs):
+            raise RuntimeError("worker crashed")
+
+        executor.get_move = crashed_search
+        try:
+            assert executor.start_ponder(after_ai, engine, "hard", time_limit=0.2)
+        finally:
+            executor.get_move = get_move
+        position.undo()
+        position.play(expected_reply)
+        assert await executor.take_ponder(game_from_position(position, 2)) is None
+        print("   Failed ponder: OK")
+
+        # A real move finding the only worker pondering takes it over
+        engine.pv = pv
+        assert executor.start_ponder(after_ai, engine, "hard", time_limit=5.0)
+        await asyncio.sleep(0.1)
+        assert executor.scheduler.running == 1
+        other = game.model_copy(update={"id": "other_game"})
+        assert await executor.get_move(other, moves, "hard", time_limit=0.2) in moves
+        # It only waited for the worker to notice the cancel, not for the ponder
+        hard = executor.scheduler.get_stats()["levels"]["hard"]
+        assert hard["max_wait_ms"] < 200, hard
+        print("   Ponder preempted by a real move: OK")
+
+        ponder = executor.get_stats()["ponder"]
+        assert ponder["started"] == 5 and ponder["hits"] == 1 and ponder["misses"] == 3
+        assert ponder["preempted"] == 1 and ponder["active"] == 0
+
+        # Ponders are kept out of the real moves' histograms
+        metrics = executor.search_metrics.get_stats()
+        assert metrics["hard"]["nodes"]["count"] == 2
+        assert metrics["background"]["nodes"]["count"] == 2
+        print("   Ponders recorded apart from real moves: OK")
+    finally:
+        await executor.stop()
+        registry.clear()
+
+    print("✅ Ponder Tests Passed!")
+
+
+if __name__ == "__main__":
+    test_registry_lru_and_cleanup()
+    test_engine_reused_across_moves()
+    test_ponder_hit_and_miss()
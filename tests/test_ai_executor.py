@@ -0,0 +1,237 @@
+"""
+Tests for the AI process pool executor.
+"""
+
+import sys
+import os
+import asyncio
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.models.game import GameState, GameMode, PlayerSymbol
+from api.utils.ai_executor import AIExecutor
+from api.utils.bitboard import BitBoard, O, transform_move
+from api.utils.root_cache import RootResult, RootResultCache
+
+
+def create_game():
+    game = GameState(
+        id="test_game",
+        mode=GameMode.AI,
+        ai_difficulty="hard",
+        current_player=PlayerSymbol.O,
+        active_board=4,
+    )
+    game.global_board[4][4] = PlayerSymbol.X
+    return game
+
+
+def test_process_pool_move():
+    """Test moves computed in worker processes using asyncio.run"""
+    asyncio.run(_test_process_pool_move_async())
+
+
+async def _test_process_pool_move_async():
+    print("Testing AI Executor (process pool)...")
+
+    executor = AIExecutor(max_workers=2, max_pending=4, result_cache=None)
+    await executor.start()
+    try:
+        game = create_game()
+        moves = [(4, c) for c in range(9) if c != 4]
+
+        results = await asyncio.gather(*[
+            executor.get_move(game, moves, "hard", time_limit=0.2) for _ in range(3)
+        ])
+        assert all(move in moves for move in results), f"Illegal move in {results}"
+        print("   Concurrent searches: OK")
+
+        stats = executor.get_stats()
+        assert stats["workers"] == 2
+        assert stats["completed"] == 3
+        assert stats["in_flight"] == 0
+        print("   Stats: OK")
+    finally:
+        await executor.stop()
+
+    print("✅ Process Pool Tests Passed!")
+
+
+def test_parallel_root_search():
+    """Test a hard search split across workers using asyncio.run"""
+    asyncio.run(_test_parallel_root_search_async())
+
+
+async def _test_parallel_root_search_async():
+    print("\nTesting AI Executor parallel search...")
+
+    executor = AIExecutor(max_workers=2, max_pending=2, search_workers=2,
+                          shared_table_entries=1 << 14, result_cache=None)
+    await executor.start()
+    try:
+        # Free move over edge cells only, so the root is searched
+        game = create_game()
+        game.active_board = None
+        moves = [(b, c) for b in range(9) for c in (1, 3, 5, 7) if (b, c) != (4, 4)]
+
+        move = await executor.get_move(game, moves, "hard", time_limit=0.3)
+        assert move in moves, f"Illegal move {move}"
+
+        stats = executor.get_stats()
+        assert stats["parallel_searches"] == 1
+        assert stats["in_flight"] == 0
+        print("   Split root search: OK")
+
+        # Endgames are solved in one worker, so they only take one unit
+        requested = []
+        acquire = executor.scheduler.acquire
+
+        async def recording_acquire(key, level, units=1, **kwargs):
+            requested.append(units)
+            return await acquire(key, level, units, **kwargs)
+
+        executor.scheduler.acquire = recording_acquire
+        X, O, _ = PlayerSymbol.X, PlayerSymbol.O, None
+        endgame = create_game()
+        endgame.active_board = 8
+        for board_idx in range(4):
+            endgame.global_board[board_idx] = [X] * 9
+        for board_idx in range(4, 8):
+            endgame.global_board[board_idx] = [O] * 9
+        endgame.global_board[8] = [O, O, _, X, X, _, _, _, _]
+        endgame_moves = [(8, c) for c in (2, 5, 6, 7, 8)]
+        assert await executor.get_move(endgame, endgame_moves, "hard") == (8, 2)
+        assert requested == [1] and executor.get_stats()["parallel_searches"] == 1
+
+        # Immediate wins are answered without a worker
+        game.global_board[0][:2] = [O, O]
+        win_moves = [move for move in moves if move != (0, 1)] + [(0, 2)]
+        assert await executor.get_move(game, win_moves, "hard") == (0, 2)
+        assert requested == [1]
+        print("   Endgames and shortcut moves skip the split: OK")
+    finally:
+        await executor.stop()
+
+    assert executor._shared_memory is None, "Shared table should be released"
+    print("✅ Parallel Search Tests Passed!")
+
+
+def test_thread_fallback_and_bounded_queue():
+    """Test the fallback path and submission bound using asyncio.run"""
+    asyncio.run(_test_thread_fallback_async())
+
+
+async def _test_thread_fallback_async():
+    print("\nTesting AI Executor fallback and bounds...")
+
+    # Not started: searches run on the default thread executor
+    executor = AIExecutor(max_workers=0, max_pending=1, deadline_grace=0.01, result_cache=None)
+    game = create_game()
+    moves = [(4, c) for c in range(9) if c != 4]
+
+    move = await executor.get_move(game, moves, "medium", time_limit=0.2)
+    assert move in moves
+    print("   Thread fallback: OK")
+
+    # Free move over edge cells only: no shortcut, hard mode searches its whole budget
+    game.active_board = None
+    moves = [(b, c) for b in range(9) for c in (1, 3, 5, 7)]
+
+    # The only slot is taken, so a second request times out waiting for it
+    first = asyncio.create_task(executor.get_move(game, moves, "hard", time_limit=0.3))
+    await asyncio.sleep(0)
+    try:
+        await executor.get_move(game, moves, "hard", time_limit=0.0)
+        assert False, "Should have timed out waiting for a slot"
+    except asyncio.TimeoutError:
+        pass
+    assert executor.get_stats()["rejected"] == 1
+    try:
+        assert (await first) in moves
+    except asyncio.TimeoutError:
+        pass  # Search overran its own deadline and was cancelled
+    print("   Bounded queue: OK")
+
+    # A failed submission hands its slot and unit back
+    def broken_submit(*args, **kwargs):
+        raise RuntimeError("pool is broken")
+
+    submit, executor._submit_single = executor._submit_single, broken_submit
+    try:
+        await executor.get_move(game, moves, "hard", time_limit=0.3)
+        assert False, "Submission error should propagate"
+    except RuntimeError:
+        pass
+    finally:
+        executor._submit_single = submit
+    assert executor.scheduler.running == 0 and len(executor._free_slots) == 1
+    assert await executor.get_move(game, moves, "medium", time_limit=0.2) in moves
+    print("   Failed submission releases its slot: OK")
+    print("✅ Fallback and Bound Tests Passed!")
+
+
+def test_shared_root_results():
+    """Test root results shared across games and symmetries using asyncio.run"""
+    asyncio.run(_test_shared_root_results_async())
+
+
+def opening_game(game_id, symmetry):
+    """A line past the opening book, mapped by a symmetry; O to move"""
+    game = GameState(id=game_id, mode=GameMode.AI, current_player=PlayerSymbol.O, move_count=5)
+    for number, move in enumerate((1 * 9 + 3, 3 * 9 + 7, 7 * 9 + 1, 1 * 9 + 5, 5 * 9 + 0)):
+        board_idx, cell_idx = divmod(transform_move(move, symmetry), 9)
+        game.global_board[board_idx][cell_idx] = PlayerSymbol.O if number % 2 else PlayerSymbol.X
+    game.active_board = cell_idx
+    return game, [(cell_idx, c) for c in range(9) if not game.global_board[cell_idx][c]]
+
+
+async def _test_shared_root_results_async():
+    print("\nTesting shared root results...")
+
+    cache = RootResultCache()
+    executor = AIExecutor(max_workers=0, result_cache=cache)
+    game, moves = opening_game("game_1", 0)
+    # A search cut short by its time limit is not shared
+    await executor.get_move(game, moves, "hard", time_limit=0.05)
+    assert cache.get_stats()["stores"] == 0
+    board_idx, cell_idx = await executor.get_move(game, moves, "hard")
+    assert executor.get_stats()["submitted"] == 2 and cache.get_stats()["stores"] == 1
+
+    # Another game in a mirror image of the position plays the mirrored move unsearched
+    mirrored, mirrored_moves = opening_game("game_2", 4)
+    move = await executor.get_move(mirrored, mirrored_moves, "hard")
+    assert move == divmod(transform_move(board_idx * 9 + cell_idx, 4), 9)
+    assert executor.get_stats()["submitted"] == 2
+    print("   Mirror image answered from the cache: OK")
+
+    # Noisy levels keep their own entries and still sample from the root scores
+    for _ in range(3):
+        assert await executor.get_move(game, moves, "medium") in moves
+    assert executor.get_stats()["submitted"] == 3
+
+    # A different set of legal moves is a different position
+    position = BitBoard.from_game_state(game, side=O)
+    root_moves = [b * 9 + c for b, c in moves]
+    assert cache.lookup(position, "hard", root_moves[1:]) is None
+    # Entries below the requested depth are not served
+    assert cache.lookup(position, "hard", root_moves, min_depth=9) is None
+    stats = cache.get_stats()
+    assert stats["entries"] == 2 and stats["hits"] == 3 and stats["misses"] == 5
+    print(f"   {stats['hits']} hits, {stats['memory_kb']} KB: OK")
+
+    # Shallower results never replace deeper ones, and memory is bounded
+    shallow = RootResult(1, ((root_moves[0], 0),))
+    assert not cache.store(position, "hard", root_moves, shallow)
+    small = RootResultCache(max_mb=1 / 1024)
+    for difficulty in ("easy", "medium", "hard"):
+        small.store(position, difficulty, root_moves, shallow)
+    assert small.get_stats()["entries"] == 1 and small.get_stats()["evictions"] == 2
+    print("✅ Shared Root Result Tests Passed!")
+
+
+if __name__ == "__main__":
+    test_process_pool_move()
+    test_parallel_root_search()
+    test_thread_fallback_and_bounded_queue()
+    test_shared_root_results()
@@ -0,0 +1,101 @@
+"""
+Tests for cancellable AI move jobs.
+"""
+
+import sys
+import os
+import asyncio
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.models.game import GameState, GameMode, PlayerSymbol
+from api.utils.ai_executor import AIExecutor
+from api.utils.ai_jobs import AIJobRegistry
+
+
+def test_job_lifecycle():
+    """Test starting, finishing, replacing and cancelling jobs using asyncio.run"""
+    asyncio.run(_test_job_lifecycle_async())
+
+
+async def _test_job_lifecycle_async():
+    print("Testing AI job lifecycle...")
+
+    jobs = AIJobRegistry()
+    applied = []
+
+    async def move(game_id, move_count, delay):
+        await asyncio.sleep(delay)
+        if jobs.finish(game_id, move_count):
+            applied.append((game_id, move_count))
+
+    jobs.start("game_1", 1, move("game_1", 1, 0.01))
+    assert jobs.is_current("game_1", 1) and not jobs.is_current("game_1", 3)
+    await asyncio.sleep(0.05)
+    assert applied == [("game_1", 1)] and jobs.get_job("game_1") is None
+    print("   Finished job applied: OK")
+
+    # A reset cancels the running job; nothing is applied
+    task = jobs.start("game_1", 3, move("game_1", 3, 10))
+    assert jobs.cancel("game_1", "reset")
+    await asyncio.gather(task, return_exceptions=True)
+    assert task.cancelled() and applied == [("game_1", 1)]
+    assert not jobs.cancel("game_1", "reset")
+
+    # A new job replaces the old one, and cleanup cancels jobs of removed games
+    first = jobs.start("game_2", 1, move("game_2", 1, 10))
+    second = jobs.start("game_2", 1, move("game_2", 1, 10))
+    jobs.start("game_3", 1, move("game_3", 1, 10))
+    assert jobs.prune(["game_3"]) == 1
+    await asyncio.gather(first, second, return_exceptions=True)
+    assert first.cancelled() and second.cancelled()
+    assert jobs.cancel("game_3", "leave")
+
+    stats = jobs.get_stats()
+    assert stats["started"] == 5 and stats["completed"] == 1 and stats["active"] == 0
+    assert stats["cancelled_by_reason"] == {
+        "reset": 1, "superseded": 1, "cleanup": 1, "leave": 1
+    }
+    assert stats["cancelled_time_ms"] > 0
+    print("✅ Job Lifecycle Tests Passed!")
+
+
+def test_cancelled_search_cpu():
+    """Test that a cancelled search stops and its CPU is counted using asyncio.run"""
+    asyncio.run(_test_cancelled_search_cpu_async())
+
+
+async def _test_cancelled_search_cpu_async():
+    print("\nTesting cancelled AI searches...")
+
+    executor = AIExecutor(max_workers=0, result_cache=None)
+    jobs = AIJobRegistry()
+    game = GameState(
+        id="test_game", mode=GameMode.AI, ai_difficulty="hard", current_player=PlayerSymbol.O
+    )
+    game.global_board[4][4] = PlayerSymbol.X
+    # Free move over edge cells only: no shortcut, hard mode searches its whole budget
+    moves = [(b, c) for b in range(9) for c in (1, 3, 5, 7)]
+
+    task = jobs.start(game.id, 1, executor.get_move(game, moves, "hard", time_limit=5.0))
+    await asyncio.sleep(0.2)
+    jobs.cancel(game.id, "leave")
+    await asyncio.gather(task, return_exceptions=True)
+    assert task.cancelled()
+
+    # The worker stops at its next budget check and hands its slot back
+    for _ in range(100):
+        if not executor.scheduler.running:
+            break
+        await asyncio.sleep(0.01)
+    stats = executor.get_stats()
+    assert executor.scheduler.running == 0 and stats["in_flight"] == 0
+    assert stats["cancelled"] == 1 and 200 <= stats["cancelled_cpu_ms"] < 2000, stats
+    print(f"   {stats['cancelled_cpu_ms']} ms of CPU abandoned: OK")
+    print("✅ Cancelled Search Tests Passed!")
+
+
+if __name__ == "__main__":
+    test_job_lifecycle()
+    test_cancelled_search_cpu()
@@ -0,0 +1,146 @@
+"""
+Tests for the AI search scheduler.
+"""
+
+import sys
+import os
+import asyncio
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.utils.ai_scheduler import ANALYSIS, BACKGROUND, AIOverloadedError, AIScheduler
+
+
+async def _queue(scheduler, order, key, level, units=1):
+    grant = await scheduler.acquire(key, level, units)
+    order.append((key, level))
+    return grant
+
+
+def test_fair_order():
+    """Test round robin across games and priority across levels using asyncio.run"""
+    asyncio.run(_test_fair_order_async())
+
+
+async def _test_fair_order_async():
+    print("Testing scheduler order...")
+
+    scheduler = AIScheduler(capacity=1, degrade_wait=60)
+    first = await scheduler.acquire("busy", "hard")
+    assert first.units == 1 and first.scale == 1.0 and scheduler.running == 1
+
+    order = []
+    tasks = [
+        asyncio.create_task(_queue(scheduler, order, key, level))
+        for key, level in [
+            ("batch", "hard"), ("batch", "hard"), ("batch", "hard"),
+            ("game", "hard"), ("ponder", BACKGROUND), ("easy", "easy"),
+        ]
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.queued == 6
+    assert scheduler.get_stats()["levels"]["hard"]["queued"] == 4
+
+    scheduler.release(first.units)
+    for _ in tasks:
+        await asyncio.sleep(0)
+        scheduler.release(1)
+    await asyncio.gather(*tasks)
+
+    # Cheap level first, games alternate within a level, background last
+    assert order == [
+        ("easy", "easy"), ("batch", "hard"), ("game", "hard"), ("batch", "hard"),
+        ("batch", "hard"), ("ponder", BACKGROUND),
+    ], order
+    assert scheduler.running == 0 and scheduler.queued == 0
+    print("✅ Order Tests Passed!")
+
+
+def test_degradation_and_admission():
+    """Test budget degradation, timeouts and the queue bound using asyncio.run"""
+    asyncio.run(_test_degradation_async())
+
+
+async def _test_degradation_async():
+    print("\nTesting degradation and admission control...")
+
+    scheduler = AIScheduler(capacity=2, max_queued=2, degrade_wait=0.05, min_scale=0.25)
+    # A parallel search asks for more units than are free and gets the rest
+    assert (await scheduler.acquire("a", "hard", units=1)).units == 1
+    parallel = await scheduler.acquire("b", "hard", units=4)
+    assert parallel.units == 1 and scheduler.running == 2
+
+    waiting = asyncio.create_task(scheduler.acquire("c", "medium"))
+    await asyncio.sleep(0.2)
+    scheduler.release(1)
+    grant = await waiting
+    assert grant.wait >= 0.2 and grant.scale == 0.25, grant
+    print(f"   Waited {grant.wait * 1000:.0f} ms, budget x{grant.scale}: OK")
+
+    # Timed out waiters leave the queue
+    try:
+        await scheduler.acquire("d", "easy", timeout=0.01)
+        assert False, "Should have timed out"
+    except asyncio.TimeoutError:
+        pass
+    assert scheduler.queued == 0
+
+    # Beyond max_queued new searches are refused at once
+    queued = [asyncio.create_task(scheduler.acquire(key, "easy")) for key in "ef"]
+    await asyncio.sleep(0)
+    try:
+        await scheduler.acquire("g", "easy")
+        assert False, "Should have been refused"
+    except AIOverloadedError:
+        pass
+    for task in queued:
+        task.cancel()
+    await asyncio.gather(*queued, return_exceptions=True)
+    assert scheduler.queued == 0
+
+    stats = scheduler.get_stats()
+    assert stats["levels"]["medium"]["degraded"] == 1
+    assert stats["levels"]["medium"]["max_wait_ms"] >= 200
+    assert stats["levels"]["easy"]["timeouts"] == 1
+    assert stats["levels"]["easy"]["rejected"] == 1
+    print("✅ Degradation and Admission Tests Passed!")
+
+
+def test_reserved_units():
+    """Test that analysis leaves units for game moves using asyncio.run"""
+    asyncio.run(_test_reserved_units_async())
+
+
+async def _test_reserved_units_async():
+    print("\nTesting units reserved for game moves...")
+
+    scheduler = AIScheduler(capacity=3, reserved=1)
+    # A batch asks for more chunks than its share; the rest wait
+    chunks = [await scheduler.acquire("batch", ANALYSIS) for _ in range(2)]
+    waiting = asyncio.create_task(scheduler.acquire("batch", ANALYSIS))
+    await asyncio.sleep(0)
+    assert scheduler.analysis_running == 2 and scheduler.queued == 1
+
+    # A hard move arriving mid-batch is admitted at once, at full budget
+    hard = await asyncio.wait_for(scheduler.acquire("game", "hard", units=3), 0.1)
+    assert hard.units == 1 and hard.wait == 0 and hard.scale == 1.0
+    scheduler.release(hard.units, hard.level)
+    assert not waiting.done() and scheduler.running == 2
+
+    scheduler.release(chunks[0].units, chunks[0].level)
+    chunk = await waiting
+    assert chunk.level == ANALYSIS and scheduler.analysis_running == 2
+    for grant in (chunks[1], chunk):
+        scheduler.release(grant.units, grant.level)
+    assert scheduler.running == 0 and scheduler.analysis_running == 0
+
+    # A single unit cannot be reserved; analysis shares it
+    assert AIScheduler(capacity=1, reserved=1).analysis_capacity == 1
+    print("✅ Reserved Unit Tests Passed!")
+
+
+if __name__ == "__main__":
+    test_fair_order()
+    test_degradation_and_admission()
+    test_reserved_units()
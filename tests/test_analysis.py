@@ -0,0 +1,188 @@
+"""
+Tests for stateless position analysis.
+"""
+
+import sys
+import os
+import asyncio
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.utils.ai_engines import AIEngineRegistry
+from api.utils.ai_executor import AIExecutor, _run_analysis_depth
+from api.utils.ai_logic import AILogic
+from api.utils.analysis import analyze_position, cache_key, from_canonical, to_canonical
+from api.utils.bitboard import ANY_BOARD, BitBoard, O, X, transform_move
+from api.utils.cache import get_analysis_cache
+from api.utils.transposition import TranspositionTable
+
+
+def opening_position():
+    position = BitBoard()
+    for move in (40, 36, 4, 38, 20):
+        position.play(move)
+    return position
+
+
+def test_analyze_position():
+    print("Testing position analysis...")
+
+    # Free move: X can take board 2 with cell 2, O could take board 3 the same way
+    position = BitBoard.from_string("." * 18 + "XX." + "." * 6 + "OO" + "." * 52, side=X)
+    result = analyze_position(position, max_nodes=5000, max_depth=3)
+    assert result["move"] == 2 * 9 + 2, result
+    assert result["score"] > 0 and result["pv"][0] == result["move"]
+    assert result["nodes"] > 0 and result["depth"] == 3
+
+    # With O to move the score is O's and favors O
+    position.side = O
+    position.zobrist = position.compute_zobrist()
+    result = analyze_position(position, max_nodes=5000, max_depth=3)
+    assert result["score"] > 0 and result["move"] in position.legal_moves()
+    print("   Best move for the side to move: OK")
+
+    assert "error" in analyze_position(BitBoard.from_string("X" * 81))
+    print("✅ Analysis Tests Passed!")
+
+
+def test_canonical_results():
+    print("\nTesting analysis results across symmetries...")
+
+    position = opening_position()
+    result = analyze_position(position, max_nodes=3000, max_depth=4)
+    entry_key, symmetry = cache_key(position, 3000, 4, 1.0)
+    canonical = to_canonical(result, symmetry)
+    for transform in range(8):
+        image = BitBoard()
+        for move in (40, 36, 4, 38, 20):
+            image.play(transform_move(move, transform))
+        image_key, image_symmetry = cache_key(image, 3000, 4, 1.0)
+        assert image_key == entry_key
+        mapped = from_canonical(canonical, image_symmetry, image)
+        assert mapped["move"] == transform_move(result["move"], transform)
+        # The mapped line replays legally on the image
+        for move in mapped["pv"]:
+            assert move in image.legal_moves()
+            image.play(move)
+    print("✅ Symmetry Tests Passed!")
+
+
+def test_batch_analysis():
+    """Test batches through the executor using asyncio.run"""
+    asyncio.run(_test_batch_analysis_async())
+
+
+async def _test_batch_analysis_async():
+    print("\nTesting batch analysis...")
+
+    await get_analysis_cache().clear()
+    executor = AIExecutor(max_workers=0)
+    position = opening_position()
+    mirrored = BitBoard()
+    for move in (40, 36, 4, 38, 20):
+        mirrored.play(transform_move(move, 4))
+    decided = BitBoard.from_string("O" * 81)
+
+    results = await executor.analyze([position, mirrored, decided], max_nodes=2000, max_depth=3)
+    assert [r["cached"] for r in results] == [False, True, False]
+    assert results[2]["error"]
+    board_idx, cell_idx = results[0]["best_move"]
+    assert results[1]["best_move"] == list(divmod(transform_move(board_idx * 9 + cell_idx, 4), 9))
+    assert results[0]["nps"] > 0 and len(results[0]["pv"]) >= 1
+    print("   Mirror image answered from its twin: OK")
+
+    again = await executor.analyze([mirrored], max_nodes=2000, max_depth=3)
+    assert again[0]["cached"] and again[0]["best_move"] == results[1]["best_move"]
+    # A different budget is a different entry
+    fresh = await executor.analyze([position], max_nodes=1000, max_depth=3)
+    assert not fresh[0]["cached"]
+
+    # Positions expected to search for long go one per worker task
+    slow = []
+    for line in ((40,), (40, 36), (40, 36, 4)):
+        slow.append(BitBoard())
+        for move in line:
+            slow[-1].play(move)
+    await executor.analyze(slow, max_nodes=200000, max_depth=2)
+
+    stats = executor.get_stats()
+    assert stats["analysis"]["positions"] == 8 and stats["analysis"]["searched"] == 6
+    assert stats["scheduler"]["levels"]["analysis"]["admitted"] == 5
+    print("✅ Batch Analysis Tests Passed!")
+
+
+def test_stream_analysis():
+    """Test progressive deepening updates using asyncio.run"""
+    asyncio.run(_test_stream_analysis_async())
+
+
+async def _test_stream_analysis_async():
+    print("\nTesting streamed analysis...")
+
+    executor = AIExecutor(max_workers=0)
+    position = opening_position()
+    updates = [
+        update async for update in executor.analyze_stream(
+            position, "game", max_nodes=20000, max_depth=4, time_limit=5.0
+        )
+    ]
+    assert [u["depth"] for u in updates] == [1, 2, 3, 4], updates
+    assert all(a["nodes"] < b["nodes"] for a, b in zip(updates, updates[1:]))
+    for update in updates:
+        assert update["move"] in position.legal_moves() and update["pv"][0] == update["move"]
+    assert executor.scheduler.running == 0
+    print(f"   Depths {[u['depth'] for u in updates]}, {updates[-1]['nodes']} nodes: OK")
+
+    # Closing the stream early hands the worker back; the engine's table is reused
+    engines = AIEngineRegistry(memory_limit_mb=4, table_entries=1 << 14)
+    engine = engines.get("game")
+    stream = executor.analyze_stream(position, "game", engine, max_depth=32, time_limit=5.0)
+    first = await stream.__anext__()
+    await stream.aclose()
+    assert first["depth"] == 1
+    for _ in range(100):
+        if not executor.scheduler.running:
+            break
+        await asyncio.sleep(0.01)
+    assert executor.scheduler.running == 0 and executor.scheduler.queued == 0
+    engines.clear()
+
+    # A decided game has nothing to stream
+    assert [u async for u in executor.analyze_stream(BitBoard.from_string("X" * 81), "game")] == []
+    stats = executor.get_stats()["analysis"]
+    assert stats["streams"] == 2 and stats["stream_updates"] == 5
+    print("✅ Streamed Analysis Tests Passed!")
+
+
+def test_analysis_shares_game_table():
+    print("\nTesting an analysis and an AI search on one table...")
+
+    def search(position, table):
+        ai = AILogic("hard", max_time=60, max_depth=4, max_nodes=10 ** 9,
+                     transposition_table=table, opening_book=None)
+        return ai.search_root(position.copy(), position.legal_moves())[-1]
+
+    # X to move, as for a hint on the human's turn; then the AI answers as O
+    lines = [(75, 35, 74, 23, 52, 64), (1, 16, 67, 44, 75, 30, 35, 80, 76, 38), (19, 17, 78, 54, 1, 11)]
+    for line in lines:
+        position = BitBoard()
+        for move in line:
+            position.play(move)
+        assert position.side == X
+        table = TranspositionTable(1 << 16)
+        active = None if position.active == ANY_BOARD else position.active
+        result, _ = _run_analysis_depth(0, position.to_string(), active, X, 5,
+                                        10 ** 9, 60, bytearray(1), table)
+        position.play(result["move"])
+        # The analysis' entries hold for O's search as they are
+        assert search(position, table) == search(position, TranspositionTable(1 << 16))
+    print("✅ Shared Table Tests Passed!")
+
+
+if __name__ == "__main__":
+    test_analyze_position()
+    test_canonical_results()
+    test_batch_analysis()
+    test_stream_analysis()
+    test_analysis_shares_game_table()
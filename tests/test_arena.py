@@ -0,0 +1,103 @@
+"""
+Tests for the self-play arena.
+"""
+
+import sys
+import os
+import json
+import random
+import tempfile
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.utils.arena import (
+    EngineConfig, GameRecord, elo_difference, random_opening, run_arena, schedule_games,
+    summarize, timing_summary,
+)
+from api.utils.bitboard import BitBoard
+
+
+def test_engine_spec_and_schedule():
+    print("Testing engine specs and scheduling...")
+
+    engine = EngineConfig.parse("fast=Hard:time=0.05:nodes=5000:depth=3")
+    assert engine == EngineConfig("fast", "hard", max_time=0.05, max_nodes=5000, max_depth=3)
+    assert EngineConfig.parse("plain") == EngineConfig("plain", "hard")
+    for bad in ("x=hard:speed=1", "x=impossible", "=hard"):
+        try:
+            EngineConfig.parse(bad)
+            assert False, f"{bad} should be rejected"
+        except ValueError:
+            pass
+    print("   Engine specs: OK")
+
+    opening = random_opening(random.Random(1), plies=4)
+    position = BitBoard()
+    for move in opening:
+        assert move in position.legal_moves()
+        position.play(move)
+
+    a, b, c = EngineConfig("a"), EngineConfig("b"), EngineConfig("c")
+    tasks = schedule_games([a, b, c], games=3, opening_plies=2, seed=7)
+    assert len(tasks) == 3 * 4, "Three pairs, two openings each with both colors"
+    for first, second in zip(tasks[::2], tasks[1::2]):
+        assert (first[0], first[1]) == (second[1], second[0]) and first[2] == second[2]
+    print("✅ Spec and Schedule Tests Passed!")
+
+
+def test_elo_summary():
+    print("\nTesting Elo summary...")
+
+    assert elo_difference(0.5) == 0
+    assert abs(elo_difference(0.75) - 190.85) < 0.01
+    records = (
+        [GameRecord("a", "b", [], result="X")] * 6
+        + [GameRecord("b", "a", [], result="X")] * 2
+        + [GameRecord("a", "b", [], result="T")] * 2
+    )
+    result = summarize(records, "a", "b")
+    assert (result["wins"], result["draws"], result["losses"]) == (6, 2, 2)
+    assert result["score"] == 0.7
+    assert result["elo_low"] < result["elo"] < result["elo_high"]
+    assert summarize(records, "b", "a")["elo"] == -result["elo"]
+    print("✅ Elo Tests Passed!")
+
+
+def test_arena_games():
+    print("\nTesting arena games...")
+
+    weak = EngineConfig("weak", "easy")
+    strong = EngineConfig("strong", "hard", max_nodes=2000, max_depth=2)
+    with tempfile.TemporaryDirectory() as directory:
+        log_path = os.path.join(directory, "arena.jsonl")
+        records = run_arena([weak, strong], games=4, workers=2, seed=3, log_path=log_path)
+        with open(log_path) as f:
+            lines = [json.loads(line) for line in f]
+
+    assert len(records) == len(lines) == 4
+    assert sorted(record.x for record in records) == ["strong", "strong", "weak", "weak"]
+    for record, line in zip(records, lines):
+        # Replaying the logged moves reaches the logged result
+        position = BitBoard()
+        for index in range(0, len(line["moves"]), 2):
+            move = int(line["moves"][index:index + 2])
+            assert move in position.legal_moves()
+            position.play(move)
+        assert position.result() is not None
+        assert line["result"] == record.result
+        assert len(record.times_ms) == len(record.moves)
+    print("   Games replay legally: OK")
+
+    result = summarize(records, "strong", "weak")
+    assert result["games"] == 4
+    timings = timing_summary(records)
+    assert set(timings) == {"weak", "strong"}
+    print(f"   strong vs weak: {result}")
+    print("✅ Arena Game Tests Passed!")
+
+
+if __name__ == "__main__":
+    test_engine_spec_and_schedule()
+    test_elo_summary()
+    test_arena_games()
@@ -0,0 +1,72 @@
+"""
+Tests for the AI search benchmark harness.
+"""
+
+import sys
+import os
+import copy
+import json
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.utils.benchmark import (
+    DEFAULT_BASELINE_PATH, BenchmarkPosition, compare, format_report, load_corpus,
+    run_benchmark,
+)
+
+
+def test_corpus_and_baseline():
+    print("Testing benchmark corpus...")
+
+    corpus = load_corpus()
+    phases = {position.name.split("-")[0] for position in corpus}
+    assert phases == {"opening", "midgame", "endgame"}
+    for position in corpus:
+        bitboard = position.to_bitboard()
+        assert bitboard.winner() is None and len(bitboard.legal_moves()) > 1, position.name
+    print(f"   {len(corpus)} positions: OK")
+
+    with open(DEFAULT_BASELINE_PATH) as f:
+        baseline = json.load(f)
+    assert [(r["name"], r["depth"]) for r in baseline["positions"]] == [
+        (position.name, position.depth) for position in corpus
+    ], "Baseline is out of date; re-record it with --save-baseline"
+    print("✅ Corpus Tests Passed!")
+
+
+def test_report_and_regressions():
+    print("\nTesting benchmark report and comparison...")
+
+    # Shallow copies of two corpus positions keep the test quick
+    corpus = [
+        BenchmarkPosition(position.name, 3, position.active_board, position.cells)
+        for position in load_corpus()[:2]
+    ]
+    report = run_benchmark(corpus)
+    result = report["positions"][0]
+    assert result["nodes"] > 0 and result["nps"] > 0
+    assert list(result["time_to_depth_ms"]) == ["1", "2", "3"]
+    assert 0 <= result["tt_hit_rate"] <= 100 and result["branching_factor"] > 1
+    assert "total" in format_report(report, report)
+    print("   Report: OK")
+
+    # Fixed-depth searches are deterministic
+    again = run_benchmark(corpus)
+    assert [r["nodes"] for r in again["positions"]] == [r["nodes"] for r in report["positions"]]
+    regressions, changes = compare(again, report, max_nps_drop=1.0)
+    assert regressions == [] and changes == []
+    print("   Same engine, no regression: OK")
+
+    baseline = copy.deepcopy(report)
+    baseline["positions"][0]["nodes"] //= 2
+    baseline["positions"][1]["move"] = (baseline["positions"][1]["move"] + 1) % 81
+    regressions, changes = compare(report, baseline, max_nps_drop=1.0)
+    assert len(regressions) == 1 and regressions[0].startswith(corpus[0].name)
+    assert len(changes) == 1 and changes[0].startswith(corpus[1].name)
+    print("✅ Report and Regression Tests Passed!")
+
+
+if __name__ == "__main__":
+    test_corpus_and_baseline()
+    test_report_and_regressions()
@@ -0,0 +1,286 @@
+"""
+Tests for the compact bitboard position and the game rules on it.
+"""
+
+import sys
+import os
+import random
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.models.game import GameState, GameMode, PlayerSymbol
+from api.utils.bitboard import (
+    BitBoard, X, O, TIE, ANY_BOARD, FULL_BOARD, SYMMETRY_CELLS, SYMMETRY_INVERSE,
+    transform_move, next_active_board, side_to_symbol,
+)
+from api.utils.board_tables import board_code, winner_symbol
+
+
+def create_game(active_board=None, current_player=PlayerSymbol.X):
+    return GameState(
+        id="test_game",
+        mode=GameMode.AI,
+        active_board=active_board,
+        current_player=current_player,
+    )
+
+
+def test_from_game_state():
+    print("Testing GameState conversion...")
+
+    game = create_game(active_board=4, current_player=PlayerSymbol.O)
+    game.global_board[4][0] = PlayerSymbol.X
+    game.global_board[4][8] = PlayerSymbol.O
+    game.global_board[0] = [PlayerSymbol.X] * 9  # Captured board
+
+    position = BitBoard.from_game_state(game)
+    assert position.masks[X][4] == 0b000000001
+    assert position.masks[O][4] == 0b100000000
+    assert position.meta[X] == 0b1, "Captured board should be marked as won"
+    assert position.closed == 0b1
+    assert position.active == 4
+    assert position.side == O
+    print("   Conversion: OK")
+
+    moves = position.legal_moves()
+    assert moves == [4 * 9 + c for c in range(1, 8)], f"Unexpected moves {moves}"
+    print("   Legal moves on active board: OK")
+
+    free = BitBoard.from_game_state(create_game())
+    assert free.active == ANY_BOARD
+    assert len(free.legal_moves()) == 81
+
+    cells = position.to_string()
+    assert len(cells) == 81 and cells[:9] == "X" * 9 and cells[36:45] == "X.......O"
+    copy = BitBoard.from_string(cells, active_board=4, side=O)
+    assert copy.key() == position.key()
+    for bad in ("X" * 80, "." * 80 + "Z"):
+        try:
+            BitBoard.from_string(bad)
+            assert False, "Malformed cells should be rejected"
+        except ValueError:
+            pass
+    print("   Compact strings: OK")
+    print("✅ Conversion Tests Passed!")
+
+
+def test_play_capture_and_redirect():
+    print("\nTesting move application...")
+
+    position = BitBoard()
+    # X takes the top row of board 0, O answers inside board 1 each time
+    for move in (0 * 9 + 1, 1 * 9 + 0, 0 * 9 + 2, 2 * 9 + 0):
+        position.play(move)
+    position.play(0 * 9 + 0)  # X completes the row on board 0
+
+    assert position.masks[X][0] == FULL_BOARD, "Won board should be captured"
+    assert position.masks[O][0] == 0
+    assert position.meta[X] == 0b1
+    assert position.side == O
+    # Cell 0 points to board 0, which is decided: redirect to first open board
+    assert position.active == 1, f"Expected redirect to board 1, got {position.active}"
+    print("   Capture and redirect: OK")
+
+    copy = position.copy()
+    copy.play(1 * 9 + 4)
+    assert position.masks[O][1] == 0b1, "Copy must not share masks"
+    assert copy.key() != position.key()
+    print("✅ Move Application Tests Passed!")
+
+
+def test_play_undo_roundtrip():
+    print("\nTesting make/unmake...")
+
+    position = BitBoard()
+    snapshots = []
+    # Open with a board capture, continue with legal moves, then unwind
+    for ply in range(20):
+        if ply < 5:
+            move = (1, 9, 2, 18, 0)[ply]
+        else:
+            moves = position.legal_moves()
+            move = moves[len(moves) // 2]
+        snapshots.append((position.key(), position.meta[:], position.closed))
+        position.play(move)
+
+    for expected in reversed(snapshots):
+        position.undo()
+        assert (position.key(), position.meta, position.closed) == expected
+    assert position.key() == BitBoard().key()
+    print("✅ Make/Unmake Tests Passed!")
+
+
+def test_incremental_zobrist():
+    print("\nTesting Zobrist keys...")
+
+    position = BitBoard()
+    seen = {position.key()}
+    for ply in range(30):
+        if ply < 5:
+            move = (1, 9, 2, 18, 0)[ply]
+        else:
+            moves = position.legal_moves()
+            move = moves[(ply * 7) % len(moves)]
+        position.play(move)
+        assert position.key() == position.compute_zobrist(), f"Key drifted at ply {ply}"
+        seen.add(position.key())
+    assert len(seen) == 31, "Distinct positions should get distinct keys"
+    print("   Incremental key matches full recompute: OK")
+
+    # Same cells, different side to move or active board: different keys
+    other = position.copy()
+    other.side ^= 1
+    assert other.compute_zobrist() != position.key()
+    other = position.copy()
+    other.active = (position.active + 1) % 9
+    assert other.compute_zobrist() != position.key()
+    print("✅ Zobrist Tests Passed!")
+
+
+def test_incremental_board_eval():
+    print("\nTesting incremental evaluation...")
+
+    rng = random.Random(8)
+    for _ in range(20):
+        position = BitBoard()
+        values = [position.board_eval]
+        while position.result() is None:
+            position.play(rng.choice(position.legal_moves()))
+            assert position.board_eval == position.compute_board_eval()
+            values.append(position.board_eval)
+        # Unmake restores every earlier value
+        while position.undo_depth():
+            values.pop()
+            position.undo()
+            assert position.board_eval == values[-1]
+    print("   Play and undo keep board_eval exact: OK")
+
+    game = create_game()
+    game.global_board[2][0] = game.global_board[2][1] = PlayerSymbol.O
+    game.global_board[5] = [PlayerSymbol.X] * 9
+    position = BitBoard.from_game_state(game)
+    # Captured board 5 drops out; board 2 holds O's two-in-a-row
+    assert position.board_eval == position.compute_board_eval() < 0
+    assert position.copy().board_eval == position.board_eval
+    print("✅ Incremental Evaluation Tests Passed!")
+
+
+def test_canonical_key():
+    print("\nTesting symmetry canonicalization...")
+
+    position = BitBoard()
+    for move in (1, 9, 2, 18, 0, 13):
+        position.play(move)
+
+    key, symmetry = position.canonical_key()
+    for transform in range(8):
+        # Replay the same game under each of the 8 symmetries
+        image = BitBoard()
+        for move in (1, 9, 2, 18, 0, 13):
+            image.play(transform_move(move, transform))
+        assert image.active == SYMMETRY_CELLS[transform][position.active]
+        image_key, image_symmetry = image.canonical_key()
+        assert image_key == key, f"Symmetry {transform} changed the canonical key"
+        assert image_key <= image.key()
+    print("   Same key for all images: OK")
+
+    # The reported symmetry maps the position onto its canonical image
+    canonical = BitBoard()
+    for move in (1, 9, 2, 18, 0, 13):
+        canonical.play(transform_move(move, symmetry))
+    assert canonical.key() == key
+    image, image_symmetry = position.canonical()
+    assert image_symmetry == symmetry and image.key() == key
+    assert image.masks == canonical.masks and image.closed == canonical.closed
+    assert image.board_eval == canonical.board_eval
+    print("   Canonical image matches the replayed game: OK")
+
+    # Moves found on the canonical image map back to legal moves here
+    legal = set(position.legal_moves())
+    inverse = SYMMETRY_INVERSE[symmetry]
+    assert {transform_move(move, inverse) for move in image.legal_moves()} == legal
+    print("✅ Canonicalization Tests Passed!")
+
+
+def test_winner():
+    print("\nTesting winner detection...")
+
+    position = BitBoard()
+    assert position.winner() is None
+
+    # X owns five boards: O cannot catch up even with all remaining boards
+    position.meta[X] = 0b000011111
+    position.closed = 0b000011111
+    assert position.winner() == X
+    assert position.result() is None, "The game itself goes on until every board is decided"
+    print("   Decided by board count: OK")
+
+    position.meta = [0b000001111, 0b011110000]
+    position.closed = FULL_BOARD
+    assert position.winner() == TIE
+    print("✅ Winner Tests Passed!")
+
+
+def reference_play(board, active, symbol, board_idx, cell_idx):
+    """Move rules on GameState-style lists, as make_move applied them"""
+    board[board_idx][cell_idx] = symbol
+    local_winner = winner_symbol(board_code(board[board_idx]))
+    if local_winner in (PlayerSymbol.X, PlayerSymbol.O):
+        board[board_idx] = [local_winner] * 9
+
+    winners = [winner_symbol(board_code(cells)) for cells in board]
+    result = None
+    if all(w is not None for w in winners):
+        x_wins = winners.count(PlayerSymbol.X)
+        o_wins = winners.count(PlayerSymbol.O)
+        result = (PlayerSymbol.X if x_wins > o_wins
+                  else PlayerSymbol.O if o_wins > x_wins else PlayerSymbol.T)
+
+    open_boards = [i for i, cells in enumerate(board) if any(c is None for c in cells)]
+    if result is not None or not open_boards:
+        active = None
+    elif cell_idx in open_boards:
+        active = cell_idx
+    else:
+        active = open_boards[0]
+    return active, result
+
+
+def test_rules_match_reference():
+    print("\nTesting rules against the list implementation...")
+
+    assert next_active_board(4, 0) == 4
+    assert next_active_board(4, 0b000010011) == 2, "Decided target redirects to first open board"
+    assert next_active_board(0, FULL_BOARD) == ANY_BOARD
+
+    rng = random.Random(3)
+    for _ in range(50):
+        position = BitBoard()
+        board = [[None] * 9 for _ in range(9)]
+        active = None
+        while position.result() is None:
+            legal = [(b, c) for b in (range(9) if active is None else [active])
+                     for c in range(9) if board[b][c] is None]
+            assert sorted(divmod(m, 9) for m in position.legal_moves()) == legal
+
+            board_idx, cell_idx = rng.choice(legal)
+            symbol = side_to_symbol(position.side)
+            active, result = reference_play(board, active, symbol, board_idx, cell_idx)
+            position.play(board_idx * 9 + cell_idx)
+
+            assert position.to_global_board() == board
+            assert (None if position.active == ANY_BOARD else position.active) == active
+            assert side_to_symbol(position.result()) == result
+    print("✅ Rules Tests Passed!")
+
+
+if __name__ == "__main__":
+    test_from_game_state()
+    test_play_capture_and_redirect()
+    test_play_undo_roundtrip()
+    test_incremental_zobrist()
+    test_incremental_board_eval()
+    test_canonical_key()
+    test_winner()
+    test_rules_match_reference()
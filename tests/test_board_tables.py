@@ -0,0 +1,83 @@
+"""
+Tests for the precomputed local-board lookup tables.
+"""
+
+import sys
+import os
+import random
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.models.game import PlayerSymbol
+from api.utils.board_tables import (
+    STATE_COUNT, WINNER, LEGAL, EVAL, THREATS_X, THREATS_O, NEAR_WINS_X,
+    WINNER_X, WINNER_O, WINNER_TIE, WINNER_NONE,
+    board_code, mask_code, winner_symbol,
+)
+
+
+def test_table_sizes_and_codes():
+    print("Testing table layout...")
+
+    assert len(WINNER) == len(LEGAL) == len(EVAL) == STATE_COUNT == 19683
+    assert board_code([None] * 9) == 0
+    assert board_code([PlayerSymbol.O] + [None] * 8) == 2
+    assert board_code([None, PlayerSymbol.X] + [None] * 7) == 3
+    assert mask_code(0b10, 0b1) == board_code([PlayerSymbol.O, PlayerSymbol.X] + [None] * 7)
+    print("✅ Table Layout Tests Passed!")
+
+
+def test_known_states():
+    print("\nTesting known board states...")
+
+    X, O, _ = PlayerSymbol.X, PlayerSymbol.O, None
+
+    row = board_code([X, X, X, O, O, _, _, _, _])
+    assert WINNER[row] == WINNER_X
+    assert LEGAL[row] == 0, "Decided boards have no legal cells"
+
+    diagonal = board_code([O, X, X, _, O, _, X, _, O])
+    assert winner_symbol(diagonal) == PlayerSymbol.O
+    assert WINNER[diagonal] == WINNER_O
+
+    tie = board_code([X, O, X, X, O, O, O, X, X])
+    assert WINNER[tie] == WINNER_TIE
+
+    open_board = board_code([X, X, _, _, O, _, _, _, _])
+    assert WINNER[open_board] == WINNER_NONE
+    assert THREATS_X[open_board] == 0b100, "X threatens cell 2"
+    assert THREATS_O[open_board] == 0
+    assert NEAR_WINS_X[open_board] == 1
+    assert LEGAL[open_board] == 0b111101100
+    print("✅ Known State Tests Passed!")
+
+
+def test_eval_matches_line_heuristic():
+    print("\nTesting heuristic table against direct line scoring...")
+
+    lines = [
+        [0, 1, 2], [3, 4, 5], [6, 7, 8],
+        [0, 3, 6], [1, 4, 7], [2, 5, 8],
+        [0, 4, 8], [2, 4, 6],
+    ]
+    rng = random.Random(7)
+    for _ in range(500):
+        board = [rng.choice([None, PlayerSymbol.X, PlayerSymbol.O]) for _ in range(9)]
+        expected = 0
+        for line in lines:
+            cells = [board[i] for i in line]
+            x_count = cells.count(PlayerSymbol.X)
+            o_count = cells.count(PlayerSymbol.O)
+            if o_count == 0:
+                expected += {2: 20, 1: 2}.get(x_count, 0)
+            elif x_count == 0:
+                expected -= {2: 20, 1: 2}.get(o_count, 0)
+        assert EVAL[board_code(board)] == expected
+    print("✅ Heuristic Table Tests Passed!")
+
+
+if __name__ == "__main__":
+    test_table_sizes_and_codes()
+    test_known_states()
+    test_eval_matches_line_heuristic()
@@ -0,0 +1,138 @@
+"""
+Tests for the exact endgame solver.
+"""
+
+import sys
+import os
+import random
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.models.game import GameState, GameMode, PlayerSymbol
+from api.utils.ai_logic import AILogic
+from api.utils.bitboard import BitBoard, TIE
+from api.utils.endgame import EndgameSolver, SOLVED_WIN, SOLVED_DRAW, SOLVED_LOSS
+
+
+def random_endgame(rng, empties):
+    """Play random moves until at most `empties` cells are left open"""
+    while True:
+        position = BitBoard()
+        while EndgameSolver.empty_cells(position) > empties and position.winner() is None:
+            position.play(rng.choice(position.legal_moves()))
+        if position.winner() is None:
+            return position
+
+
+def brute_force(position):
+    """Plain negamax to the end of the game, no pruning or caching"""
+    winner = position.winner()
+    if winner is not None:
+        if winner == TIE:
+            return SOLVED_DRAW
+        return SOLVED_WIN if winner == position.side else SOLVED_LOSS
+    best = SOLVED_LOSS
+    for move in position.legal_moves():
+        position.play(move)
+        best = max(best, -brute_force(position))
+        position.undo()
+    return best
+
+
+def test_solves_forced_win():
+    print("Testing forced win...")
+
+    X, O, _ = PlayerSymbol.X, PlayerSymbol.O, None
+    game = GameState(
+        id="test_game",
+        mode=GameMode.AI,
+        ai_difficulty="hard",
+        current_player=O,
+        active_board=8,
+    )
+    for board_idx in range(4):
+        game.global_board[board_idx] = [X] * 9
+    for board_idx in range(4, 8):
+        game.global_board[board_idx] = [O] * 9
+    # Last board decides the game: O completes the top row
+    game.global_board[8] = [O, O, _, X, X, _, _, _, _]
+
+    position = BitBoard.from_game_state(game)
+    solver = EndgameSolver()
+    assert solver.solve(position) == (SOLVED_WIN, 8 * 9 + 2)
+    print("   Solver: OK")
+
+    ai = AILogic(difficulty="hard")
+    available = [(8, c) for c in (2, 5, 6, 7, 8)]
+    assert ai.get_next_move(game, available) == (8, 2)
+    assert ai._endgame_solver.get_stats()["proven"] == 1
+    print("✅ Forced Win Tests Passed!")
+
+
+def test_matches_brute_force():
+    print("\nTesting solver results against brute force...")
+
+    rng = random.Random(11)
+    solver = EndgameSolver()
+    for _ in range(20):
+        position = random_endgame(rng, 9)
+        key = position.key()
+        result, move = solver.solve(position)
+        assert position.key() == key, "Position should be restored"
+        assert result == brute_force(position)
+
+        # The returned move achieves the proven result
+        position.play(move)
+        assert -brute_force(position) == result
+        position.undo()
+    print("✅ Brute Force Tests Passed!")
+
+
+def test_budget_exhausted():
+    print("\nTesting node budget...")
+
+    rng = random.Random(5)
+    position = random_endgame(rng, 40)
+    key = position.key()
+    solver = EndgameSolver(max_nodes=2048)
+    assert solver.solve(position) is None, "Budget should run out"
+    assert position.key() == key and position.undo_depth() > 0
+    stats = solver.get_stats()
+    assert stats["solves"] == 1 and stats["proven"] == 0
+    print("✅ Budget Tests Passed!")
+
+
+def test_solver_reused_across_moves():
+    print("\nTesting a solver kept across moves...")
+
+    rng = random.Random(7)
+    position = random_endgame(rng, 22)
+    solver = EndgameSolver()
+    result, move = solver.solve(position)
+    # The AI's move and the opponent's first legal reply
+    position.play(move)
+    position.play(position.legal_moves()[0])
+    assert position.winner() is None
+
+    # The next move's solve finds the earlier proofs in the kept table
+    fresh = EndgameSolver()
+    fresh_result = fresh.solve(position)
+    before = solver.get_stats()["total_nodes"]
+    assert solver.solve(position, should_stop=lambda: False) == fresh_result
+    reused_nodes = solver.get_stats()["total_nodes"] - before
+    fresh_nodes = fresh.get_stats()["total_nodes"]
+    assert reused_nodes < fresh_nodes, f"{reused_nodes} nodes reused, {fresh_nodes} fresh"
+    print(f"   {fresh_nodes} -> {reused_nodes} nodes: OK")
+
+    # AILogic searches with the solver it is given
+    ai = AILogic(difficulty="hard", endgame_solver=solver)
+    assert ai._endgame_solver is solver
+    print("✅ Solver Reuse Tests Passed!")
+
+
+if __name__ == "__main__":
+    test_solves_forced_win()
+    test_matches_brute_force()
+    test_budget_exhausted()
+    test_solver_reused_across_moves()
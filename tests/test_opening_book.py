@@ -0,0 +1,94 @@
+"""
+Tests for the memory-mapped opening book.
+"""
+
+import sys
+import os
+import tempfile
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.models.game import GameState, GameMode, PlayerSymbol
+from api.utils.ai_logic import AILogic
+from api.utils.bitboard import BitBoard, transform_move
+from api.utils.opening_book import OpeningBook, build_book, write_book
+
+
+def test_build_and_probe():
+    print("Testing opening book build and lookup...")
+
+    entries = build_book(plies=2, depth=2)
+    # One O reply per distinct first move: 15 up to symmetry
+    assert len(entries) == 15, f"Expected 15 positions, got {len(entries)}"
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "book.bin")
+        write_book(path, entries, plies=2, depth=2)
+        book = OpeningBook(path)
+        try:
+            assert len(book) == 15 and book.plies == 2 and book.depth == 2
+
+            # All 8 images of a first move get the matching image of the reply
+            position = BitBoard()
+            position.play(0 * 9 + 1)
+            move, _, depth = book.probe(position)
+            assert depth == 2
+            for symmetry in range(1, 8):
+                image = BitBoard()
+                image.play(transform_move(0 * 9 + 1, symmetry))
+                image_move, _, _ = book.probe(image)
+                assert image_move in image.legal_moves()
+                image.play(image_move)
+                position_copy = position.copy()
+                position_copy.play(move)
+                assert image.canonical_key()[0] == position_copy.canonical_key()[0]
+            print("   Symmetric lookups: OK")
+
+            # Positions outside the book miss
+            position.play(move)
+            assert book.probe(position) is None
+            stats = book.get_stats()
+            assert stats["lookups"] == 9 and stats["hits"] == 8
+            print("   Misses and stats: OK")
+
+            # Hard mode plays the book move
+            game = GameState(
+                id="test_game",
+                mode=GameMode.AI,
+                ai_difficulty="hard",
+                current_player=PlayerSymbol.O,
+                active_board=4,
+                move_count=1,
+            )
+            game.global_board[4][4] = PlayerSymbol.X
+            available = [(4, c) for c in range(9) if c != 4]
+            position = BitBoard.from_game_state(game, side=1)
+            expected = divmod(book.probe(position)[0], 9)
+            ai = AILogic(difficulty="hard", opening_book=book)
+            assert ai.get_next_move(game, available) == expected
+            print("   AI uses book move: OK")
+        finally:
+            book.close()
+
+    print("✅ Opening Book Tests Passed!")
+
+
+def test_rejects_foreign_file():
+    print("\nTesting invalid book files...")
+
+    with tempfile.NamedTemporaryFile(suffix=".bin", delete=False) as handle:
+        handle.write(b"not a book" * 10)
+    try:
+        OpeningBook(handle.name)
+        assert False, "Should have rejected the file"
+    except ValueError:
+        pass
+    finally:
+        os.unlink(handle.name)
+    print("✅ Invalid File Tests Passed!")
+
+
+if __name__ == "__main__":
+    test_build_and_probe()
+    test_rejects_foreign_file()
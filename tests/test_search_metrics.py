@@ -0,0 +1,81 @@
+"""
+Tests for the AI search histograms.
+"""
+
+import sys
+import os
+import asyncio
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.models.game import GameState, GameMode, PlayerSymbol
+from api.utils.ai_executor import AIExecutor
+from api.utils.search_metrics import Histogram, SearchMetrics
+
+
+def search_stats(nodes, depth, time_ms, probes=100, hits=40, cutoffs=10, branching_factor=3.0):
+    return {
+        "nodes": nodes, "depth": depth, "time_ms": time_ms, "tt_probes": probes,
+        "tt_hits": hits, "cutoffs": cutoffs, "branching_factor": branching_factor,
+    }
+
+
+def test_histograms():
+    print("Testing search histograms...")
+
+    histogram = Histogram((10, 100, 1000))
+    for value in (5, 10, 50, 500, 5000):
+        histogram.record(value)
+    stats = histogram.to_dict()
+    assert stats["buckets"] == {"10": 2, "100": 1, "1000": 1, "+Inf": 1}
+    assert stats["count"] == 5 and stats["mean"] == 1113 and stats["max"] == 5000
+    assert stats["p50"] == 100 and stats["p95"] == 5000
+    print("   Buckets and quantiles: OK")
+
+    metrics = SearchMetrics()
+    # A split search: two shares of the root moves
+    assert metrics.record("hard", [
+        search_stats(30000, 6, 150, probes=300, hits=150),
+        search_stats(20000, 5, 200, probes=100, hits=10, branching_factor=0),
+    ], wall_ms=230)
+    # Book and shortcut moves are not searches
+    assert not metrics.record("hard", [search_stats(0, 0, 0)], wall_ms=1)
+
+    hard = metrics.get_stats()["hard"]
+    assert hard["nodes"]["count"] == 1 and hard["nodes"]["max"] == 50000
+    assert hard["depth"]["max"] == 5 and hard["time_ms"]["max"] == 200
+    assert hard["overhead_ms"]["max"] == 30 and hard["nps"]["max"] == 250000
+    assert hard["tt_hit_rate"]["max"] == 40 and hard["cutoffs"]["max"] == 20
+    assert hard["branching_factor"]["max"] == 3
+    print("✅ Histogram Tests Passed!")
+
+
+def test_executor_records_searches():
+    """Test per-difficulty recording of executor searches using asyncio.run"""
+    asyncio.run(_test_executor_records_async())
+
+
+async def _test_executor_records_async():
+    print("\nTesting search recording in the executor...")
+
+    executor = AIExecutor(max_workers=0, result_cache=None)
+    game = GameState(id="test_game", mode=GameMode.AI, current_player=PlayerSymbol.O)
+    game.global_board[4][4] = PlayerSymbol.X
+    # Free move over edge cells only, so every level searches
+    moves = [(b, c) for b in range(9) for c in (1, 3, 5, 7)]
+    for difficulty in ("easy", "medium", "medium"):
+        await executor.get_move(game, moves, difficulty)
+
+    stats = executor.search_metrics.get_stats()
+    assert set(stats) == {"easy", "medium"}
+    assert stats["medium"]["nodes"]["count"] == 2 and stats["easy"]["depth"]["max"] == 1
+    assert stats["medium"]["nps"]["mean"] > 0 and stats["medium"]["overhead_ms"]["count"] == 2
+    print(f"   medium: {stats['medium']['nodes']['mean']} nodes, "
+          f"{stats['medium']['time_ms']['mean']} ms per move: OK")
+    print("✅ Executor Recording Tests Passed!")
+
+
+if __name__ == "__main__":
+    test_histograms()
+    test_executor_records_searches()